@@ -0,0 +1,141 @@
+"""
+벤치마크용 합성 HTML/CSS 문서 생성기
+
+모든 생성기는 (대략적인) 목표 바이트 수를 받아 그 크기의 문서를 돌려준다.
+같은 인자에는 항상 같은 문서를 만들므로 실행 사이의 결과를 비교할 수 있고,
+네트워크 없이 돌릴 수 있다.
+"""
+
+import random
+from typing import Callable
+
+SEED = 2024
+
+WORDS = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod "
+    "tempor incididunt ut labore et dolore magna aliqua 소요린 브라우저 렌더링"
+).split()
+
+TAGS = ["p", "div", "span", "b", "i", "a", "li", "section", "em", "small"]
+
+
+def repeat_to_size(size: int, unit: Callable[[random.Random], str]) -> str:
+    rng = random.Random(SEED)
+    parts: list[str] = []
+    total = 0
+    while total < size:
+        part = unit(rng)
+        parts.append(part)
+        total += len(part)
+    return "".join(parts)
+
+
+def sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def wide(size: int) -> str:
+    """body 바로 아래에 짧은 형제 요소가 잔뜩 늘어선 문서"""
+
+    def unit(rng: random.Random) -> str:
+        tag = rng.choice(TAGS)
+        return f"<{tag}>{sentence(rng, rng.randint(1, 6))}</{tag}>\n"
+
+    return "<html><body>\n" + repeat_to_size(size, unit) + "</body></html>"
+
+
+def deep(size: int) -> str:
+    """한 갈래로 깊게 중첩된 문서 (중간중간 텍스트가 섞여 있다)"""
+    opening = repeat_to_size(size // 2, lambda rng: f"<div>{rng.choice(WORDS)} ")
+    return opening + "</div>" * opening.count("<div>")
+
+
+def attributes(size: int) -> str:
+    """속성이 많은 여는 태그 위주의 문서"""
+
+    def unit(rng: random.Random) -> str:
+        attrs = " ".join(
+            f'data-{rng.choice(WORDS)}-{i}="{sentence(rng, 2)}"'
+            for i in range(rng.randint(3, 8))
+        )
+        return (
+            f"<a href=\"/page/{rng.randint(0, 9999)}?q=1&amp;r=2\" "
+            f"class='link {rng.choice(WORDS)}' id=item{rng.randint(0, 9999)} "
+            f"{attrs} hidden>{rng.choice(WORDS)}</a>\n"
+        )
+
+    return "<html><body>\n" + repeat_to_size(size, unit) + "</body></html>"
+
+
+def scripts(size: int) -> str:
+    """<script> 본문이 대부분을 차지하는 문서"""
+
+    def unit(rng: random.Random) -> str:
+        body = "\n".join(
+            f'  if (a < {i} && b > {i}) {{ s = "<div>{rng.choice(WORDS)}</div>"; }}'
+            for i in range(rng.randint(5, 20))
+        )
+        return f"<script>\n{body}\n</script>\n<p>{sentence(rng, 4)}</p>\n"
+
+    return "<html><body>\n" + repeat_to_size(size, unit) + "</body></html>"
+
+
+def huge_text(size: int) -> str:
+    """몇 개의 아주 큰 텍스트 노드로 이뤄진 문서"""
+
+    def unit(rng: random.Random) -> str:
+        line = sentence(rng, 12)
+        return line + " &lt;tag&gt;\n" if rng.random() < 0.1 else line + "\n"
+
+    text = repeat_to_size(size, unit)
+    return f"<html><body><pre>{text}</pre></body></html>"
+
+
+def lists(size: int) -> str:
+    """목록과 표가 대부분인 문서"""
+
+    def unit(rng: random.Random) -> str:
+        if rng.random() < 0.5:
+            items = "".join(
+                f"<li>{sentence(rng, rng.randint(1, 5))}</li>"
+                for _ in range(rng.randint(3, 12))
+            )
+            return f"<ul>{items}</ul>\n"
+        rows = "".join(
+            "<tr>" + "".join(f"<td>{rng.choice(WORDS)}</td>" for _ in range(4)) + "</tr>"
+            for _ in range(rng.randint(3, 12))
+        )
+        return f"<table>{rows}</table>\n"
+
+    return "<html><body>\n" + repeat_to_size(size, unit) + "</body></html>"
+
+
+def stylesheet(size: int) -> str:
+    """태그 선택자와 자손 선택자가 섞인 스타일시트"""
+    properties = [
+        ("color", ["red", "blue", "#333", "black"]),
+        ("font-size", ["12px", "16px", "110%", "90%"]),
+        ("font-weight", ["normal", "bold"]),
+        ("background-color", ["white", "gray", "#eee"]),
+        ("display", ["block", "inline"]),
+    ]
+
+    def unit(rng: random.Random) -> str:
+        selector = " ".join(rng.choice(TAGS) for _ in range(rng.randint(1, 3)))
+        body = " ".join(
+            f"{name}: {rng.choice(values)};"
+            for name, values in rng.sample(properties, rng.randint(1, 4))
+        )
+        return f"{selector} {{ {body} }}\n"
+
+    return repeat_to_size(size, unit)
+
+
+HTML_CORPORA: dict[str, Callable[[int], str]] = {
+    "wide": wide,
+    "deep": deep,
+    "attributes": attributes,
+    "scripts": scripts,
+    "huge_text": huge_text,
+    "lists": lists,
+}
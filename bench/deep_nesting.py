@@ -0,0 +1,37 @@
+"""
+깊게 중첩된 문서를 파싱하는 데 걸리는 시간을 재는 벤치마크
+
+    uv run python -m bench.deep_nesting --depth 10000
+"""
+
+import argparse
+import time
+
+from soyorin.lexer import HTMLParser
+
+
+def make_document(depth: int) -> str:
+    return (
+        "<div><p>text</p>" * depth
+        + "<ul><li>a<li>b</ul>"
+        + "</div>" * depth
+    )
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--depth", type=int, default=10_000)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    body = make_document(args.depth)
+    best = float("inf")
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        HTMLParser(body).parse()
+        best = min(best, time.perf_counter() - start)
+    print(f"depth={args.depth} bytes={len(body)} best={best:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
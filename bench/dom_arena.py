@@ -0,0 +1,62 @@
+"""
+객체 DOM과 DOMArena(열 기반 DOM)를 비교하는 벤치마크
+
+파싱, tree_to_list, <link>/<title> 찾기, 그리고 페이지를 읽은 직후 순환
+참조 GC(gc.collect) 한 번에 걸리는 시간을 잰다.
+
+    uv run python -m bench.dom_arena --nodes 200000
+"""
+
+import argparse
+import gc
+import time
+from typing import Callable
+
+from soyorin.arena import ArenaHTMLParser
+from soyorin.lexer import HTMLParser
+from soyorin.tree import find_elements, tree_to_list
+
+HEAD = (
+    "<head><title>bench</title>"
+    '<link rel="stylesheet" href="a.css"><link rel="stylesheet" href="b.css">'
+    "</head><body>"
+)
+UNIT = (
+    '<div class="row"><p>Some <b>bold</b> and <i>italic</i> words.</p>'
+    '<a href="/x" title="link">link</a><br><span>tail</span></div>'
+)
+NODES_PER_UNIT = 13
+
+
+def timed[T](fn: Callable[[], T]) -> tuple[T, float]:
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def run(name: str, parser_class, body: str) -> None:
+    gc.collect()
+    root, parse = timed(lambda: parser_class(body).parse())
+    _, collect = timed(gc.collect)
+    _, links = timed(lambda: find_elements(root, "link"))
+    _, title = timed(lambda: find_elements(root, "title"))
+    nodes, to_list = timed(lambda: tree_to_list(root, []))
+    print(
+        f"{name:>8}: nodes={len(nodes)} parse={parse:.3f}s "
+        f"tree_to_list={to_list:.3f}s link={links * 1000:.1f}ms "
+        f"title={title * 1000:.1f}ms gc={collect * 1000:.1f}ms"
+    )
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--nodes", type=int, default=200_000)
+    args = arg_parser.parse_args()
+
+    body = HEAD + UNIT * (args.nodes // NODES_PER_UNIT + 1)
+    run("objects", HTMLParser, body)
+    run("arena", ArenaHTMLParser, body)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+DOM 노드 하나가 차지하는 메모리를 tracemalloc으로 재는 벤치마크
+
+__slots__를 쓰는 지금의 Element/Text와, 같은 트리를 예전 방식(인스턴스
+__dict__, 텍스트 노드마다 빈 children 리스트와 style dict)으로 만든 경우를
+비교한다.
+
+    uv run python -m bench.dom_memory --nodes 200000
+"""
+
+import argparse
+import gc
+import tracemalloc
+
+from soyorin.lexer import Element, HTMLParser, Text, Token
+
+UNIT = (
+    '<div class="row"><p>Some <b>bold</b> and <i>italic</i> words.</p>'
+    '<a href="/x" title="link">link</a><br><span>tail</span></div>'
+)
+NODES_PER_UNIT = 13
+
+
+class LegacyText:
+    def __init__(self, text, parent):
+        self.text = text
+        self.children = []
+        self.parent = parent
+        self.style = {}
+
+
+class LegacyElement:
+    def __init__(self, tag, attributes, parent):
+        self.tag = tag
+        self.attributes = attributes
+        self.children = []
+        self.parent = parent
+        self.style = {}
+
+
+def legacy_copy(node: Token, parent=None):
+    if isinstance(node, Text):
+        return LegacyText(node.text, parent)
+    copy = LegacyElement(
+        node.tag.casefold(),
+        {key.casefold(): value for key, value in node.attributes.items()},
+        parent,
+    )
+    for child in node.children:
+        copy.children.append(legacy_copy(child, copy))
+    return copy
+
+
+def compact_copy(node: Token, parent: Element | None = None) -> Token:
+    if isinstance(node, Text):
+        assert parent is not None
+        return Text(node.text, parent)
+    copy = Element(node.tag, dict(node.attributes), parent)
+    for child in node.children:
+        copy.children.append(compact_copy(child, copy))
+    return copy
+
+
+def count_nodes(node) -> int:
+    count = 1
+    for child in node.children:
+        count += count_nodes(child)
+    return count
+
+
+def measure(build) -> tuple[object, int]:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--nodes", type=int, default=200_000)
+    args = arg_parser.parse_args()
+
+    body = UNIT * (args.nodes // NODES_PER_UNIT + 1)
+    root = HTMLParser(body).parse()
+    nodes = count_nodes(root)
+    # 텍스트와 속성 값 문자열은 양쪽이 공유하므로 노드 구조의 비용만 잡힌다.
+    _, legacy = measure(lambda: legacy_copy(root))
+    _, current = measure(lambda: compact_copy(root))
+
+    print(f"nodes={nodes}")
+    print(f"before: {legacy / nodes:7.1f} bytes/node ({legacy / 1e6:.1f} MB)")
+    print(f"after:  {current / nodes:7.1f} bytes/node ({current / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
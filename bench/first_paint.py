@@ -0,0 +1,76 @@
+"""
+문서 크기를 바꿔 가며 첫 화면을 그릴 수 있을 때까지의 레이아웃 시간을 재는 벤치마크
+
+    uv run python -m bench.first_paint --sizes-mb 1 2.5 10
+    uv run python -m bench.first_paint --corpus lists
+
+전체 레이아웃(layout + paint_tree)과, Tab.load처럼 보이는 곳까지만 배치하며
+그리는 layout_until을 비교한다. 파싱과 스타일 계산은 재지 않는다.
+글꼴은 headless backend를 쓰므로 디스플레이가 필요 없다.
+"""
+
+import argparse
+import gc
+import time
+
+from bench import corpus
+from soyorin.const import HEIGHT
+from soyorin.const import LAYOUT_MARGIN
+from soyorin.font import set_backend
+from soyorin.headless_font import HeadlessBackend
+from soyorin.layout import DocumentLayout
+from soyorin.layout import paint_tree
+from soyorin.lexer import HTMLParser
+from soyorin.lexer import Token
+from soyorin.style import style
+from soyorin.stylesheets import cascade
+from soyorin.stylesheets import default_stylesheet
+
+
+def time_layouts(tree: Token) -> tuple[float, int, float, float]:
+    """(첫 화면까지, 그때의 명령 수, 이어서 끝까지, 전체 레이아웃+paint) 시간"""
+    start = time.perf_counter()
+    display_list: list = []
+    document = DocumentLayout(tree, display_list)
+    document.layout_until(HEIGHT + LAYOUT_MARGIN)
+    first = time.perf_counter() - start
+    first_commands = len(display_list)
+    document.layout()
+    lazy_total = time.perf_counter() - start
+
+    start = time.perf_counter()
+    document = DocumentLayout(tree)
+    document.layout()
+    paint_tree(document, [])
+    full = time.perf_counter() - start
+    return first, first_commands, lazy_total, full
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument(
+        "--sizes-mb", type=float, nargs="+", default=[0.5, 2.5, 10.0]
+    )
+    arg_parser.add_argument(
+        "--corpus", choices=list(corpus.HTML_CORPORA), default="wide"
+    )
+    args = arg_parser.parse_args()
+
+    set_backend(HeadlessBackend())
+    rules = cascade([default_stylesheet()])
+    generate = corpus.HTML_CORPORA[args.corpus]
+    for size_mb in args.sizes_mb:
+        tree = HTMLParser(generate(int(size_mb * 1_000_000))).parse()
+        style(tree, rules)
+        # 앞 크기의 트리를 치우는 시간이 재는 구간에 들어가지 않도록 한다.
+        gc.collect()
+        first, first_commands, lazy_total, full = time_layouts(tree)
+        print(
+            f"{size_mb:>5.1f} MB  first paint {first * 1000:>7.2f} ms"
+            f" ({first_commands} cmds)  lazy total {lazy_total:.2f}s"
+            f"  full layout+paint {full:.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+HTMLParser.parse가 입력 크기에 선형으로 늘어나는지 확인하는 벤치마크
+
+    uv run python -m bench.parse_scaling --max-mb 50
+"""
+
+import argparse
+import gc
+import time
+
+from soyorin.lexer import HTMLParser
+
+UNIT = (
+    '<div class="item" id=\'row\'>\n'
+    "  <p>Hello <b>world</b>, &lt;escaped&gt; text with several words in it.</p>\n"
+    '  <a href="/next?a=1&b=2" title="a > b">link</a><br>\n'
+    "  <script>if (a < b && c > d) { x = \"</div>\"; }</script>\n"
+    "  <!-- a comment with <tags> inside -->\n"
+    "</div>\n"
+)
+
+SIZES_MB = [1, 2, 5, 10, 20, 50]
+
+
+def make_document(size: int) -> str:
+    return UNIT * (size // len(UNIT) + 1)
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--max-mb", type=float, default=50)
+    args = arg_parser.parse_args()
+
+    print(f"{'size':>8} {'seconds':>9} {'MB/s':>8} {'ns/byte':>9}")
+    for size_mb in SIZES_MB:
+        if size_mb > args.max_mb:
+            break
+        body = make_document(int(size_mb * 1_000_000))
+        gc.collect()
+        start = time.perf_counter()
+        HTMLParser(body).parse()
+        elapsed = time.perf_counter() - start
+        mb = len(body) / 1_000_000
+        print(
+            f"{mb:>6.1f}MB {elapsed:>9.3f} {mb / elapsed:>8.2f} "
+            f"{elapsed * 1e9 / len(body):>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
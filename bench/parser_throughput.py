@@ -0,0 +1,185 @@
+"""
+HTML/CSS 파서의 처리량을 합성 문서로 재는 벤치마크
+
+    uv run python -m bench.parser_throughput --sizes-mb 0.25,1,4 --json out.json
+    uv run python -m bench.parser_throughput --compare out.json
+
+HTMLParser와 ViewSourceHTMLParser는 bench.corpus의 문서 종류마다 잰다.
+Tab.load처럼 READ_CHUNK_SIZE 조각으로 feed()하고, 텍스트 노드는 지연
+디코딩되므로 모든 텍스트를 한 번씩 읽는 시간까지 포함한다.
+
+CSSParser는 생성한 스타일시트로, HTMLParser.get_attributes는 속성이 많은
+문서에서 뽑아낸 태그 문자열로 잰다. 네트워크는 쓰지 않는다.
+"""
+
+import argparse
+import gc
+import json
+import platform
+import re
+import sys
+import time
+from datetime import datetime
+from typing import Callable
+from typing import TypedDict
+
+from bench import corpus
+from soyorin.connection import READ_CHUNK_SIZE
+from soyorin.lexer import HTMLParser
+from soyorin.lexer import Text
+from soyorin.lexer import Token
+from soyorin.lexer import ViewSourceHTMLParser
+from soyorin.style import CSSParser
+from soyorin.tree import tree_to_list
+
+START_TAG = re.compile(r"<([a-z][^<>]*)>")
+
+
+class Result(TypedDict):
+    benchmark: str
+    corpus: str
+    bytes: int
+    seconds: float
+    mb_per_s: float
+    items: int
+    items_per_s: float
+    unit: str
+
+
+def best_time(run: Callable[[], object], repeat: int) -> tuple[float, object]:
+    best = float("inf")
+    output = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        output = run()
+        best = min(best, time.perf_counter() - start)
+    return best, output
+
+
+def make_result(
+    benchmark: str, name: str, size: int, seconds: float, items: int, unit: str
+) -> Result:
+    return {
+        "benchmark": benchmark,
+        "corpus": name,
+        "bytes": size,
+        "seconds": seconds,
+        "mb_per_s": size / 1_000_000 / seconds,
+        "items": items,
+        "items_per_s": items / seconds,
+        "unit": unit,
+    }
+
+
+def load(parser: HTMLParser, body: str) -> list[Token]:
+    for start in range(0, len(body), READ_CHUNK_SIZE):
+        parser.feed(body[start : start + READ_CHUNK_SIZE])
+    nodes = tree_to_list(parser.close(), [])
+    for node in nodes:
+        if isinstance(node, Text):
+            node.text
+    return nodes
+
+
+def bench_html(size: int, repeat: int) -> list[Result]:
+    results: list[Result] = []
+    for name, generate in corpus.HTML_CORPORA.items():
+        body = generate(size)
+        for benchmark, parser_class in [
+            ("html_parser", HTMLParser),
+            ("view_source_parser", ViewSourceHTMLParser),
+        ]:
+            seconds, nodes = best_time(lambda: load(parser_class(), body), repeat)
+            assert isinstance(nodes, list)
+            results.append(
+                make_result(benchmark, name, len(body), seconds, len(nodes), "nodes")
+            )
+    return results
+
+
+def bench_css(size: int, repeat: int) -> list[Result]:
+    body = corpus.stylesheet(size)
+    seconds, rules = best_time(lambda: CSSParser(body).parse(), repeat)
+    assert isinstance(rules, list)
+    return [
+        make_result("css_parser", "stylesheet", len(body), seconds, len(rules), "rules")
+    ]
+
+
+def bench_get_attributes(size: int, repeat: int) -> list[Result]:
+    tags = START_TAG.findall(corpus.attributes(size))
+    parser = HTMLParser()
+
+    def run() -> None:
+        for tag in tags:
+            parser.get_attributes(tag)
+
+    seconds, _ = best_time(run, repeat)
+    size = sum(len(tag) for tag in tags)
+    return [
+        make_result("get_attributes", "attributes", size, seconds, len(tags), "tags")
+    ]
+
+
+def print_results(results: list[Result], baseline: list[Result] | None) -> None:
+    previous = {
+        (result["benchmark"], result["corpus"], result["bytes"]): result
+        for result in baseline or []
+    }
+    header = (
+        f"{'benchmark':<20} {'corpus':<11} {'MB':>6} {'MB/s':>8} "
+        f"{'items/s':>10} {'unit':<6}"
+    )
+    if baseline is not None:
+        header += f" {'vs base':>8}"
+    print(header)
+    for result in results:
+        line = (
+            f"{result['benchmark']:<20} {result['corpus']:<11} "
+            f"{result['bytes'] / 1_000_000:>6.2f} {result['mb_per_s']:>8.2f} "
+            f"{result['items_per_s']:>10.0f} {result['unit']:<6}"
+        )
+        key = (result["benchmark"], result["corpus"], result["bytes"])
+        if key in previous:
+            line += f" {result['mb_per_s'] / previous[key]['mb_per_s']:>7.2f}x"
+        print(line)
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--sizes-mb", default="0.25,1,4")
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--json", help="결과를 JSON으로 저장할 경로")
+    arg_parser.add_argument("--compare", help="비교할 이전 실행의 JSON 결과")
+    args = arg_parser.parse_args()
+
+    results: list[Result] = []
+    for size_mb in [float(size) for size in args.sizes_mb.split(",")]:
+        size = int(size_mb * 1_000_000)
+        results += bench_html(size, args.repeat)
+        results += bench_css(size, args.repeat)
+        results += bench_get_attributes(size, args.repeat)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+    print_results(results, baseline)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(
+                {
+                    "timestamp": datetime.now().isoformat(),
+                    "python": sys.version,
+                    "platform": platform.platform(),
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
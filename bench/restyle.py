@@ -0,0 +1,106 @@
+"""
+속성 하나를 바꾼 뒤 트리 전체를 다시 style() 하는 것과 restyle() 하는 것을
+비교하는 벤치마크
+
+    uv run python -m bench.restyle --size-mb 1.5 --dom arena
+    uv run python -m bench.restyle --corpus wide --dom object
+
+기본 크기의 lists 코퍼스는 노드가 10만 개를 넘는다. 바꾸는 경우는 세 가지다.
+- title: 스타일에 영향이 없는 속성. 바뀐 노드에서 바로 멈춘다.
+- leaf font-style: 자식이 거의 없는 요소의 인라인 font-style.
+- subtree font-size: 자손이 많은 요소(표, 목록)의 인라인 font-size. 상속되므로
+  자손까지 다시 계산하지만, 나머지 트리는 건드리지 않는다.
+"""
+
+import argparse
+import random
+import time
+
+from bench import corpus
+from soyorin import stats
+from soyorin.arena import ArenaHTMLParser
+from soyorin.lexer import Element
+from soyorin.lexer import HTMLParser
+from soyorin.style import restyle
+from soyorin.style import style
+from soyorin.stylesheets import cascade
+from soyorin.stylesheets import default_stylesheet
+from soyorin.stylesheets import parse_stylesheet
+from soyorin.traversal import preorder
+
+PARSERS = {"object": HTMLParser, "arena": ArenaHTMLParser}
+# 생성한 스타일시트가 정하지 않는 속성이라 인라인 값이 그대로 반영된다.
+FONT_STYLES = ["italic", "normal"]
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--size-mb", type=float, default=1.5)
+    arg_parser.add_argument(
+        "--corpus", choices=list(corpus.HTML_CORPORA), default="lists"
+    )
+    arg_parser.add_argument("--sheet-kb", type=int, default=50)
+    arg_parser.add_argument("--dom", choices=list(PARSERS), default="arena")
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    generate = corpus.HTML_CORPORA[args.corpus]
+    root = PARSERS[args.dom](generate(int(args.size_mb * 1_000_000))).parse()
+    rules = cascade(
+        [
+            default_stylesheet(),
+            parse_stylesheet(corpus.stylesheet(args.sheet_kb * 1000)),
+        ]
+    )
+    nodes = list(preorder(root))
+    elements = [node for node in nodes if isinstance(node, Element)]
+    print(f"nodes={len(nodes)} rules={len(rules.rules)}")
+
+    start = time.perf_counter()
+    style(root, rules)
+    full = time.perf_counter() - start
+    print(f"{'full style()':>20} {full * 1000:>9.2f} ms")
+
+    sizes = {id(element): sum(1 for _ in preorder(element)) for element in elements}
+    rng = random.Random(corpus.SEED)
+    leaves = [element for element in elements if sizes[id(element)] <= 2]
+    # body/html을 바꾸면 트리 전체를 다시 계산하므로 그 아래의 큰 서브트리를 고른다.
+    subtrees = [
+        element
+        for element in elements
+        if 20 <= sizes[id(element)] < len(nodes) // 10
+    ]
+    # 경우마다 요소 하나를 골라 값을 바꿔 가므로 매번 스타일이 실제로 바뀐다.
+    cases = [
+        ("title", rng.choice(elements), lambda i: ("title", f"t{i}")),
+        (
+            "leaf font-style",
+            rng.choice(leaves),
+            lambda i: ("style", f"font-style: {FONT_STYLES[i % 2]}"),
+        ),
+    ]
+    if subtrees:
+        cases.append(
+            (
+                "subtree font-size",
+                rng.choice(subtrees),
+                lambda i: ("style", f"font-size: {101 + i}%"),
+            )
+        )
+    for name, element, attribute in cases:
+        best = float("inf")
+        stats.reset()
+        for i in range(args.repeat):
+            element.set_attribute(*attribute(i))
+            start = time.perf_counter()
+            restyle(root, rules)
+            best = min(best, time.perf_counter() - start)
+        restyled = stats.snapshot()["style.restyle.nodes"] // args.repeat
+        print(
+            f"{name:>20} {best * 1000:>9.2f} ms  restyled {restyled} nodes"
+            f"  {full / best:.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
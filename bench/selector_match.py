@@ -0,0 +1,121 @@
+"""
+선택자 하나를 노드 하나에 맞춰 보는 비용(ns/match)을 재는 마이크로 벤치마크
+
+    uv run python -m bench.selector_match --size-mb 0.2 --sheet-kb 300
+
+generic은 예전처럼 TagSelector.matches를 조합해 태그 문자열을 비교하는 방식이고,
+compiled는 선택자마다 미리 만들어 둔 tag_id 비교 함수(selector.matcher)다.
+스타일시트는 browser.css와, 실제 사이트 크기의 스타일시트 대신 생성한 큰
+스타일시트(corpus.stylesheet) 두 가지를 쓴다.
+
+- candidates: RuleIndex가 고른, 가장 오른쪽 태그가 같은 (노드, 선택자) 쌍.
+  style()이 실제로 검사하는 쌍이라 자손 선택자의 조상 탐색이 대부분이다.
+- random: 아무 (노드, 선택자) 쌍. 대부분 첫 비교에서 거절된다.
+"""
+
+import argparse
+import gc
+import random
+import time
+from typing import Callable
+from typing import Sequence
+
+from bench import corpus
+from soyorin.lexer import Element
+from soyorin.lexer import HTMLParser
+from soyorin.lexer import Token
+from soyorin.style import DescendantSelector
+from soyorin.style import RuleIndex
+from soyorin.style import Selector
+from soyorin.stylesheets import default_stylesheet
+from soyorin.stylesheets import parse_stylesheet
+from soyorin.traversal import preorder
+
+type Pair = tuple[Selector, Token]
+
+
+def generic_matches(selector: Selector, node: Token) -> bool:
+    """컴파일하기 전의 matches (비교용)"""
+    if isinstance(selector, DescendantSelector):
+        selectors = selector.selectors
+        if not generic_matches(selectors[-1], node):
+            return False
+        selector_idx = len(selectors) - 2
+        while node.parent and selector_idx >= 0:
+            node = node.parent
+            if generic_matches(selectors[selector_idx], node):
+                selector_idx -= 1
+        return selector_idx < 0
+    return isinstance(node, Element) and selector.tag == node.tag
+
+
+def run_generic(pairs: Sequence[Pair]) -> int:
+    return sum(1 for selector, node in pairs if generic_matches(selector, node))
+
+
+def run_compiled(pairs: Sequence[Pair]) -> int:
+    return sum(1 for selector, node in pairs if selector.matcher(node))
+
+
+def best_of(
+    repeat: int, run: Callable[[Sequence[Pair]], int], pairs: Sequence[Pair]
+) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        run(pairs)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--size-mb", type=float, default=0.2)
+    arg_parser.add_argument("--sheet-kb", type=int, default=300)
+    arg_parser.add_argument("--pairs", type=int, default=500_000)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    root = HTMLParser(corpus.wide(int(args.size_mb * 1_000_000))).parse()
+    nodes = list(preorder(root))
+    sheets = {
+        "browser.css": default_stylesheet(),
+        f"generated {args.sheet_kb}KB": parse_stylesheet(
+            corpus.stylesheet(args.sheet_kb * 1000)
+        ),
+    }
+    print(f"nodes={len(nodes)}")
+
+    rng = random.Random(corpus.SEED)
+    for name, sheet in sheets.items():
+        index = RuleIndex(list(sheet.rules))
+        selectors = [selector for selector, _ in sheet.rules]
+        candidates = [
+            (selector, node)
+            for node in nodes
+            for selector, _ in index.candidates(node)
+        ][: args.pairs]
+        workloads = {
+            "candidates": candidates,
+            "random": [
+                (rng.choice(selectors), rng.choice(nodes)) for _ in range(args.pairs)
+            ],
+        }
+        print(f"{name}: rules={len(sheet.rules)}")
+        for workload, pairs in workloads.items():
+            if not pairs:
+                continue
+            assert run_generic(pairs) == run_compiled(pairs)
+            generic = best_of(args.repeat, run_generic, pairs)
+            compiled = best_of(args.repeat, run_compiled, pairs)
+            print(
+                f"  {workload:>10} pairs={len(pairs):<8}"
+                f" generic {generic / len(pairs) * 1e9:>6.0f} ns/match"
+                f"  compiled {compiled / len(pairs) * 1e9:>6.0f} ns/match"
+                f"  {generic / compiled:.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+기본 스타일시트 때문에 드는 시작 비용을 재는 벤치마크
+
+    uv run python -m bench.startup --repeat 10
+
+각 측정은 새 파이썬 프로세스에서 한다.
+- import: soyorin.browser를 import 하는 데 걸리는 시간 (이제 CSS를 읽지 않는다)
+- eager parse: 예전처럼 browser.css를 import 때 바로 파싱하는 비용
+- first style: 첫 스타일 계산 때 기본 스타일시트를 읽어 색인하는 비용
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+IMPORT = """
+import time
+start = time.perf_counter()
+import soyorin.browser
+print(time.perf_counter() - start)
+"""
+
+EAGER_PARSE = """
+import time
+from importlib import resources
+from soyorin.style import CSSParser
+start = time.perf_counter()
+CSSParser(resources.files("soyorin").joinpath("browser.css").read_text()).parse()
+print(time.perf_counter() - start)
+"""
+
+FIRST_STYLE = """
+import time
+from soyorin.stylesheets import cascade, default_stylesheet
+start = time.perf_counter()
+cascade([default_stylesheet()])
+print(time.perf_counter() - start)
+"""
+
+
+def run(code: str) -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True, text=True
+    ).stdout
+    return float(output)
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--repeat", type=int, default=10)
+    args = arg_parser.parse_args()
+
+    measurements = [
+        ("import", lambda: run(IMPORT)),
+        ("eager parse", lambda: run(EAGER_PARSE)),
+        ("first style", lambda: run(FIRST_STYLE)),
+    ]
+    for name, measure in measurements:
+        times = [measure() for _ in range(args.repeat)]
+        print(f"{name:<20} median {statistics.median(times) * 1000:>8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+스타일 계산(cascade) 시간을 RuleIndex 사용 전후로 비교하는 벤치마크
+
+    uv run python -m bench.style_cascade --rules 1000 --size-mb 0.5
+    uv run python -m bench.style_cascade --corpus deep --size-mb 0.1
+
+linear는 예전처럼 노드마다 모든 규칙의 selector.matches를 부르는 방식이고,
+indexed는 soyorin.style.style이 쓰는 방식(RuleIndex + AncestorFilter)이다.
+indexed 실행 뒤에는 조상 필터가 자손 선택자를 얼마나 빨리 거절했는지 출력한다.
+"""
+
+import argparse
+import gc
+import random
+import time
+
+from bench import corpus
+from soyorin import stats
+from soyorin.computed_style import ComputedStyle
+from soyorin.lexer import HTMLParser
+from soyorin.lexer import Token
+from soyorin.style import CSSParser
+from soyorin.style import Rule
+from soyorin.style import RuleIndex
+from soyorin.style import cascade_priority
+from soyorin.style import style
+from soyorin.stylesheets import default_stylesheet
+from soyorin.traversal import preorder
+
+# browser.css와 corpus.TAGS에 나오는 태그, 그리고 페이지에 없는 태그를 섞는다.
+SHEET_TAGS = corpus.TAGS + [
+    "html", "body", "ul", "ol", "h1", "h2", "h3", "pre", "table", "tr", "td",
+    "header", "footer", "nav", "main", "article", "aside", "form", "label",
+]  # fmt: skip
+
+
+def make_stylesheet(count: int) -> str:
+    rng = random.Random(corpus.SEED)
+    lines = []
+    for i in range(count):
+        selector = " ".join(rng.choice(SHEET_TAGS) for _ in range(rng.randint(1, 3)))
+        lines.append(f"{selector} {{ color: c{i}; margin-top: {i}px; }}")
+    return "\n".join(lines)
+
+
+def linear_style(tree: Token, rules: list[Rule]) -> None:
+    """RuleIndex 없이 모든 규칙을 검사하는 예전 방식 (비교용)"""
+    for node in preorder(tree):
+        node_style: dict[str, str] = {}
+        for property in ("font-size", "font-style", "font-weight", "color"):
+            node_style[property] = node.parent.style[property] if node.parent else ""
+        for selector, body in rules:
+            if not selector.matches(node):
+                continue
+            node_style.update(body)
+        node.style = ComputedStyle.create(node_style)
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--rules", type=int, default=1000)
+    arg_parser.add_argument("--size-mb", type=float, default=0.5)
+    arg_parser.add_argument(
+        "--corpus", choices=list(corpus.HTML_CORPORA), default="wide"
+    )
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    generated = CSSParser(make_stylesheet(args.rules)).parse()
+    rules = sorted([*default_stylesheet().rules, *generated], key=cascade_priority)
+    generate = corpus.HTML_CORPORA[args.corpus]
+    root = HTMLParser(generate(int(args.size_mb * 1_000_000))).parse()
+    nodes = sum(1 for _ in preorder(root))
+    print(f"rules={len(rules)} nodes={nodes}")
+
+    def run_indexed() -> None:
+        style(root, RuleIndex(rules))
+
+    def run_linear() -> None:
+        linear_style(root, rules)
+
+    timings = {}
+    for name, run in [("linear", run_linear), ("indexed", run_indexed)]:
+        best = float("inf")
+        stats.reset()
+        for _ in range(args.repeat):
+            gc.collect()
+            start = time.perf_counter()
+            run()
+            best = min(best, time.perf_counter() - start)
+        timings[name] = best
+        print(f"{name:>8} {best:>8.3f}s {nodes / best:>10.0f} nodes/s")
+    for name, value in stats.snapshot().items():
+        if name.startswith("style."):
+            print(f"  {name} {value // args.repeat}")
+    print(f"speedup {timings['linear'] / timings['indexed']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+스타일 계산이 남기는 메모리와 서로 다른 스타일 객체 수를 재는 벤치마크
+
+    uv run python -m bench.style_memory --corpus lists --size-mb 2
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+from bench import corpus
+from soyorin.lexer import HTMLParser
+from soyorin.style import style
+from soyorin.stylesheets import default_stylesheet
+from soyorin.traversal import preorder
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument(
+        "--corpus", choices=list(corpus.HTML_CORPORA), default="lists"
+    )
+    arg_parser.add_argument("--size-mb", type=float, default=2)
+    args = arg_parser.parse_args()
+
+    rules = list(default_stylesheet().rules)
+    generate = corpus.HTML_CORPORA[args.corpus]
+    root = HTMLParser(generate(int(args.size_mb * 1_000_000))).parse()
+
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    style(root, rules)
+    elapsed = time.perf_counter() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    nodes = list(preorder(root))
+    distinct = len({id(node.style) for node in nodes})
+    print(f"nodes={len(nodes)} distinct styles={distinct} time={elapsed:.3f}s")
+    print(
+        f"retained={retained / 1024:.0f}KiB ({retained / len(nodes):.1f} bytes/node) "
+        f"peak={peak / 1024:.0f}KiB"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+단어 10만 개짜리 페이지를 레이아웃하고 그리면서 Tk에 폭을 몇 번 묻는지 세는 벤치마크
+
+    uv run python -m bench.text_measure --words 100000
+    uv run python -m bench.text_measure --backend headless
+
+tk backend는 디스플레이가 있어야 한다. 측정 요청은 고정폭 글꼴이라
+글자 수로 계산한 것(fixed-pitch), 캐시에서 찾은 것, 실제로 Tk까지 간 것(Tk calls)
+으로 나뉜다. headless backend에서는 Tk calls가 표를 읽은 횟수다.
+"""
+
+import argparse
+import random
+import time
+import tkinter
+
+from bench import corpus
+from soyorin import stats
+from soyorin.font import measure_text
+from soyorin.font import set_backend
+from soyorin.headless_font import HeadlessBackend
+from soyorin.layout import DocumentLayout
+from soyorin.layout import paint_tree
+from soyorin.lexer import HTMLParser
+from soyorin.style import style
+from soyorin.stylesheets import cascade
+from soyorin.stylesheets import default_stylesheet
+
+
+def make_page(words: int) -> str:
+    rng = random.Random(corpus.SEED)
+    paragraphs = []
+    while words > 0:
+        count = min(words, rng.randint(20, 80))
+        paragraphs.append(f"<p>{corpus.sentence(rng, count)}</p>")
+        words -= count
+    return "<html><body>" + "\n".join(paragraphs) + "</body></html>"
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--words", type=int, default=100_000)
+    arg_parser.add_argument("--backend", choices=["tk", "headless"], default="tk")
+    args = arg_parser.parse_args()
+
+    root = None
+    if args.backend == "tk":
+        root = tkinter.Tk()
+        root.withdraw()
+    else:
+        set_backend(HeadlessBackend())
+
+    tree = HTMLParser(make_page(args.words)).parse()
+    style(tree, cascade([default_stylesheet()]))
+    measure_text.cache_clear()
+    stats.reset()
+
+    start = time.perf_counter()
+    document = DocumentLayout(tree)
+    document.layout()
+    display_list: list = []
+    paint_tree(document, display_list)
+    elapsed = time.perf_counter() - start
+
+    counts = stats.snapshot()
+    fixed = counts["font.measure.fixed_pitch"]
+    hits = counts["font.measure_cache.hits"]
+    misses = counts["font.measure_cache.misses"]
+    print(f"words={args.words} backend={args.backend} layout+paint {elapsed:.3f}s")
+    print(
+        f"measure requests {fixed + hits + misses}  fixed-pitch {fixed}"
+        f"  cache hits {hits}  Tk calls {misses}"
+    )
+    if root is not None:
+        root.destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -26,7 +26,7 @@ def show(body, view_source: bool):
 
 if __name__ == "__main__":
 
-    browser = Browser()
+    browser = Browser(dom_storage="arena" if "--arena" in sys.argv else "objects")
     # 캐싱 등으로 소요되는 시간을 감안해서 미리 객체를 생성해 놓는 식으로 변경
     use_memory_cache = False
     try:
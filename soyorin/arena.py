@@ -0,0 +1,330 @@
+"""
+HTMLParser가 만든 트리를 array 열(column)에 나눠 담는 DOM 저장 방식
+
+노드는 생성 순서대로 번호를 받는다. 파서는 요소를 여는 순간 만들고 부모에
+바로 이어 붙이므로, 이 번호 순서가 곧 문서의 전위(pre-order) 순회 순서이고
+한 노드의 서브트리는 연속된 번호 구간이 된다. 그래서 트리 순회를 재귀 없이
+번호 구간에 대한 반복문으로 처리할 수 있다.
+
+Element/Text 자리에는 (arena, index)만 가진 가벼운 뷰 객체가 쓰인다. 뷰는
+부모를 객체 참조가 아니라 번호로 찾기 때문에 순환 참조가 생기지 않는다.
+
+뷰는 읽을 때마다 새로 만들어지므로 같은 노드인지는 is가 아니라 ==로 비교한다.
+트리 모양(tag, tag_id, parent, children)은 읽기 전용이다. children은 접근할
+때마다 만드는 사본이므로 바꾸려 하면 조용히 버려지는 대신 AttributeError를 낸다.
+속성, 스타일, dirty 표시는 열에 그대로 써진다.
+"""
+
+from __future__ import annotations
+
+import re
+from array import array
+from typing import Mapping
+
+from soyorin.computed_style import EMPTY_STYLE
+from soyorin.computed_style import ComputedStyle
+from soyorin.lexer import NO_ATTRIBUTES
+from soyorin.lexer import TAG_IDS
+from soyorin.lexer import TAG_NAMES
+from soyorin.lexer import TEXT_TAG_ID
+from soyorin.lexer import Element
+from soyorin.lexer import HTMLParser
+from soyorin.lexer import Text
+from soyorin.lexer import Token
+from soyorin.lexer import decode_entities
+from soyorin.lexer import tag_id
+
+NO_NODE = -1
+# DOMArena.flags의 비트 (Element.style_dirty, Element.child_style_dirty)
+STYLE_DIRTY = 1
+CHILD_STYLE_DIRTY = 2
+NONZERO_FLAG = re.compile(rb"[^\x00]")
+# 태그 번호는 soyorin.lexer의 표를 함께 쓴다.
+TEXT_TAG = TEXT_TAG_ID
+
+
+class DOMArena:
+    def __init__(self) -> None:
+        self.parent = array("i")
+        self.first_child = array("i")
+        self.last_child = array("i")
+        self.next_sibling = array("i")
+        self.tag = array("i")
+        self.text_source = array("i")
+        self.text_offset = array("q")
+        self.text_length = array("i")
+        self.attributes: list[Mapping[str, str]] = []
+        self.styles: list[ComputedStyle] = []
+        self.flags = bytearray()
+
+        # 텍스트 노드는 파서가 읽은 원문 버퍼를 복사하지 않고 (버퍼 번호, offset,
+        # length)로 가리킨다. 엔티티 치환은 내용을 읽을 때 한다.
+        self.text_sources: list[str] = []
+
+    def __len__(self) -> int:
+        return len(self.tag)
+
+    def add_node(
+        self, tag: int, attributes: Mapping[str, str], parent: int
+    ) -> int:
+        index = len(self.tag)
+        self.parent.append(parent)
+        self.first_child.append(NO_NODE)
+        self.last_child.append(NO_NODE)
+        self.next_sibling.append(NO_NODE)
+        self.tag.append(tag)
+        self.text_source.append(NO_NODE)
+        self.text_offset.append(0)
+        self.text_length.append(0)
+        self.attributes.append(attributes)
+        self.styles.append(EMPTY_STYLE)
+        self.flags.append(0)
+        if parent != NO_NODE:
+            last = self.last_child[parent]
+            if last == NO_NODE:
+                self.first_child[parent] = index
+            else:
+                self.next_sibling[last] = index
+            self.last_child[parent] = index
+        return index
+
+    def add_element(
+        self, tag: str, attributes: Mapping[str, str], parent: int
+    ) -> int:
+        return self.add_node(tag_id(tag), attributes or NO_ATTRIBUTES, parent)
+
+    def add_text(self, source: str, start: int, end: int, parent: int) -> int:
+        index = self.add_node(TEXT_TAG, NO_ATTRIBUTES, parent)
+        if not self.text_sources or self.text_sources[-1] is not source:
+            self.text_sources.append(source)
+        self.text_source[index] = len(self.text_sources) - 1
+        self.text_offset[index] = start
+        self.text_length[index] = end - start
+        return index
+
+    def text(self, index: int) -> str:
+        source = self.text_sources[self.text_source[index]]
+        offset = self.text_offset[index]
+        return decode_entities(source[offset : offset + self.text_length[index]])
+
+    def view(self, index: int) -> ArenaElement | ArenaText:
+        if self.tag[index] == TEXT_TAG:
+            return ArenaText(self, index)
+        return ArenaElement(self, index)
+
+    def child_indices(self, index: int) -> list[int]:
+        children = []
+        child = self.first_child[index]
+        while child != NO_NODE:
+            children.append(child)
+            child = self.next_sibling[child]
+        return children
+
+    def subtree_end(self, index: int) -> int:
+        """index의 서브트리 바로 다음 번호 (서브트리는 [index, end) 구간)"""
+        while index != NO_NODE:
+            sibling = self.next_sibling[index]
+            if sibling != NO_NODE:
+                return sibling
+            index = self.parent[index]
+        return len(self)
+
+    def subtree_to_list(self, index: int, list: list) -> list:
+        tags = self.tag
+        list.extend(
+            [
+                ArenaText(self, i) if tags[i] == TEXT_TAG else ArenaElement(self, i)
+                for i in range(index, self.subtree_end(index))
+            ]
+        )
+        return list
+
+    def find_tag(self, index: int, tag: str) -> list[Element]:
+        """index의 서브트리에서 tag인 요소를 문서 순서대로 찾는다."""
+        if tag not in TAG_IDS:
+            return []
+        wanted = TAG_IDS[tag]
+        tags = self.tag
+        return [
+            ArenaElement(self, i)
+            for i in range(index, self.subtree_end(index))
+            if tags[i] == wanted
+        ]
+
+
+def read_only(node: object) -> AttributeError:
+    return AttributeError(f"{type(node).__name__}의 트리 모양은 바꿀 수 없다")
+
+
+class ReadOnlyChildren(list):
+    """ArenaElement.children이 돌려주는 사본. 고치는 메서드는 AttributeError를 낸다."""
+
+    __slots__ = ()
+
+    def refuse(self, *args: object, **kwargs: object) -> None:
+        raise AttributeError("DOMArena 노드의 children은 바꿀 수 없다")
+
+    append = extend = insert = remove = pop = clear = refuse
+    sort = reverse = __setitem__ = __delitem__ = refuse
+
+
+class ArenaElement(Element):
+    __slots__ = ("arena", "index")
+
+    def __init__(self, arena: DOMArena, index: int):
+        self.arena = arena
+        self.index = index
+
+    @property
+    def tag(self) -> str:
+        return TAG_NAMES[self.arena.tag[self.index]]
+
+    @tag.setter
+    def tag(self, value: str) -> None:
+        raise read_only(self)
+
+    @property
+    def tag_id(self) -> int:
+        return self.arena.tag[self.index]
+
+    @tag_id.setter
+    def tag_id(self, value: int) -> None:
+        raise read_only(self)
+
+    @property
+    def attributes(self) -> Mapping[str, str]:
+        return self.arena.attributes[self.index]
+
+    @attributes.setter
+    def attributes(self, value: Mapping[str, str]) -> None:
+        self.arena.attributes[self.index] = value
+
+    @property
+    def style_dirty(self) -> bool:
+        return bool(self.arena.flags[self.index] & STYLE_DIRTY)
+
+    @style_dirty.setter
+    def style_dirty(self, value: bool) -> None:
+        self.set_flag(STYLE_DIRTY, value)
+
+    @property
+    def child_style_dirty(self) -> bool:
+        return bool(self.arena.flags[self.index] & CHILD_STYLE_DIRTY)
+
+    @child_style_dirty.setter
+    def child_style_dirty(self, value: bool) -> None:
+        self.set_flag(CHILD_STYLE_DIRTY, value)
+
+    def style_dirty_children(self) -> list[Token]:
+        # 표시가 있는 노드는 드물므로 자식을 하나씩 보지 않고 서브트리 구간의
+        # flags에서 0이 아닌 바이트만 찾는다. 자손에 표시가 있으면 그 조상인 자식도
+        # 표시되어 있으므로 자식만 골라내면 된다.
+        arena = self.arena
+        index = self.index
+        parent = arena.parent
+        return [
+            arena.view(match.start())
+            for match in NONZERO_FLAG.finditer(
+                arena.flags, index + 1, arena.subtree_end(index)
+            )
+            if parent[match.start()] == index
+        ]
+
+    def set_flag(self, flag: int, value: bool) -> None:
+        if value:
+            self.arena.flags[self.index] |= flag
+        else:
+            self.arena.flags[self.index] &= ~flag
+
+    @property
+    def children(self) -> list[Token]:
+        view = self.arena.view
+        return ReadOnlyChildren(view(i) for i in self.arena.child_indices(self.index))
+
+    @children.setter
+    def children(self, value: list[Token]) -> None:
+        raise read_only(self)
+
+    @property
+    def parent(self) -> Element | None:
+        parent = self.arena.parent[self.index]
+        return None if parent == NO_NODE else ArenaElement(self.arena, parent)
+
+    @parent.setter
+    def parent(self, value: Element | None) -> None:
+        raise read_only(self)
+
+    @property
+    def style(self) -> ComputedStyle:
+        return self.arena.styles[self.index]
+
+    @style.setter
+    def style(self, value: ComputedStyle) -> None:
+        self.arena.styles[self.index] = value
+
+    def __eq__(self, other: object) -> bool:
+        return (
+            isinstance(other, (ArenaElement, ArenaText))
+            and other.arena is self.arena
+            and other.index == self.index
+        )
+
+    def __hash__(self) -> int:
+        return hash((id(self.arena), self.index))
+
+
+class ArenaText(Text):
+    __slots__ = ("arena", "index")
+
+    def __init__(self, arena: DOMArena, index: int):
+        self.arena = arena
+        self.index = index
+
+    @property
+    def text(self) -> str:
+        return self.arena.text(self.index)
+
+    @property
+    def parent(self) -> Element:
+        return ArenaElement(self.arena, self.arena.parent[self.index])
+
+    @parent.setter
+    def parent(self, value: Element) -> None:
+        raise read_only(self)
+
+    @property
+    def style(self) -> ComputedStyle:
+        return self.arena.styles[self.index]
+
+    @style.setter
+    def style(self, value: ComputedStyle) -> None:
+        self.arena.styles[self.index] = value
+
+    __eq__ = ArenaElement.__eq__
+    __hash__ = ArenaElement.__hash__
+
+
+class ArenaHTMLParser(HTMLParser):
+    """
+    HTMLParser와 같은 트리를 만들되, 노드를 DOMArena의 열에 저장한다.
+    요소는 만들어지는 순간 부모에 연결되므로 append_child는 할 일이 없다.
+    """
+
+    def __init__(self, body: str = ""):
+        super().__init__(body)
+        self.arena = DOMArena()
+
+    def create_element(
+        self, tag: str, attributes: Mapping[str, str], parent: Element | None
+    ) -> Element:
+        parent_index = parent.index if isinstance(parent, ArenaElement) else NO_NODE
+        index = self.arena.add_element(tag, attributes, parent_index)
+        return ArenaElement(self.arena, index)
+
+    def create_text(self, source: str, start: int, end: int, parent: Element) -> Text:
+        assert isinstance(parent, ArenaElement)
+        index = self.arena.add_text(source, start, end, parent.index)
+        return ArenaText(self.arena, index)
+
+    def append_child(self, parent: Element, node: Token) -> None:
+        pass
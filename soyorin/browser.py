@@ -5,33 +5,45 @@ from soyorin.draw import DrawLine
 from soyorin.draw import Rect
 from soyorin.draw import DrawText
 from soyorin.draw import DrawOutline
-from soyorin.layout import get_font
+from soyorin.font import FontSlant
+from soyorin.font import FontWeight
+from soyorin.font import get_font
+from soyorin.font import measure
 from typing import Optional
 from soyorin.lexer import Text
 import tkinter
-from soyorin.style import cascade_priority
-from soyorin.lexer import Element
 from soyorin.tree import tree_to_list
-from soyorin.style import CSSParser
+from soyorin.tree import find_elements
 from soyorin.style import style
 from soyorin.const import VSTEP
-from soyorin.layout import paint_tree
 from soyorin.const import SCROLL_STEP
 from soyorin.const import HEIGHT
+from soyorin.const import LAYOUT_CHUNK
+from soyorin.const import LAYOUT_MARGIN
+from soyorin.const import SOURCE_POLL_MS
 from soyorin.const import WIDTH
 from soyorin.layout import DocumentLayout
 from soyorin.connection import Connection
-from soyorin.cache import FileCache, InMemoryCache
+from soyorin.cache import Cache, FileCache, InMemoryCache
 from soyorin.url import URL
-from soyorin.lexer import HTMLParser, ViewSourceHTMLParser
+from soyorin.lexer import HTMLParser
+from soyorin.arena import ArenaHTMLParser
+from soyorin.preload import PreloadScanner
+from soyorin.stylesheets import cascade
+from soyorin.stylesheets import default_stylesheet
+from soyorin.view_source import SourceLayout
+from soyorin.view_source import SourceStream
+from typing import Literal
 import platform
 
-DEFAULT_STYLE_SHEET = CSSParser(open("browser.css").read()).parse()
+# "arena"이면 DOM을 soyorin.arena의 열 기반 저장소에 만든다.
+type DOMStorage = Literal["objects", "arena"]
 
 
 class Browser:
-    def __init__(self):
+    def __init__(self, dom_storage: DOMStorage = "objects"):
         self.tabs = []
+        self.dom_storage = dom_storage
         self.active_tab: Optional[Tab] = None
         self.window = tkinter.Tk()
         self.canvas = tkinter.Canvas(
@@ -52,6 +64,8 @@ class Browser:
 
         self.width = 800
         self.height = 600
+        # 남은 레이아웃을 이어서 하도록 after_idle에 걸어 둔 작업
+        self.layout_job: str | None = None
 
         self.chrome = Chrome(self)
 
@@ -74,6 +88,38 @@ class Browser:
             self.window.title(self.active_tab.title)
         for cmd in self.chrome.paint():
             cmd.execute(0, self.canvas)
+        self.schedule_layout()
+
+    def schedule_layout(self):
+        if self.layout_job is not None:
+            return
+        tab = self.pending_layout_tab()
+        if tab is None:
+            return
+        if tab.waiting_for_source():
+            # 받을 원문이 아직 없으면 한가할 때마다 돌지 않고 조금 뒤에 다시 본다.
+            self.layout_job = self.window.after(SOURCE_POLL_MS, self.continue_layout)
+        else:
+            self.layout_job = self.window.after_idle(self.continue_layout)
+
+    def pending_layout_tab(self) -> Optional["Tab"]:
+        """레이아웃이 남은 탭. 보고 있는 탭을 먼저 고른다."""
+        tabs = [self.active_tab] if self.active_tab else []
+        for tab in tabs + self.tabs:
+            if not tab.document.done:
+                return tab
+        return None
+
+    def continue_layout(self):
+        self.layout_job = None
+        tab = self.pending_layout_tab()
+        if tab:
+            tab.layout_more()
+            # 받는 대로 배치한 view-source 원문이 보이는 곳에 들어왔으면 다시 그린다.
+            if tab is self.active_tab and tab.take_source_changes():
+                self.draw()
+        # 이벤트를 처리할 틈을 주고 다음 한가한 때에 이어서 한다.
+        self.schedule_layout()
 
     def handle_down(self, e):
         if self.active_tab:
@@ -104,7 +150,7 @@ class Browser:
         self.draw()
 
     def new_tab(self, url, use_memory_cache: bool = False):
-        new_tab = Tab(HEIGHT - self.chrome.bottom)
+        new_tab = Tab(HEIGHT - self.chrome.bottom, self.dom_storage)
         new_tab.load(url, use_memory_cache)
         self.active_tab = new_tab
         self.tabs.append(new_tab)
@@ -112,10 +158,13 @@ class Browser:
 
 
 class Tab:
-    def __init__(self, tab_height):
+    def __init__(self, tab_height, dom_storage: DOMStorage = "objects"):
         self.scroll = 0.0
         self.tab_height = tab_height
         self.title = ""
+        self.dom_storage = dom_storage
+        # view-source 원문을 받고 있는 스레드
+        self.source_stream: SourceStream | None = None
 
     def click(self, x, y):
         y += self.scroll
@@ -150,15 +199,36 @@ class Tab:
         else:
             delta = 0
 
-        max_y = max(self.document.height + 2 * VSTEP - self.tab_height, 0)
-        self.scroll = min(max(self.scroll - delta, 0), max_y)
+        self.scroll = self.clamp_scroll(self.scroll - delta)
 
     def scroll_down(self):
+        self.scroll = self.clamp_scroll(self.scroll + SCROLL_STEP)
+
+    def clamp_scroll(self, scroll: float) -> float:
+        # 새로 보일 곳까지는 지금 배치를 마친다.
+        self.document.layout_until(scroll + self.tab_height + LAYOUT_MARGIN)
         max_y = max(self.document.height + 2 * VSTEP - self.tab_height, 0)
-        self.scroll = min(self.scroll + SCROLL_STEP, max_y)
+        scroll = min(max(scroll, 0), max_y)
+        if isinstance(self.document, SourceLayout):
+            # view-source는 보이는 곳 근처의 블록만 메모리에 둔다.
+            self.document.show(scroll, scroll + self.tab_height)
+        return scroll
+
+    def layout_more(self) -> bool:
+        """한가할 때 레이아웃을 조금 더 한다. 끝났으면 True"""
+        document = self.document
+        return document.layout_until(document.y + document.height + LAYOUT_CHUNK)
+
+    def waiting_for_source(self) -> bool:
+        """view-source 원문이 더 오기를 기다리고 있다."""
+        return isinstance(self.document, SourceLayout) and self.document.waiting
+
+    def take_source_changes(self) -> bool:
+        """도착한 view-source 원문 때문에 다시 그려야 하면 True"""
+        return isinstance(self.document, SourceLayout) and self.document.take_changes()
 
     def scroll_up(self):
-        self.scroll = max(self.scroll - SCROLL_STEP, 0)
+        self.scroll = self.clamp_scroll(self.scroll - SCROLL_STEP)
 
     def draw(self, canvas, offset):
         for cmd in self.display_list:
@@ -170,50 +240,44 @@ class Tab:
 
     def load(self, url: URL, use_memory_cache: bool = False):
         self.url = url
+        if self.source_stream is not None:
+            self.source_stream.close()
+            self.source_stream = None
         if use_memory_cache:
             cache = InMemoryCache()
         else:
             cache = FileCache(cache_dir="cache")
+        if url.view_source:
+            self.load_source(url, cache)
+            return
 
         connection = Connection(http_options={"http_version": "1.1"}, cache=cache)
-        body = connection.request(url=url)
-
-        if url.view_source:
-            self.nodes = ViewSourceHTMLParser(body).parse()
+        if self.dom_storage == "arena":
+            parser = ArenaHTMLParser()
         else:
-            self.nodes = HTMLParser(body).parse()
-
-        rules = DEFAULT_STYLE_SHEET.copy()
-
-        links = [
-            node.attributes["href"]
-            for node in tree_to_list(self.nodes, [])
-            if isinstance(node, Element)
-            and node.tag == "link"
-            and node.attributes.get("rel") == "stylesheet"
-            and "href" in node.attributes
-        ]
-
-        for link in links:
-            style_url = url.resolve(link)
-            try:
-                body = connection.request(url=style_url)
-            except Exception:
-                continue
-            rules.extend(CSSParser(body).parse())
-
-        style(self.nodes, sorted(rules, key=cascade_priority))
-        self.document = DocumentLayout(self.nodes)
-        self.document.layout()
+            parser = HTMLParser()
+        # <link rel=stylesheet>를 읽는 즉시 스타일시트를 받기 시작한다.
+        preload_scanner = PreloadScanner(url, cache)
+        parser.on_start_tag = preload_scanner.scan
+        try:
+            # 본문을 받는 대로 파서에 넘겨서 네트워크 읽기와 파싱을 겹친다.
+            connection.request(url=url, sink=parser.feed)
+            self.nodes = parser.close()
+
+            stylesheets = [default_stylesheet(), *preload_scanner.stylesheets()]
+        finally:
+            preload_scanner.close()
+
+        # 같은 스타일시트 조합이면 앞서 만든 색인을 그대로 쓴다.
+        style(self.nodes, cascade(stylesheets))
+        # 보이는 곳만 배치해서 바로 그리고, 나머지는 Browser가 한가할 때
+        # layout_more()로 배치한다. 그리기 명령은 배치하면서 쌓인다.
         self.display_list = []
-        paint_tree(self.document, self.display_list)
+        self.document = DocumentLayout(self.nodes, self.display_list)
+        self.document.layout_until(self.scroll + self.tab_height + LAYOUT_MARGIN)
 
         # Extract title from <title> element
-        title_elements = [
-            node
-            for node in tree_to_list(self.nodes, [])
-            if isinstance(node, Element) and node.tag == "title"
-        ]
+        title_elements = find_elements(self.nodes, "title")
         if title_elements:
             title_element = title_elements[0]
             title_texts = [
@@ -225,18 +289,35 @@ class Tab:
         else:
             self.title = ""
 
+    def load_source(self, url: URL, cache: Cache) -> None:
+        """
+        view-source는 원문을 백그라운드 스레드에서 받고, 도착한 만큼만 배치해서
+        바로 그린다. 나머지는 Browser가 Tk 이벤트 루프에서 layout_more()로 받아 온다.
+        """
+        self.source_stream = SourceStream(url, cache)
+        self.display_list = []
+        self.document = SourceLayout(
+            self.source_stream.chunks,
+            cascade([default_stylesheet()]),
+            self.display_list,
+        )
+        self.nodes = self.document.node
+        self.document.show(self.scroll, self.scroll + self.tab_height)
+        self.document.layout_until(self.scroll + self.tab_height + LAYOUT_MARGIN)
+        self.title = ""
+
 
 class Chrome:
     def __init__(self, browser: Browser):
         self.browser = browser
-        self.font = get_font(20, "normal", "roman")
-        self.font_height = self.font.metrics("linespace")
+        self.font = get_font(20, FontWeight.NORMAL, FontSlant.ROMAN)
+        self.font_height = self.font.linespace
 
         self.padding = 5
         self.tabbar_top = 0
         self.tabbar_bottom = self.font_height + 2 * self.padding
 
-        plus_width = self.font.measure("+") + 2 * self.padding
+        plus_width = measure(self.font, "+") + 2 * self.padding
         self.newtab_rect = Rect(
             self.padding,
             self.padding,
@@ -244,7 +325,7 @@ class Chrome:
             self.padding + self.font_height,
         )
 
-        back_width = self.font.measure("<") + 2 * self.padding
+        back_width = measure(self.font, "<") + 2 * self.padding
         self.back_rect = Rect(
             self.padding,
             self.tabbar_bottom + self.padding,
@@ -266,7 +347,7 @@ class Chrome:
 
     def tab_rect(self, i):
         tabs_start = self.newtab_rect.right + self.padding
-        tab_width = self.font.measure("Tab X") + 2 * self.padding
+        tab_width = measure(self.font, "Tab X") + 2 * self.padding
 
         return Rect(
             tabs_start + tab_width * i,
@@ -329,7 +410,7 @@ class Chrome:
                     "black",
                 )
             )
-            w = self.font.measure(self.address_bar)
+            w = measure(self.font, self.address_bar)
             cmds.append(
                 DrawLine(
                     self.address_rect.left + self.padding + w,
@@ -0,0 +1,153 @@
+"""
+계산된 스타일(computed style)을 나타내는 불변 객체
+
+같은 속성을 가진 스타일은 프로세스 전체에서 하나의 객체로 intern 되므로,
+노드마다 dict를 만드는 대신 몇 안 되는 객체를 여러 노드가 함께 가리킨다.
+스타일이 같은지는 `is`로 비교할 수 있어서 레이아웃 등에서 캐시 키로 쓸 수 있다.
+
+글꼴 관련 값은 객체를 만들 때 한 번만 해석해 font_size(px), font_weight,
+font_slant로 들고 있으므로, 레이아웃은 "16px" 같은 문자열을 다시 읽지 않는다.
+"""
+
+from __future__ import annotations
+
+from types import MappingProxyType
+from typing import Iterator
+from typing import Mapping
+from typing import overload
+from weakref import WeakValueDictionary
+
+from soyorin.font import FontHandle
+from soyorin.font import FontSlant
+from soyorin.font import FontWeight
+from soyorin.font import get_font
+
+INHERITED_PROPERTIES = {
+    "font-size": "16px",
+    "font-style": "normal",
+    "font-weight": "normal",
+    "color": "black",
+}
+
+
+class ComputedStyle(Mapping[str, str]):
+    __slots__ = (
+        "properties",
+        "font_size",
+        "font_weight",
+        "font_slant",
+        "_inherited",
+        "_font",
+        "__weakref__",
+    )
+
+    # 속성 목록 -> 스타일. 아무 노드도 쓰지 않는 스타일은 저절로 빠진다.
+    INTERNED: WeakValueDictionary[tuple[tuple[str, str], ...], ComputedStyle] = (
+        WeakValueDictionary()
+    )
+
+    properties: Mapping[str, str]
+    font_size: float
+    font_weight: FontWeight
+    font_slant: FontSlant
+    _inherited: ComputedStyle | None
+    _font: FontHandle | None
+
+    def __init__(self, properties: Mapping[str, str]) -> None:
+        """직접 만들지 말고 ComputedStyle.create를 쓴다."""
+        self.properties = MappingProxyType(dict(properties))
+        get = self.properties.get
+        self.font_size = parse_px(get("font-size", INHERITED_PROPERTIES["font-size"]))
+        self.font_weight = FontWeight.from_css(get("font-weight", "normal"))
+        self.font_slant = FontSlant.from_css(get("font-style", "normal"))
+        self._inherited = None
+        self._font = None
+
+    @classmethod
+    def create(cls, properties: Mapping[str, str]) -> ComputedStyle:
+        key = tuple(sorted(properties.items()))
+        style = cls.INTERNED.get(key)
+        if style is None:
+            style = cls(properties)
+            cls.INTERNED[key] = style
+        return style
+
+    @property
+    def inherited(self) -> ComputedStyle:
+        """자식에게 물려주는 속성만 남긴 스타일 (아무것도 바꾸지 않는 자식의 스타일)"""
+        if self._inherited is None:
+            properties = self.properties
+            if len(properties) == len(INHERITED_PROPERTIES):
+                self._inherited = self
+            else:
+                self._inherited = ComputedStyle.create(
+                    {name: properties[name] for name in INHERITED_PROPERTIES}
+                )
+        return self._inherited
+
+    @property
+    def font(self) -> FontHandle:
+        """이 스타일로 글자를 그릴 글꼴. backend에 글꼴을 만들어야 하므로 처음 쓸 때 만든다."""
+        if self._font is None or self._font.stale:
+            self._font = get_font(
+                int(self.font_size * 0.75), self.font_weight, self.font_slant
+            )
+        return self._font
+
+    def derive(self, overrides: Mapping[str, str]) -> ComputedStyle:
+        """overrides를 덮어쓴 스타일. 바뀌는 것이 없으면 self를 그대로 돌려준다."""
+        properties = self.properties
+        for name, value in overrides.items():
+            if properties.get(name) != value:
+                return ComputedStyle.create({**properties, **overrides})
+        return self
+
+    def __getitem__(self, name: str) -> str:
+        return self.properties[name]
+
+    @overload
+    def get(self, name: str, /) -> str | None: ...
+
+    @overload
+    def get(self, name: str, default: str, /) -> str: ...
+
+    @overload
+    def get[T](self, name: str, default: T, /) -> str | T: ...
+
+    def get(self, name, default=None, /):
+        return self.properties.get(name, default)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.properties
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.properties)
+
+    def __len__(self) -> int:
+        return len(self.properties)
+
+    def __eq__(self, other: object) -> bool:
+        if other is self:
+            return True
+        if isinstance(other, ComputedStyle):
+            # intern 되어 있으므로 서로 다른 객체는 내용도 다르다.
+            return False
+        return Mapping.__eq__(self, other)
+
+    __hash__ = object.__hash__
+
+    def __repr__(self) -> str:
+        return f"ComputedStyle({dict(self.properties)!r})"
+
+
+def parse_px(value: str) -> float:
+    """"16px" 같은 값을 숫자로 바꾼다. 읽을 수 없는 값은 기본 크기로 본다."""
+    try:
+        return float(value[:-2])
+    except ValueError:
+        return parse_px(INHERITED_PROPERTIES["font-size"])
+
+
+ROOT_STYLE = ComputedStyle.create(INHERITED_PROPERTIES)
+# 아직 스타일을 계산하지 않은 노드의 스타일
+EMPTY_STYLE = ComputedStyle.create({})
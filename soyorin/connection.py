@@ -7,14 +7,24 @@ from typing import Literal
 from typing import Optional
 from typing import TypedDict
 from typing import NamedTuple
+from typing import Callable
+from typing import Iterator
 from socket import socket as Socket, AF_INET, SOCK_STREAM, IPPROTO_TCP
 from io import BufferedReader
+import codecs
 import ssl
+import threading
+import zlib
 
 from soyorin.url import URL, FileUrlInfo, DataUrlInfo, HttpUrlInfo
 from soyorin.cache import Cache, BrowserCacheKey, BrowserCacheEntry
 
 
+type Sink = Callable[[str], None]
+
+READ_CHUNK_SIZE = 64 * 1024
+
+
 class HttpOptions(TypedDict):
     http_version: Optional[Literal["1.0", "1.1"]]
 
@@ -25,7 +35,10 @@ class ConnectionPoolCacheKey(NamedTuple):
 
 
 class Connection:
-    connection_pool: ClassVar[Dict[ConnectionPoolCacheKey, Socket]] = {}
+    # 쉬고 있는 keep-alive 소켓들. 요청 중인 소켓은 pool에서 꺼내 두었다가
+    # 응답을 다 읽은 뒤 돌려놓으므로, 여러 스레드가 같은 소켓을 함께 쓰지 않는다.
+    connection_pool: ClassVar[Dict[ConnectionPoolCacheKey, list[Socket]]] = {}
+    connection_pool_lock: ClassVar[threading.Lock] = threading.Lock()
 
     socket: Optional[Socket]
     http_options: HttpOptions
@@ -38,30 +51,66 @@ class Connection:
         self.http_options = http_options or {"http_version": "1.0"}
         self.browser_cache = cache or FileCache()
 
-    def __read_chunked_body(self, response: BufferedReader) -> bytes:
-        body = b""
+    def __read_chunked_body(self, response: BufferedReader) -> Iterator[bytes]:
         while True:
             chunk_size_line = response.readline()
             chunk_size = int(chunk_size_line.decode("utf-8").strip(), 16)
             if chunk_size == 0:
                 break
             chunk_data = response.read(chunk_size)
-            body += chunk_data
+            yield chunk_data
             response.readline()  # 개행 문자 제거
 
-        return body
+    def __read_body(
+        self, response: BufferedReader, response_headers: dict[str, str]
+    ) -> Iterator[bytes]:
+        """응답 본문을 도착하는 대로 조각 단위로 돌려준다."""
+        if "content-length" in response_headers:
+            remaining = int(response_headers["content-length"])
+            while remaining > 0:
+                data = response.read1(min(remaining, READ_CHUNK_SIZE))
+                if not data:
+                    break
+                remaining -= len(data)
+                yield data
+        elif (
+            "transfer-encoding" in response_headers
+            and response_headers["transfer-encoding"].lower() == "chunked"
+        ):
+            # Handle gzip encoding if present
+            if (
+                "content-encoding" in response_headers
+                and response_headers["content-encoding"].lower() == "gzip"
+            ):
+                decompressor = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+                for chunk_data in self.__read_chunked_body(response):
+                    yield decompressor.decompress(chunk_data)
+                yield decompressor.flush()
+            else:
+                yield from self.__read_chunked_body(response)
+        else:
+            while data := response.read1(READ_CHUNK_SIZE):
+                yield data
 
     def __request_data(self, url_info: DataUrlInfo) -> str:
         return url_info.data
 
-    def __request_file(self, url_info: FileUrlInfo) -> str:
+    def __request_file(
+        self, url_info: FileUrlInfo, sink: Optional[Sink], keep_body: bool
+    ) -> str:
         path = url_info.path or ""
         # On Windows, file URLs have paths like /C:/path/file.html
         # We need to remove the leading slash before the drive letter
         if len(path) > 2 and path[0] == "/" and path[2] == ":":
             path = path[1:]
+        parts: list[str] = []
         with open(path, "r", encoding="utf-8") as f:
-            return f.read()
+            while chunk := f.read(READ_CHUNK_SIZE):
+                if keep_body:
+                    parts.append(chunk)
+                if sink is not None:
+                    sink(chunk)
+        return "".join(parts)
 
     def __request_about(self, url_info: AboutUrlInfo) -> str:
         if url_info.path == "blank":
@@ -70,7 +119,12 @@ class Connection:
             raise ValueError("Unsupported about: scheme")
 
     def __request_http(
-        self, url_info: HttpUrlInfo, http_options: HttpOptions, redirect_count=20
+        self,
+        url_info: HttpUrlInfo,
+        http_options: HttpOptions,
+        sink: Optional[Sink] = None,
+        keep_body: bool = True,
+        redirect_count=20,
     ) -> str:
         now = datetime.now()
         browser_cache_key = BrowserCacheKey.from_http_info(url_info)
@@ -87,6 +141,8 @@ class Connection:
                 if age >= cached_content.max_age:
                     self.browser_cache.delete(browser_cache_key)
                 else:
+                    if sink is not None:
+                        sink(cached_content.content)
                     return cached_content.content
 
         if http_options["http_version"] not in ["1.0", "1.1"]:
@@ -102,10 +158,8 @@ class Connection:
             key = ConnectionPoolCacheKey(host=url_info.host or "", port=url_info.port)
 
             # Connection Pool에서 재사용 가능한 소켓 확인 (HTTP/1.1만)
-            if http_options["http_version"] == "1.1" and key in Connection.connection_pool:
-                # 기존 연결이 있으면 재사용 시도
-                if self.socket is None:
-                    self.socket = Connection.connection_pool[key]
+            if http_options["http_version"] == "1.1" and self.socket is None:
+                self.socket = Connection.checkout(key)
 
             # 소켓이 없거나 호스트/포트가 다른 경우 새 소켓 생성
             if self.socket is None:
@@ -119,10 +173,6 @@ class Connection:
                         self.socket, server_hostname=url_info.host
                     )
 
-                # 새로 만든 소켓을 Connection Pool에 저장 (HTTP/1.1만)
-                if http_options["http_version"] == "1.1":
-                    Connection.connection_pool[key] = self.socket
-
             request = f"GET {url_info.path} HTTP/{http_options['http_version']}\r\n"
             request += f"Host: {url_info.host}\r\n"
 
@@ -137,9 +187,8 @@ class Connection:
             try:
                 self.socket.send(request.encode("utf-8"))
             except (BrokenPipeError, ConnectionResetError, OSError):
-                # 연결이 끊겼으면 Pool에서 제거하고 재시도
-                if key in Connection.connection_pool:
-                    del Connection.connection_pool[key]
+                # 연결이 끊겼으면 버리고 재시도
+                self.socket.close()
                 self.socket = None
                 continue
 
@@ -147,17 +196,13 @@ class Connection:
                 response = self.socket.makefile("rb", encoding="utf-8", newline="\r\n")
                 statusline = response.readline().decode("utf-8")
                 if not statusline:
-                    # 서버가 연결을 끊음 - Pool에서 제거하고 재시도
-                    if key in Connection.connection_pool:
-                        del Connection.connection_pool[key]
+                    # 서버가 연결을 끊음 - 버리고 재시도
                     self.socket.close()
                     self.socket = None
                     continue
                 version, status, explanation = statusline.split(" ", 2)
             except (BrokenPipeError, ConnectionResetError, OSError):
-                # 연결이 끊겼으면 Pool에서 제거하고 재시도
-                if key in Connection.connection_pool:
-                    del Connection.connection_pool[key]
+                # 연결이 끊겼으면 버리고 재시도
                 if self.socket:
                     self.socket.close()
                 self.socket = None
@@ -224,28 +269,39 @@ class Connection:
 
             break
 
-        content = ""
-        if "content-length" in response_headers:
-            content_length = int(response_headers["content-length"])
-            content = response.read(content_length).decode("utf-8")
-        elif (
-            "transfer-encoding" in response_headers
-            and response_headers["transfer-encoding"].lower() == "chunked"
+        # 캐시에 넣을 본문은 돌려주지 않더라도 모아 둔다.
+        directives = [
+            d.strip() for d in response_headers.get("cache-control", "").split(",")
+        ]
+        if "no-store" not in directives and any(
+            d.startswith("max-age=") for d in directives
         ):
-            chunked_data = self.__read_chunked_body(response)
-            # Handle gzip encoding if present
-            if (
-                "content-encoding" in response_headers
-                and response_headers["content-encoding"].lower() == "gzip"
-            ):
-                import gzip
-
-                decompressed_data = gzip.decompress(chunked_data)
-                content = decompressed_data.decode("utf-8")
-            else:
-                content = chunked_data.decode("utf-8")
+            keep_body = True
+
+        # 디코딩한 조각을 바로 sink로 넘겨서 파싱이 네트워크 읽기와 겹치도록 한다.
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        parts: list[str] = []
+        for data in self.__read_body(response, response_headers):
+            text = decoder.decode(data)
+            if text:
+                if keep_body:
+                    parts.append(text)
+                if sink is not None:
+                    sink(text)
+        text = decoder.decode(b"", final=True)
+        if text:
+            if keep_body:
+                parts.append(text)
+            if sink is not None:
+                sink(text)
+        content = "".join(parts)
+
+        # 응답을 끝까지 읽었으니 소켓을 다음 요청이 쓸 수 있게 돌려놓는다.
+        if http_options["http_version"] == "1.1":
+            Connection.checkin(key, self.socket)
         else:
-            content = response.read().decode("utf-8")
+            self.socket.close()
+        self.socket = None
 
         if "cache-control" in response_headers:
             cache_control = response_headers["cache-control"]
@@ -291,16 +347,47 @@ class Connection:
 
         return content
 
-    def request(self, url: URL) -> str:
-        if isinstance(url.url_info, DataUrlInfo):
-            return self.__request_data(url.url_info)
+    def request(
+        self, url: URL, sink: Optional[Sink] = None, keep_body: bool = True
+    ) -> str:
+        """
+        url의 본문을 가져온다. sink가 주어지면 본문을 디코딩되는 대로
+        조각 단위로 넘긴다. (예: HTMLParser.feed)
+        keep_body가 False이면 본문을 모아 두지 않고 빈 문자열을 돌려준다.
+        큰 본문을 sink로만 흘려보낼 때 쓴다.
+        """
+        if isinstance(url.url_info, HttpUrlInfo):
+            return self.__request_http(
+                url.url_info,
+                http_options=self.http_options,
+                sink=sink,
+                keep_body=keep_body,
+            )
         elif isinstance(url.url_info, FileUrlInfo):
-            return self.__request_file(url.url_info)
-        elif isinstance(url.url_info, AboutUrlInfo):
-            return self.__request_about(url.url_info)
+            return self.__request_file(url.url_info, sink, keep_body)
+
+        if isinstance(url.url_info, DataUrlInfo):
+            body = self.__request_data(url.url_info)
         else:
-            return self.__request_http(url.url_info, http_options=self.http_options)
+            body = self.__request_about(url.url_info)
+        if sink is not None and body:
+            sink(body)
+        return body
+
+    @staticmethod
+    def checkout(key: ConnectionPoolCacheKey) -> Optional[Socket]:
+        with Connection.connection_pool_lock:
+            idle = Connection.connection_pool.get(key)
+            return idle.pop() if idle else None
+
+    @staticmethod
+    def checkin(key: ConnectionPoolCacheKey, socket: Socket) -> None:
+        with Connection.connection_pool_lock:
+            Connection.connection_pool.setdefault(key, []).append(socket)
 
     def close(self):
-        for connection in self.connection_pool:
-            self.connection_pool[connection].close()
+        with Connection.connection_pool_lock:
+            for sockets in self.connection_pool.values():
+                for socket in sockets:
+                    socket.close()
+            self.connection_pool.clear()
@@ -3,3 +3,8 @@ SCROLL_STEP = 18
 WIDTH, HEIGHT = 800, 600
 HSTEP = 13.0
 VSTEP = 18.0
+# 보이는 곳 아래로 이만큼 더 배치해 두고, 한가할 때는 한 번에 이만큼씩 배치한다.
+LAYOUT_MARGIN = HEIGHT
+LAYOUT_CHUNK = 10 * HEIGHT
+# view-source 원문이 더 오기를 기다리는 동안 큐를 확인하는 간격(ms)
+SOURCE_POLL_MS = 10
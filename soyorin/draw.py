@@ -1,7 +1,9 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from tkinter import Canvas
-from tkinter.font import Font
+
+from soyorin.font import FontHandle
+from soyorin.font import measure
 
 
 @dataclass
@@ -25,23 +27,23 @@ class DrawCommand(ABC):
 
 
 class DrawText(DrawCommand):
-    def __init__(self, x1: float, y1: float, text: str, font: Font, color: str):
-        self.rect = Rect(
-            x1, y1, x1 + font.measure(text), y1 + font.metrics("linespace")
-        )
+    def __init__(
+        self, x1: float, y1: float, text: str, font: FontHandle, color: str
+    ):
+        self.rect = Rect(x1, y1, x1 + measure(font, text), y1 + font.linespace)
         self.top: float = y1
         self.left: float = x1
         self.text: str = text
-        self.font: Font = font
+        self.font: FontHandle = font
         self.color: str = color
-        self.bottom: float = y1 + font.metrics("linespace")
+        self.bottom: float = y1 + font.linespace
 
     def execute(self, scroll: float, canvas: Canvas) -> None:
         canvas.create_text(
             self.left,
             self.top - scroll,
             text=self.text,
-            font=self.font,
+            font=str(self.font.font),
             anchor="nw",
             fill=self.color,
         )
@@ -49,19 +51,16 @@ class DrawText(DrawCommand):
 
 class DrawRect(DrawCommand):
     def __init__(self, rect: Rect, color: str = "black"):
+        # 레이아웃이 끝나지 않은 블록의 배경은 나중에 rect.bottom이 바뀐다.
         self.rect: Rect = rect
-        self.top: float = rect.top
-        self.left: float = rect.left
-        self.bottom: float = rect.bottom
-        self.right: float = rect.right
         self.color: str = color
 
     def execute(self, scroll: float, canvas: Canvas) -> None:
         canvas.create_rectangle(
-            self.left,
-            self.top - scroll,
-            self.right,
-            self.bottom - scroll,
+            self.rect.left,
+            self.rect.top - scroll,
+            self.rect.right,
+            self.rect.bottom - scroll,
             width=0,
             fill=self.color,
         )
@@ -1,24 +1,215 @@
+import re
 import tkinter
+from enum import StrEnum
+from functools import lru_cache
 from tkinter import Label
 from tkinter.font import Font
-from typing import Literal
+from typing import Protocol
+from typing import TypedDict
 
-FONTS: dict[
-    tuple[int, Literal["normal", "bold"], Literal["roman", "italic"], str],
-    tuple[Font, Label],
-] = {}
+from soyorin.stats import counter
+from soyorin.stats import register_source
+
+# 페이지에 나오는 서로 다른 단어 수보다 넉넉하게 잡는다.
+MEASURE_CACHE_SIZE = 1 << 16
+
+# 고정폭 글꼴에서 글자 수만으로 폭을 셀 수 있는 글자들:
+# 출력 가능한 ASCII(U+0020-U+007E)와 한글 음절(U+AC00-U+D7A3)
+FIXED_PITCH_TEXT = re.compile("[\u0020-\u007e\uac00-\ud7a3]*")
+ASCII_SAMPLE = "".join(map(chr, range(0x20, 0x7F)))
+HANGUL_SAMPLE = "가각힣한글"
+
+FIXED_PITCH_MEASURES = counter("font.measure.fixed_pitch")
+
+
+class FontWeight(StrEnum):
+    NORMAL = "normal"
+    BOLD = "bold"
+
+    @classmethod
+    def from_css(cls, value: str) -> "FontWeight":
+        if value in ("bold", "bolder") or (value.isdigit() and int(value) >= 600):
+            return cls.BOLD
+        return cls.NORMAL
+
+
+class FontSlant(StrEnum):
+    ROMAN = "roman"
+    ITALIC = "italic"
+
+    @classmethod
+    def from_css(cls, value: str) -> "FontSlant":
+        # CSS의 font-style 값을 tkinter의 slant 값으로 바꾼다.
+        if value in ("italic", "oblique"):
+            return cls.ITALIC
+        return cls.ROMAN
+
+
+class FontMetrics(TypedDict):
+    """인자 없이 부른 tkinter.font.Font.metrics()의 결과"""
+
+    ascent: int
+    descent: int
+    linespace: int
+    fixed: bool
+
+
+class BackendFont(Protocol):
+    """
+    backend가 만드는 글꼴. tkinter.font.Font의 필요한 부분만 같다.
+    canvas에 그릴 때 font 옵션으로 넘기므로 str()이 Tk 글꼴 이름이나 설명이어야 한다.
+    """
+
+    @property
+    def name(self) -> str: ...
+
+    def measure(self, text: str) -> int: ...
+
+    def metrics(self) -> FontMetrics: ...
+
+
+class MetricsBackend(Protocol):
+    """글꼴을 만들고 치수를 재는 방법 (Tk, headless 등)"""
+
+    def load(
+        self, size: int, weight: FontWeight, slant: FontSlant, family: str
+    ) -> BackendFont: ...
+
+
+class TkBackend:
+    """tkinter 글꼴. Tk 루트 창이 있어야 하고, 그 창의 스레드에서만 쓸 수 있다."""
+
+    def __init__(self) -> None:
+        # 글꼴을 쓰는 위젯이 있어야 Tk가 글꼴과 치수를 버리지 않고 캐시해 둔다.
+        self.labels: list[Label] = []
+
+    def load(
+        self, size: int, weight: FontWeight, slant: FontSlant, family: str
+    ) -> Font:
+        font = tkinter.font.Font(
+            size=size, weight=weight.value, slant=slant.value, family=family
+        )
+        self.labels.append(tkinter.Label(font=font))
+        return font
+
+
+class FontHandle:
+    """
+    backend 글꼴과, 글꼴을 만들 때 한 번 읽어 둔 치수
+    레이아웃과 그리기는 metrics()를 부르지 않고 이 숫자만 읽는다.
+    canvas에 그릴 때는 font를 넘긴다.
+    """
+
+    __slots__ = (
+        "font",
+        "name",
+        "ascent",
+        "descent",
+        "linespace",
+        "space_width",
+        "ascii_advance",
+        "hangul_advance",
+        "stale",
+    )
+
+    def __init__(self, font: BackendFont) -> None:
+        self.font = font
+        self.name: str = font.name
+        # metrics()는 인자 없이 부르면 모든 값을 한 번에 돌려준다.
+        metrics = font.metrics()
+        self.ascent: int = metrics["ascent"]
+        self.descent: int = metrics["descent"]
+        self.linespace: int = metrics["linespace"]
+        self.space_width: int = font.measure(" ")
+        # 고정폭 글꼴이면 글자 종류별 폭(advance)을 재 둔다. 0이면 그 종류는
+        # 계산하지 않고 Tk에 묻는다. 한글은 글꼴에 없어서 다른 글꼴로 대신
+        # 그려질 수 있으므로, 여러 글자를 이어 잰 폭이 맞아떨어질 때만 쓴다.
+        self.ascii_advance = 0
+        self.hangul_advance = 0
+        if metrics["fixed"]:
+            self.ascii_advance = fixed_advance(font, ASCII_SAMPLE)
+        if self.ascii_advance:
+            self.hangul_advance = fixed_advance(font, HANGUL_SAMPLE)
+        # set_backend로 backend가 바뀌면 True가 된다. 들고 있던 쪽은 다시 받아 온다.
+        self.stale = False
+
+    def __repr__(self) -> str:
+        return f"<FontHandle {self.name}>"
+
+
+def fixed_advance(font: BackendFont, sample: str) -> int:
+    """sample의 모든 글자 폭이 같으면 그 폭, 아니면 0"""
+    advance = font.measure(sample[0])
+    if advance and font.measure(sample) == advance * len(sample):
+        return advance
+    return 0
+
+
+BACKEND: MetricsBackend = TkBackend()
+FONTS: dict[tuple[int, FontWeight, FontSlant, str], FontHandle] = {}
+# 글꼴 이름 -> 글꼴. 측정 캐시는 글꼴 대신 이름을 키로 쓴다.
+FONTS_BY_NAME: dict[str, FontHandle] = {}
+
+
+def set_backend(backend: MetricsBackend) -> None:
+    """
+    앞으로 get_font가 쓸 backend를 정한다. 레이아웃을 시작하기 전에 부른다.
+    예를 들어 디스플레이가 없는 테스트나 작업 프로세스에서는 HeadlessBackend를 쓴다.
+    """
+    global BACKEND
+    for handle in FONTS.values():
+        handle.stale = True
+    FONTS.clear()
+    FONTS_BY_NAME.clear()
+    measure_text.cache_clear()
+    BACKEND = backend
 
 
 def get_font(
     size: int,
-    weight: Literal["normal", "bold"],
-    style: Literal["roman", "italic"],
+    weight: FontWeight,
+    style: FontSlant,
     family: str = "D2Coding",
-) -> Font:
+) -> FontHandle:
     size = int(size)  # Ensure size is always an integer
     key = (size, weight, style, family)
-    if key not in FONTS:
-        font = tkinter.font.Font(size=size, weight=weight, slant=style, family=family)
-        label = tkinter.Label(font=font)
-        FONTS[key] = (font, label)
-    return FONTS[key][0]
+    handle = FONTS.get(key)
+    if handle is None:
+        handle = FontHandle(BACKEND.load(size, weight, style, family))
+        FONTS[key] = handle
+        FONTS_BY_NAME[handle.name] = handle
+    return handle
+
+
+def measure(font: FontHandle, text: str) -> int:
+    """
+    get_font로 만든 font로 text를 그렸을 때의 폭
+    Tk의 font.measure는 부를 때마다 Tcl을 거치므로, 레이아웃/그리기/Chrome이
+    같은 단어를 여러 번 재더라도 backend에는 (글꼴, 문자열)마다 한 번만 묻는다.
+    고정폭 글꼴(D2Coding)의 ASCII/한글 문자열은 Tk 없이 글자 수로 계산한다.
+    """
+    ascii_advance = font.ascii_advance
+    if ascii_advance:
+        if text.isascii():
+            if text.isprintable():
+                FIXED_PITCH_MEASURES.value += 1
+                return len(text) * ascii_advance
+        elif font.hangul_advance and FIXED_PITCH_TEXT.fullmatch(text):
+            # 한글 음절은 UTF-8로 3바이트이므로 2바이트씩 더 차지한다.
+            hangul = (len(text.encode()) - len(text)) // 2
+            FIXED_PITCH_MEASURES.value += 1
+            return (len(text) - hangul) * ascii_advance + hangul * font.hangul_advance
+    return measure_text(font.name, text)
+
+
+@lru_cache(maxsize=MEASURE_CACHE_SIZE)
+def measure_text(font_name: str, text: str) -> int:
+    return FONTS_BY_NAME[font_name].font.measure(text)
+
+
+def measure_cache_stats() -> dict[str, int]:
+    info = measure_text.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize}
+
+
+register_source("font.measure_cache", measure_cache_stats)
@@ -0,0 +1,201 @@
+"""
+Tk(Xft)가 글꼴을 고르는 것과 같은 방법으로 fontconfig에 글꼴 파일을 묻는다
+
+X11의 Tk는 글꼴 이름, 크기, 굵기, 기울기로 fontconfig 패턴을 만들어
+FcFontSort로 글꼴 목록을 받고, 글자마다 그 글자가 있는 첫 글꼴로 그린다.
+각 글꼴의 힌팅 설정은 FcFontRenderPrepare가 돌려준 값을 Xft가 그대로 쓴다.
+여기서는 libfontconfig를 ctypes로 불러 같은 목록과 설정을 얻는다.
+X 서버의 Xft.* 리소스는 읽지 않으므로 해상도(dpi)는 인자로 받는다.
+"""
+
+import ctypes
+import ctypes.util
+from functools import cache
+from pathlib import Path
+from typing import NamedTuple
+
+FC_MATCH_PATTERN = 0
+FC_RESULT_MATCH = 0
+FC_WEIGHT_MEDIUM = 100
+FC_WEIGHT_BOLD = 200
+FC_SLANT_ROMAN = 0
+FC_SLANT_ITALIC = 100
+FC_PROPORTIONAL = 0
+FC_MONO = 100
+FC_HINT_NONE = 0
+FC_HINT_SLIGHT = 1
+FC_HINT_FULL = 3
+
+
+class FcFontSet(ctypes.Structure):
+    _fields_ = [
+        ("nfont", ctypes.c_int),
+        ("sfont", ctypes.c_int),
+        ("fonts", ctypes.POINTER(ctypes.c_void_p)),
+    ]
+
+
+@cache
+def library() -> ctypes.CDLL | None:
+    name = ctypes.util.find_library("fontconfig")
+    if name is None:
+        return None
+    try:
+        lib = ctypes.CDLL(name)
+    except OSError:
+        return None
+    pattern = ctypes.c_void_p
+    name_arg = ctypes.c_char_p
+    signatures = {
+        "FcPatternCreate": (pattern, []),
+        "FcPatternDestroy": (None, [pattern]),
+        "FcPatternAddString": (ctypes.c_int, [pattern, name_arg, ctypes.c_char_p]),
+        "FcPatternAddInteger": (ctypes.c_int, [pattern, name_arg, ctypes.c_int]),
+        "FcPatternAddDouble": (ctypes.c_int, [pattern, name_arg, ctypes.c_double]),
+        "FcPatternGetString": (
+            ctypes.c_int,
+            [pattern, name_arg, ctypes.c_int, ctypes.POINTER(ctypes.c_char_p)],
+        ),
+        "FcPatternGetInteger": (
+            ctypes.c_int,
+            [pattern, name_arg, ctypes.c_int, ctypes.POINTER(ctypes.c_int)],
+        ),
+        "FcPatternGetBool": (
+            ctypes.c_int,
+            [pattern, name_arg, ctypes.c_int, ctypes.POINTER(ctypes.c_int)],
+        ),
+        "FcPatternGetDouble": (
+            ctypes.c_int,
+            [pattern, name_arg, ctypes.c_int, ctypes.POINTER(ctypes.c_double)],
+        ),
+        "FcPatternGetCharSet": (
+            ctypes.c_int,
+            [pattern, name_arg, ctypes.c_int, ctypes.POINTER(ctypes.c_void_p)],
+        ),
+        "FcConfigSubstitute": (ctypes.c_int, [ctypes.c_void_p, pattern, ctypes.c_int]),
+        "FcDefaultSubstitute": (None, [pattern]),
+        "FcFontSort": (
+            ctypes.POINTER(FcFontSet),
+            [
+                ctypes.c_void_p,
+                pattern,
+                ctypes.c_int,
+                ctypes.c_void_p,
+                ctypes.POINTER(ctypes.c_int),
+            ],
+        ),
+        "FcFontSetDestroy": (None, [ctypes.POINTER(FcFontSet)]),
+        "FcFontRenderPrepare": (pattern, [ctypes.c_void_p, pattern, pattern]),
+        "FcCharSetCopy": (ctypes.c_void_p, [ctypes.c_void_p]),
+        "FcCharSetDestroy": (None, [ctypes.c_void_p]),
+        "FcCharSetHasChar": (ctypes.c_int, [ctypes.c_void_p, ctypes.c_uint32]),
+    }
+    for function, (restype, argtypes) in signatures.items():
+        getattr(lib, function).restype = restype
+        getattr(lib, function).argtypes = argtypes
+    return lib
+
+
+def available() -> bool:
+    return library() is not None
+
+
+class CharSet:
+    """fontconfig가 아는 한 글꼴의 글자 집합 (Tk가 글자마다 글꼴을 고를 때 쓴다)"""
+
+    __slots__ = ("lib", "pointer")
+
+    def __init__(self, lib: ctypes.CDLL, pointer: int | None) -> None:
+        self.lib = lib
+        self.pointer = lib.FcCharSetCopy(pointer) if pointer else None
+
+    def __contains__(self, codepoint: int) -> bool:
+        return bool(self.pointer and self.lib.FcCharSetHasChar(self.pointer, codepoint))
+
+    def __del__(self) -> None:
+        if self.pointer:
+            self.lib.FcCharSetDestroy(self.pointer)
+
+
+class FontMatch(NamedTuple):
+    """FcFontRenderPrepare를 거친 글꼴 하나와, Xft가 그 글꼴에 쓰는 설정"""
+
+    file: Path
+    index: int
+    pixel_size: float
+    hinting: bool
+    hint_style: int
+    embolden: bool
+    spacing: int
+    charset: CharSet
+
+
+def sort_fonts(
+    family: str, size: float, bold: bool, italic: bool, dpi: float
+) -> list[FontMatch]:
+    """Tk가 이 글꼴을 만들 때 받는 글꼴 목록. 글자는 앞의 글꼴부터 찾는다."""
+    lib = library()
+    if lib is None:
+        raise LookupError("libfontconfig를 찾을 수 없다")
+
+    # Tk(tkUnixRFont.c)와 XftDefaultSubstitute가 만드는 패턴
+    pattern = lib.FcPatternCreate()
+    lib.FcPatternAddString(pattern, b"family", family.encode())
+    lib.FcPatternAddDouble(pattern, b"size", float(size))
+    weight = FC_WEIGHT_BOLD if bold else FC_WEIGHT_MEDIUM
+    lib.FcPatternAddInteger(pattern, b"weight", weight)
+    slant = FC_SLANT_ITALIC if italic else FC_SLANT_ROMAN
+    lib.FcPatternAddInteger(pattern, b"slant", slant)
+    lib.FcPatternAddDouble(pattern, b"dpi", float(dpi))
+    lib.FcConfigSubstitute(None, pattern, FC_MATCH_PATTERN)
+    lib.FcDefaultSubstitute(pattern)
+
+    result = ctypes.c_int()
+    fonts = lib.FcFontSort(None, pattern, 1, None, ctypes.byref(result))
+    matches = []
+    try:
+        if fonts:
+            font_set = fonts.contents
+            for i in range(font_set.nfont):
+                prepared = lib.FcFontRenderPrepare(None, pattern, font_set.fonts[i])
+                try:
+                    match = read_match(lib, prepared)
+                finally:
+                    lib.FcPatternDestroy(prepared)
+                if match is not None:
+                    matches.append(match)
+    finally:
+        if fonts:
+            lib.FcFontSetDestroy(fonts)
+        lib.FcPatternDestroy(pattern)
+    return matches
+
+
+def read_match(lib: ctypes.CDLL, pattern: int) -> FontMatch | None:
+    file = ctypes.c_char_p()
+    if lib.FcPatternGetString(pattern, b"file", 0, ctypes.byref(file)) != 0:
+        return None
+    assert file.value is not None
+
+    def get_int(name: bytes, default: int, getter=lib.FcPatternGetInteger) -> int:
+        value = ctypes.c_int()
+        if getter(pattern, name, 0, ctypes.byref(value)) != FC_RESULT_MATCH:
+            return default
+        return value.value
+
+    pixel_size = ctypes.c_double()
+    lib.FcPatternGetDouble(pattern, b"pixelsize", 0, ctypes.byref(pixel_size))
+    charset = ctypes.c_void_p()
+    lib.FcPatternGetCharSet(pattern, b"charset", 0, ctypes.byref(charset))
+    # 값이 없을 때는 XftDefaultSubstitute의 기본값을 쓴다.
+    return FontMatch(
+        file=Path(file.value.decode()),
+        # 가변 글꼴의 인스턴스 번호는 위 16비트에 있다.
+        index=get_int(b"index", 0) & 0xFFFF,
+        pixel_size=pixel_size.value,
+        hinting=bool(get_int(b"hinting", 1, lib.FcPatternGetBool)),
+        hint_style=get_int(b"hintstyle", FC_HINT_FULL),
+        embolden=bool(get_int(b"embolden", 0, lib.FcPatternGetBool)),
+        spacing=get_int(b"spacing", FC_PROPORTIONAL),
+        charset=CharSet(lib, charset.value),
+    )
@@ -0,0 +1,220 @@
+"""
+Tk 없이 글자 폭과 치수를 계산하는 글꼴 backend
+
+X11의 Tk와 같은 글꼴 파일을 fontconfig에 물어(soyorin.fontconfig) 그 파일의
+글꼴 단위 폭을 읽고(soyorin.truetype), Xft가 FreeType으로 계산하는 것과 같은
+방식으로 픽셀로 바꾼다. 그래서 같은 기계에서는 Tk backend와 같은 줄바꿈이 나온다.
+디스플레이도 Tk 루트 창도 필요 없으므로 테스트, 작업 스레드, 작업 프로세스에서
+레이아웃을 할 수 있다.
+
+    from soyorin.font import set_backend
+    from soyorin.headless_font import HeadlessBackend
+    set_backend(HeadlessBackend())
+
+D2Coding이 설치되어 있지 않으면 Tk처럼 fontconfig가 고른 다른 글꼴의 치수를 쓴다.
+기계마다 같은 결과가 필요한 테스트는 substitutes로 글꼴을 정해 준다.
+FreeType 힌팅 중 antialias를 끈 흑백 힌팅과 autohint는 폭을 따로 맞추지 않는다.
+"""
+
+import bisect
+from functools import cache
+from pathlib import Path
+from typing import Mapping
+
+from soyorin import fontconfig
+from soyorin.font import FontMetrics
+from soyorin.font import FontSlant
+from soyorin.font import FontWeight
+from soyorin.fontconfig import FontMatch
+from soyorin.truetype import FaceTable
+from soyorin.truetype import read_face
+
+# Xft가 X 서버에서 읽는 기본 해상도
+DEFAULT_DPI = 96
+
+
+@cache
+def load_face(file: Path, index: int) -> FaceTable:
+    return read_face(file, index)
+
+
+class ScaledFace:
+    """
+    글꼴 파일 하나를 한 크기로 연 것. Xft의 XftFont에 해당한다.
+    FreeType(FT_Set_Char_Size)처럼 26.6 고정소수점으로 계산한다.
+    """
+
+    def __init__(self, table: FaceTable, match: FontMatch) -> None:
+        self.table = table
+        self.starts = [start for start, _, _ in table.advances]
+        pixel_size = int(match.pixel_size * 64)
+        scale = div_fix(pixel_size, table.units_per_em)
+        self.ascent = pix_ceil(mul_fix(table.ascender, scale)) >> 6
+        self.descent = -(pix_floor(mul_fix(table.descender, scale)) >> 6)
+
+        # 힌팅을 끄면 폭을 반올림하지 않는다. light(hintslight)는 요청한 크기의
+        # 폭을 반올림하고, 그보다 센 힌팅은 TrueType 글꼴이면 정수 ppem의 폭을 쓴다.
+        self.hinted = match.hinting and match.hint_style != fontconfig.FC_HINT_NONE
+        self.scale = scale
+        if (
+            self.hinted
+            and match.hint_style > fontconfig.FC_HINT_SLIGHT
+            and table.integer_ppem
+        ):
+            self.scale = div_fix(pix_round(pixel_size), table.units_per_em)
+        # FT_GlyphSlot_Embolden이 폭을 늘리는 양
+        self.embolden = 0
+        if match.embolden:
+            self.embolden = mul_fix(table.units_per_em, scale) // 24
+        # 고정폭(spacing=mono) 글꼴은 Xft가 모든 글자를 최대 폭으로 잰다.
+        self.mono_width = 0
+        if match.spacing >= fontconfig.FC_MONO:
+            self.mono_width = pix_round(mul_fix(table.max_advance, scale)) >> 6
+
+    def width(self, codepoint: int) -> int | None:
+        """이 글꼴에 없는 글자는 None"""
+        i = bisect.bisect_right(self.starts, codepoint) - 1
+        if i < 0:
+            return None
+        _, last, units = self.table.advances[i]
+        if codepoint > last:
+            return None
+        return self.advance(units)
+
+    def advance(self, units: int) -> int:
+        if self.mono_width:
+            return self.mono_width
+        advance = mul_fix(units, self.scale)
+        if self.hinted:
+            advance = pix_round(advance)
+        if advance and self.embolden:
+            advance += self.embolden
+        # Xft는 글리프 폭을 정수 픽셀로 반올림해 돌려준다.
+        return pix_round(advance) >> 6
+
+
+class HeadlessFont:
+    """
+    Tk 글꼴 하나. tkinter.font.Font 대신 FontHandle에 들어간다.
+    치수는 첫 글꼴의 것이고, 글자는 그 글자가 있는 첫 글꼴로 잰다.
+    어느 글꼴에도 없는 글자는 Tk처럼 첫 글꼴의 .notdef 글리프 폭이다.
+    """
+
+    def __init__(
+        self,
+        matches: list[FontMatch],
+        size: int,
+        weight: FontWeight,
+        slant: FontSlant,
+        family: str,
+    ) -> None:
+        self.matches = matches
+        self.name = f"headless-{family}-{size}-{weight}-{slant}"
+        # canvas에 그릴 때 넘기는 Tk 글꼴 설명
+        self.description = f"{{{family}}} {size} {weight} {slant}"
+        # matches[i]를 연 글꼴. 대신 그릴 글꼴은 필요할 때 읽는다.
+        self.faces: list[ScaledFace | None] = [None] * len(matches)
+        self.primary = self.face(0)
+        self.ascent = self.primary.ascent
+        self.descent = self.primary.descent
+        # Tk는 spacing이 proportional이 아닌 글꼴을 고정폭으로 본다.
+        self.fixed = matches[0].spacing != fontconfig.FC_PROPORTIONAL
+
+        # 글자 -> 픽셀 폭. 처음 나온 글자만 글꼴에서 찾는다.
+        self.widths: dict[str, int] = {}
+
+    def face(self, i: int) -> ScaledFace:
+        face = self.faces[i]
+        if face is None:
+            match = self.matches[i]
+            face = ScaledFace(load_face(match.file, match.index), match)
+            self.faces[i] = face
+        return face
+
+    def measure(self, text: str) -> int:
+        widths = self.widths
+        try:
+            return sum([widths[char] for char in text])
+        except KeyError:
+            for char in text:
+                if char not in widths:
+                    widths[char] = self.char_width(char)
+            return sum([widths[char] for char in text])
+
+    def metrics(self) -> FontMetrics:
+        return {
+            "ascent": self.ascent,
+            "descent": self.descent,
+            "linespace": self.ascent + self.descent,
+            "fixed": self.fixed,
+        }
+
+    def char_width(self, char: str) -> int:
+        codepoint = ord(char)
+        for i, match in enumerate(self.matches):
+            if codepoint not in match.charset:
+                continue
+            try:
+                width = self.face(i).width(codepoint)
+            except ValueError:
+                # 비트맵 글꼴처럼 폭을 읽을 수 없는 글꼴은 건너뛴다.
+                continue
+            if width is not None:
+                return width
+        return self.primary.advance(self.primary.table.notdef_advance)
+
+    def __str__(self) -> str:
+        return self.description
+
+
+class HeadlessBackend:
+    """
+    soyorin.font.MetricsBackend 구현
+    substitutes는 요청한 글꼴 이름 -> fontconfig에 대신 물을 글꼴 이름이다.
+    """
+
+    def __init__(
+        self,
+        dpi: float = DEFAULT_DPI,
+        substitutes: Mapping[str, str] | None = None,
+    ):
+        self.dpi = dpi
+        self.substitutes = dict(substitutes or {})
+
+    def load(
+        self, size: int, weight: FontWeight, slant: FontSlant, family: str
+    ) -> HeadlessFont:
+        matches = fontconfig.sort_fonts(
+            self.substitutes.get(family, family),
+            size,
+            bold=weight is FontWeight.BOLD,
+            italic=slant is FontSlant.ITALIC,
+            dpi=self.dpi,
+        )
+        if not matches:
+            raise LookupError(f"fontconfig에 {family} 글꼴이 하나도 없다")
+        return HeadlessFont(matches, size, weight, slant, family)
+
+
+def mul_fix(a: int, b: int) -> int:
+    """FreeType FT_MulFix: a * b / 0x10000 (반올림)"""
+    sign = -1 if (a < 0) != (b < 0) else 1
+    return sign * ((abs(a) * abs(b) + 0x8000) >> 16)
+
+
+def div_fix(a: int, b: int) -> int:
+    """FreeType FT_DivFix: a * 0x10000 / b (반올림)"""
+    sign = -1 if (a < 0) != (b < 0) else 1
+    return sign * (((abs(a) << 16) + (abs(b) >> 1)) // abs(b))
+
+
+def pix_round(x: int) -> int:
+    return (x + 32) & ~63
+
+
+def pix_ceil(x: int) -> int:
+    return (x + 63) & ~63
+
+
+def pix_floor(x: int) -> int:
+    return x & ~63
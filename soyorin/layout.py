@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from soyorin.font import get_font
+import math
+
 from soyorin.const import VSTEP
 from soyorin.const import HSTEP
 from soyorin.draw import DrawRect
@@ -9,13 +10,22 @@ from soyorin.draw import Rect
 from soyorin.const import WIDTH
 from soyorin.lexer import Element
 
+from soyorin.font import FontHandle
+from soyorin.font import measure
 from soyorin.lexer import Text, Token
-from tkinter.font import Font
+from soyorin.traversal import preorder
+from typing import Iterator
 from typing import cast
 
 
 class DocumentLayout:
-    def __init__(self, node: Token):
+    """
+    문서 레이아웃. layout()은 한 번에 끝까지, layout_until()은 주어진 y까지만
+    배치하고 멈췄다가 다음 호출에서 이어서 배치한다.
+    display_list를 주면 배치하면서 그리기 명령을 바로 쌓으므로 paint_tree가 필요 없다.
+    """
+
+    def __init__(self, node: Token, display_list: list | None = None):
         self.node = node
         self.parent = None
         self.children: list[BlockLayout] = []
@@ -23,12 +33,66 @@ class DocumentLayout:
         self.x: float = HSTEP
         self.y: float = VSTEP
         self.height: float = 0.0
+        self.display_list = display_list
+        # 자식을 아직 다 배치하지 않은 블록들(바깥쪽부터)
+        self.open_blocks: list[BlockLayout] = []
+        self.steps: Iterator[float] | None = None
+        self.done = False
 
     def layout(self) -> None:
-        child = BlockLayout(self.node, self, None)
-        self.children.append(child)
-        child.layout()
-        self.height = child.height
+        self.layout_until(math.inf)
+
+    def layout_until(self, bottom: float) -> bool:
+        """
+        배치한 내용의 아래쪽 y가 bottom 이상이 될 때까지 배치한다.
+        끝까지 배치했으면 True를 돌려준다.
+        """
+        if self.done:
+            return True
+        if self.steps is None:
+            self.steps = self.layout_steps()
+        laid_out = self.y
+        for laid_out in self.steps:
+            if laid_out >= bottom:
+                break
+        else:
+            self.done = True
+            self.steps = None
+            self.height = self.children[0].height
+            return True
+        # 열린 블록은 지금까지 배치한 곳까지의 높이로 두어 배경도 그만큼 그린다.
+        for block in self.open_blocks:
+            block.set_height(laid_out - block.y)
+        self.height = laid_out - self.y
+        return False
+
+    def layout_steps(self) -> Iterator[float]:
+        """
+        블록을 하나 끝낼 때마다 그 아래쪽 y를 돌려주는 제너레이터
+        블록은 DOM 깊이만큼 중첩되므로 재귀 대신 열린 블록의 스택으로 배치하고,
+        블록의 자식 블록은 차례가 왔을 때 만든다.
+        """
+        root = BlockLayout(self.node, self, None)
+        self.children.append(root)
+        stack = self.open_blocks
+        self.place(root)
+        stack.append(root)
+        while stack:
+            block = stack[-1]
+            child = block.next_child()
+            if child is None:
+                stack.pop()
+                block.finish()
+                yield block.y + block.height
+                continue
+            self.place(child)
+            stack.append(child)
+
+    def place(self, block: BlockLayout) -> None:
+        block.place()
+        if self.display_list is not None:
+            # 블록 모드면 아직 자식이 없으므로 블록 자신(과 인라인 모드의 줄)만 그린다.
+            paint_tree(block, self.display_list)
 
     def paint(self) -> list:
         return []
@@ -38,10 +102,8 @@ def paint_tree(
     layout_object: DocumentLayout | BlockLayout | LineLayout | TextLayout,
     display_list: list[DrawText | DrawRect],
 ) -> None:
-    display_list.extend(layout_object.paint())
-
-    for child in layout_object.children:
-        paint_tree(child, display_list)
+    for child in preorder(layout_object):
+        display_list.extend(child.paint())
 
 
 class BlockLayout:
@@ -65,27 +127,23 @@ class BlockLayout:
         self.x: float = 0.0
         self.y: float = 0.0
 
+        # 블록 모드에서 아직 레이아웃 객체를 만들지 않은 DOM 자식들
+        self.pending_children: Iterator[Token] | None = None
+        # paint()가 만든 배경. 높이가 정해지면 아래쪽을 맞춘다.
+        self.background: DrawRect | None = None
+
     def recurse(self, node: Token) -> None:
-        if isinstance(node, Text):
-            for word in node.text.split():
-                self.word(node, word)
-        else:
-            if node.tag == "br":
+        for child in preorder(node):
+            if isinstance(child, Text):
+                for word in child.text.split():
+                    self.word(child, word)
+            elif child.tag == "br":
                 self.new_line()
-            for child in node.children:
-                self.recurse(child)
 
     def word(self, node: Text, word: str) -> None:
         # Get font to calculate width for line breaking
-        weight = node.style["font-weight"]
-        style = node.style["font-style"]
-        if style == "normal":
-            style = "roman"
-        size = int(float(node.style["font-size"][:-2]) * 0.75)
-        assert weight in ("normal", "bold")
-        assert style in ("roman", "italic")
-        font = get_font(size, weight, style)
-        w = font.measure(word)
+        font = node.style.font
+        w = measure(font, word)
 
         # Check if we need a new line
         if self.cursor_x + w > self.width:
@@ -98,7 +156,7 @@ class BlockLayout:
         text = TextLayout(node, word, line, previous_word)
         line.children.append(text)
 
-        self.cursor_x += w + font.measure(" ")
+        self.cursor_x += w + font.space_width
 
     def new_line(self) -> None:
         self.cursor_x = 0
@@ -112,11 +170,9 @@ class BlockLayout:
         if isinstance(self.node, Text):
             return "inline"
         elif any(
-            [
-                isinstance(child, Element)
-                and child.style.get("display", "inline") == "block"
-                for child in self.node.children
-            ]
+            isinstance(child, Element)
+            and child.style.get("display", "inline") == "block"
+            for child in self.node.children
         ):
             return "block"
         elif self.node.children:
@@ -124,8 +180,11 @@ class BlockLayout:
         else:
             return "block"
 
-    def layout(self) -> None:
-
+    def place(self) -> None:
+        """
+        위치와 너비를 정한다. 인라인 모드면 줄과 단어까지 배치하고, 블록 모드면
+        자식 블록은 next_child()로 하나씩 만든다.
+        """
         self.x = self.parent.x
         self.width = self.parent.width
 
@@ -141,21 +200,35 @@ class BlockLayout:
 
         mode = self.layout_mode()
         if mode == "block":
-            previous = None
-            for child in self.node.children:
-                next = BlockLayout(child, self, previous)
-                if isinstance(child, Element) and child.tag == "head":
-                    continue
-                self.children.append(next)
-                previous = next
+            self.pending_children = iter(self.node.children)
         else:
             self.new_line()
             self.recurse(self.node)
-
-        for child in self.children:
-            child.layout()
-
-        self.height = sum([child.height for child in self.children])
+            for line in self.children:
+                cast(LineLayout, line).layout()
+
+    def next_child(self) -> BlockLayout | None:
+        """다음 자식 블록을 만들어 자리를 정한다. 남은 자식이 없으면 None"""
+        if self.pending_children is None:
+            return None
+        for child in self.pending_children:
+            if isinstance(child, Element) and child.tag == "head":
+                continue
+            previous = cast(BlockLayout, self.children[-1]) if self.children else None
+            block = BlockLayout(child, self, previous)
+            self.children.append(block)
+            return block
+        self.pending_children = None
+        return None
+
+    def finish(self) -> None:
+        """자식 배치가 끝난 뒤 높이를 정한다."""
+        self.set_height(sum([child.height for child in self.children]))
+
+    def set_height(self, height: float) -> None:
+        self.height = height
+        if self.background is not None:
+            self.background.rect.bottom = self.y + height
 
     def paint(self) -> list[DrawText | DrawRect]:
         cmds: list[DrawText | DrawRect] = []
@@ -164,6 +237,7 @@ class BlockLayout:
         if bgcolor != "transparent":
             x2, y2 = self.x + self.width, self.y + self.height
             rect = DrawRect(Rect(self.x, self.y, x2, y2), bgcolor)
+            self.background = rect
             cmds.append(rect)
 
         # Draw bullet for <li> elements
@@ -215,22 +289,14 @@ class LineLayout:
         for word in self.children:
             word.layout()
         max_ascent = max(
-            [
-                word.font.metrics("ascent")
-                for word in self.children
-                if word.font is not None
-            ]
+            [word.font.ascent for word in self.children if word.font is not None]
         )
         baseline = self.y + 1.25 * max_ascent
         for word in self.children:
             if word.font is not None:
-                word.y = baseline - word.font.metrics("ascent")
+                word.y = baseline - word.font.ascent
         max_descent = max(
-            [
-                word.font.metrics("descent")
-                for word in self.children
-                if word.font is not None
-            ]
+            [word.font.descent for word in self.children if word.font is not None]
         )
         self.height = 1.25 * (max_ascent + max_descent)
 
@@ -251,28 +317,21 @@ class TextLayout:
         self.y: float = 0.0
         self.width: float = 0.0
         self.height: float = 0.0
-        self.font: Font | None = None
+        self.font: FontHandle | None = None
 
     def layout(self) -> None:
-        weight = self.node.style["font-weight"]
-        style = self.node.style["font-style"]
-        if style == "normal":
-            style = "roman"
-        size = int(float(self.node.style["font-size"][:-2]) * 0.75)
-        assert weight in ("normal", "bold")
-        assert style in ("roman", "italic")
-        self.font = get_font(size, weight, style)
+        self.font = self.node.style.font
 
-        self.width = self.font.measure(self.word)
+        self.width = measure(self.font, self.word)
 
         if self.previous:
             assert self.previous.font is not None
-            space = self.previous.font.measure(" ")
+            space = self.previous.font.space_width
             self.x = self.previous.x + space + self.previous.width
         else:
             self.x = self.parent.x
 
-        self.height = self.font.metrics("linespace")
+        self.height = self.font.linespace
 
     def paint(self) -> list[DrawText]:
         color = self.node.style["color"]
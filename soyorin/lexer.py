@@ -1,7 +1,19 @@
 from __future__ import annotations
+import re
+import sys
+import threading
+from types import MappingProxyType
+from typing import Callable
 from typing import Literal
+from typing import Mapping
+from typing import Sequence
+
+from soyorin.computed_style import EMPTY_STYLE
+from soyorin.computed_style import ComputedStyle
+from soyorin.traversal import preorder_with_depth
 
 type Token = Text | Element
+type InsertionMode = Literal["initial", "before head", "in head", "in body"]
 
 SELF_CLOSING_TAGS = [
     "area",
@@ -20,26 +32,141 @@ SELF_CLOSING_TAGS = [
     "wbr",
 ]
 
+# HTMLParser.parse가 상태별로 다음 경계를 찾을 때 쓰는 스캐너
+TEXT_SCANNER = re.compile(r"<!--|[<>]")
+TAG_SCANNER = re.compile(r"<!--|[<>'\"]")
+QUOTE_SCANNERS = {
+    "'": re.compile(r"<!--|'"),
+    '"': re.compile(r'<!--|"'),
+}
+SCRIPT_SCANNER = re.compile(r"<!--|</script>")
+
+NON_SPACE = re.compile(r"\S")
+# view-source에서 <pre> 아래 블록 하나에 넣는 원문 글자 수
+SOURCE_BLOCK_SIZE = 4096
+
+# 여러 노드가 함께 쓰는 읽기 전용 빈 객체
+NO_ATTRIBUTES: Mapping[str, str] = MappingProxyType({})
+
+
+# 모든 문서가 함께 쓰는 태그 이름 <-> 번호 표. 선택자 비교와 arena 저장에 쓴다.
+# 번호는 프로세스마다 달라질 수 있으므로 파일에 저장하면 안 된다.
+TEXT_TAG_ID = -1
+TAG_IDS: dict[str, int] = {}
+TAG_NAMES: list[str] = []
+TAG_IDS_LOCK = threading.Lock()
+
+
+def tag_id(tag: str) -> int:
+    number = TAG_IDS.get(tag)
+    if number is None:
+        with TAG_IDS_LOCK:
+            number = TAG_IDS.get(tag)
+            if number is None:
+                number = len(TAG_NAMES)
+                TAG_NAMES.append(tag)
+                TAG_IDS[tag] = number
+    return number
+
+
+def decode_entities(text: str) -> str:
+    if "&" not in text:
+        return text
+    text = text.replace("&lt;", "<")
+    return text.replace("&gt;", ">")
+
 
 class Text:
+    __slots__ = ("_text", "source", "start", "end", "parent", "style")
+
+    # 텍스트 노드는 자식이 없으므로 모든 인스턴스가 빈 튜플 하나를 공유한다.
+    children: Sequence[Token] = ()
+    # 어떤 태그 선택자와도 맞지 않는 번호
+    tag_id = TEXT_TAG_ID
+    # 텍스트 노드의 스타일은 부모에게서만 오므로 스스로 dirty가 되지 않는다.
+    style_dirty = False
+    child_style_dirty = False
+
     def __init__(self, text: str, parent: Element):
-        self.text = text
-        self.children = []
+        self._text: str | None = text
+        self.source: str | None = None
+        self.start = 0
+        self.end = 0
         self.parent = parent
-        self.style: dict[str, str] = {}
+        self.style: ComputedStyle = EMPTY_STYLE
+
+    @classmethod
+    def from_source(cls, source: str, start: int, end: int, parent: Element) -> Text:
+        """원문 source[start:end]를 가리키기만 하고, 내용은 처음 읽을 때 만든다."""
+        node = cls.__new__(cls)
+        node._text = None
+        node.source = source
+        node.start = start
+        node.end = end
+        node.parent = parent
+        node.style = EMPTY_STYLE
+        return node
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            assert self.source is not None
+            self._text = decode_entities(self.source[self.start : self.end])
+            self.source = None
+        return self._text
 
     def __repr__(self):
         return repr(self.text)
 
 
 class Element:
+    __slots__ = (
+        "tag",
+        "tag_id",
+        "attributes",
+        "children",
+        "parent",
+        "style",
+        "style_dirty",
+        "child_style_dirty",
+    )
 
-    def __init__(self, tag: str, attributes: dict[str, str], parent: Element | None):
+    def __init__(
+        self, tag: str, attributes: Mapping[str, str], parent: Element | None
+    ):
         self.tag = tag
-        self.attributes = attributes
+        self.tag_id = tag_id(tag)
+        # 속성이 없는 요소는 빈 dict를 따로 만들지 않고 공유 객체를 쓴다.
+        self.attributes = attributes or NO_ATTRIBUTES
         self.children: list[Token] = []
         self.parent = parent
-        self.style: dict[str, str] = {}
+        self.style: ComputedStyle = EMPTY_STYLE
+        # style_dirty: 이 노드의 스타일을 다시 계산해야 한다.
+        # child_style_dirty: 자손 중에 style_dirty인 노드가 있다.
+        self.style_dirty = False
+        self.child_style_dirty = False
+
+    def set_attribute(self, name: str, value: str) -> None:
+        # 속성 dict는 파서나 다른 노드(NO_ATTRIBUTES)와 함께 쓸 수 있으므로 복사한다.
+        self.attributes = {**self.attributes, name: value}
+        self.mark_style_dirty()
+
+    def mark_style_dirty(self) -> None:
+        """다음 restyle()에서 이 노드부터 다시 계산하도록 표시한다."""
+        self.style_dirty = True
+        # 이미 표시된 조상을 만나면 그 위도 모두 표시되어 있다.
+        node = self.parent
+        while node is not None and not node.child_style_dirty:
+            node.child_style_dirty = True
+            node = node.parent
+
+    def style_dirty_children(self) -> list[Token]:
+        """restyle()이 내려가 봐야 하는 (dirty 표시가 있는) 자식들"""
+        return [
+            child
+            for child in self.children
+            if child.style_dirty or child.child_style_dirty
+        ]
 
     def __repr__(self):
         return f"<{self.tag}>"
@@ -58,98 +185,179 @@ class HTMLParser:
         "script",
     ]
 
-    def __init__(self, body: str):
+    def __init__(self, body: str = ""):
         self.body = body
         self.unfinished: list[Element] = []
+        self.insertion_mode: InsertionMode = "initial"
+
+        # feed() 호출 사이에 유지되는 토크나이저 상태
+        self.buffer = ""
+        self.text = ""
+        self.in_tag = False
+        self.in_script = False
+        self.in_comment = False
+        self.quote_char: Literal["'"] | Literal['"'] | Literal[""] = ""
+
+        # 여는 태그를 읽는 즉시 불리는 훅 (예: PreloadScanner가 <link>를 보고
+        # 트리가 완성되기 전에 스타일시트를 미리 받기 시작한다)
+        self.on_start_tag: Callable[[str, Mapping[str, str]], None] | None = None
 
     def parse(self):
-        text = ""
-        in_tag = False
-        in_script = False
-        quote_char: Literal["'"] | Literal['"'] | Literal[""] = ""
-        idx = 0
+        self.buffer += self.body
+        return self.close()
+
+    def feed(self, chunk: str) -> None:
+        """문서의 일부를 넘겨받아 지금까지 확정된 토큰을 트리에 반영한다."""
+        self.buffer += chunk
+        self.tokenize(final=False)
+
+    def close(self):
+        """남은 입력을 마저 처리하고 완성된 트리의 루트를 반환한다."""
+        self.tokenize(final=True)
+        if not self.in_tag and self.text:
+            self.add_text(self.text)
+        self.text = ""
+        return self.finish()
 
-        while idx < len(self.body):
-            c = self.body[idx]
-            if self.body[idx : idx + 4] == "<!--":
-                comment_end = self.body.find("-->", idx + 4)
+    def tokenize(self, final: bool) -> None:
+        # 문자 단위로 순회하지 않고 다음 경계(<, >, 따옴표, 주석, </script>)로 바로 건너뛴다.
+        # 모으는 중인 텍스트는 buffer[run_start:] 구간으로만 기억하고, 주석이나
+        # 청크 경계로 끊길 때만 self.text에 복사해 둔다.
+        buffer = self.buffer
+        end = len(buffer)
+        safe_end = end if final else self.safe_end(buffer)
+        pending = self.text
+        in_tag = self.in_tag
+        in_script = self.in_script
+        quote_char = self.quote_char
+        idx = 0
+        run_start = 0
 
+        while idx < safe_end:
+            if self.in_comment:
+                comment_end = buffer.find("-->", idx)
                 if comment_end == -1:
+                    # 닫히지 않은 주석 뒤의 내용은 버린다.
+                    idx = run_start = end if final else max(idx, end - 2)
                     break
-                else:
-                    idx = comment_end + 3
-                    continue
+                self.in_comment = False
+                idx = run_start = comment_end + 3
+                continue
 
             if in_script:
-                if self.body[idx : idx + 9] == "</script>":
-                    if text:
-                        self.add_text(text)
-                        text = ""
-                    in_script = False
-                    in_tag = False
-                    self.add_tag("/script")  # Close the script tag
-                    idx += 9
-                    continue
-                else:
-                    text += c
-                    idx += 1
-                    continue
+                scanner = SCRIPT_SCANNER
+            elif quote_char:
+                scanner = QUOTE_SCANNERS[quote_char]
+            elif in_tag:
+                scanner = TAG_SCANNER
+            else:
+                scanner = TEXT_SCANNER
+
+            match = scanner.search(buffer, idx, safe_end)
+            if match is None:
+                idx = safe_end
+                break
+            start, idx = match.span()
+            token = match.group()
 
-            if c == "<" and quote_char == "":
+            if token == "<":
                 in_tag = True
-                if text:
-                    self.add_text(text)
-                text = ""
-            elif c == ">" and quote_char == "":
+                self.flush_text(pending, buffer, run_start, start)
+                pending = ""
+                run_start = idx
+            elif token == ">":
                 in_tag = False
                 quote_char = ""
-                self.add_tag(text)
-                if text.split()[0] == "script":
+                tag = pending + buffer[run_start:start]
+                self.add_tag(tag)
+                if tag.split(maxsplit=1)[0] == "script":
                     in_script = True
-                text = ""
+                pending = ""
+                run_start = idx
+            elif token == "<!--":
+                pending += buffer[run_start:start]
+                run_start = idx
+                self.in_comment = True
+            elif token == "</script>":
+                self.flush_text(pending, buffer, run_start, start)
+                pending = ""
+                run_start = idx
+                in_script = False
+                in_tag = False
+                self.add_tag("/script")  # Close the script tag
             else:
-                text += c
-                if in_tag:
-                    if quote_char == "" and (c == '"' or c == "'"):
-                        quote_char = c
-                    elif quote_char == c:
-                        quote_char = ""
-            idx += 1
-        if not in_tag and text:
-            self.add_text(text)
-        return self.finish()
+                # 태그 안의 따옴표: 열린 따옴표가 없으면 열고, 있으면 닫는다.
+                quote_char = "" if quote_char else token
+
+        self.buffer = buffer[idx:]
+        self.text = pending + buffer[run_start:idx]
+        self.in_tag = in_tag
+        self.in_script = in_script
+        self.quote_char = quote_char
+
+    def flush_text(self, pending: str, buffer: str, start: int, end: int) -> None:
+        if pending:
+            self.add_text(pending + buffer[start:end])
+        elif start < end:
+            # 끊기지 않은 텍스트는 복사하지 않고 buffer의 구간을 그대로 넘긴다.
+            self.add_text(buffer, start, end)
+
+    @staticmethod
+    def safe_end(buffer: str) -> int:
+        # 청크 끝에 걸친 "<!--"나 "</script>"의 앞부분은 다음 청크가 올 때까지 남겨 둔다.
+        tail_start = buffer.rfind("<", max(len(buffer) - 8, 0))
+        if tail_start != -1:
+            tail = buffer[tail_start:]
+            if "<!--".startswith(tail) or "</script>".startswith(tail):
+                return tail_start
+        return len(buffer)
+
+    def create_element(
+        self, tag: str, attributes: Mapping[str, str], parent: Element | None
+    ) -> Element:
+        return Element(tag, attributes, parent)
+
+    def create_text(self, source: str, start: int, end: int, parent: Element) -> Text:
+        return Text.from_source(source, start, end, parent)
+
+    def append_child(self, parent: Element, node: Token) -> None:
+        parent.children.append(node)
 
-    def add_text(self, text: str):
-        if text.isspace():
+    def add_text(self, source: str, start: int = 0, end: int | None = None):
+        if end is None:
+            end = len(source)
+        if NON_SPACE.search(source, start, end) is None:
             return
         self.implicit_tags(None)
         parent = self.unfinished[-1]
-        text = text.replace("&lt;", "<")
-        text = text.replace("&gt;", ">")
-        node = Text(text, parent)
-        parent.children.append(node)
+        node = self.create_text(source, start, end, parent)
+        self.append_child(parent, node)
 
     def add_tag(self, tag: str):
         tag, attributes = self.get_attributes(tag)
         if tag.startswith("!"):
             return
         self.implicit_tags(tag)
+        if self.on_start_tag is not None and not tag.startswith("/"):
+            self.on_start_tag(tag, attributes)
         if tag.startswith("/"):
             # 닫는 태그
             if len(self.unfinished) == 1:
                 return
             node = self.unfinished.pop()
             parent = self.unfinished[-1]
-            parent.children.append(node)
+            self.append_child(parent, node)
+            self.reset_insertion_mode()
         elif tag in SELF_CLOSING_TAGS:
             parent = self.unfinished[-1]
-            node = Element(tag, attributes, parent)
-            parent.children.append(node)
+            node = self.create_element(tag, attributes, parent)
+            self.append_child(parent, node)
         else:
             # 여는 태그
             parent = self.unfinished[-1] if self.unfinished else None
-            node = Element(tag, attributes, parent)
+            node = self.create_element(tag, attributes, parent)
             self.unfinished.append(node)
+            self.reset_insertion_mode()
 
     def finish(self):
         if not self.unfinished:
@@ -157,13 +365,16 @@ class HTMLParser:
         while len(self.unfinished) > 1:
             node = self.unfinished.pop()
             parent = self.unfinished[-1]
-            parent.children.append(node)
+            self.append_child(parent, node)
         return self.unfinished.pop()
 
-    def get_attributes(self, text: str):
+    def get_attributes(self, text: str) -> tuple[str, Mapping[str, str]]:
         parts_list = text.split(maxsplit=1)
-        tag = parts_list[0].casefold()
-        parts = parts_list[1] if len(parts_list) > 1 else ""
+        # 같은 태그/속성 이름이 노드마다 별도 문자열로 남지 않도록 intern 한다.
+        tag = sys.intern(parts_list[0].casefold())
+        if len(parts_list) == 1:
+            return tag, NO_ATTRIBUTES
+        parts = parts_list[1]
         attributes: dict[str, str] = {}
 
         key = ""
@@ -176,7 +387,7 @@ class HTMLParser:
                 if key:
                     if key.endswith("="):
                         key = key.rstrip("=")
-                    attributes[key.casefold()] = value
+                    attributes[sys.intern(key.casefold())] = value
                 key = ""
                 value = ""
                 quote_char = ""
@@ -190,7 +401,7 @@ class HTMLParser:
                     value += c
                 else:
                     if c == " " and not key.endswith("="):
-                        attributes[key.casefold()] = ""
+                        attributes[sys.intern(key.casefold())] = ""
                         key = ""
                         value = ""
                     elif c == " " and not key:
@@ -201,35 +412,43 @@ class HTMLParser:
         if key:
             if key.endswith("="):
                 key = key.rstrip("=")
-            attributes[key.casefold()] = value
+            attributes[sys.intern(key.casefold())] = value
         return tag, attributes
 
+    def reset_insertion_mode(self) -> None:
+        # 열린 요소 스택의 깊이와 두 번째 요소만 보면 되므로 상수 시간에 끝난다.
+        depth = len(self.unfinished)
+        if depth == 0:
+            self.insertion_mode = "initial"
+        elif depth == 1:
+            self.insertion_mode = "before head"
+        elif depth == 2 and self.unfinished[1].tag == "head":
+            self.insertion_mode = "in head"
+        else:
+            self.insertion_mode = "in body"
+
     def implicit_tags(self, tag):
         while True:
-            open_tags = [node.tag for node in self.unfinished]
+            mode = self.insertion_mode
 
-            if open_tags == [] and tag != "html":
+            if mode == "initial":
+                if tag == "html":
+                    break
                 self.add_tag("html")
-            elif open_tags == ["html"] and tag not in ["head", "body", "/html"]:
+            elif mode == "before head":
+                if tag in ["head", "body", "/html"]:
+                    break
                 if tag in self.HEAD_TAGS:
                     self.add_tag("head")
                 else:
                     self.add_tag("body")
-            elif (
-                open_tags == ["html", "head"] and tag not in ["/head"] + self.HEAD_TAGS
-            ):
+            elif mode == "in head":
+                if tag == "/head" or tag in self.HEAD_TAGS:
+                    break
                 self.add_tag("/head")
-            elif (
-                tag == "p"
-                and len(self.unfinished) > 0
-                and self.unfinished[-1].tag == "p"
-            ):
+            elif tag == "p" and self.unfinished[-1].tag == "p":
                 self.add_tag("/p")
-            elif (
-                tag == "li"
-                and len(self.unfinished) > 0
-                and self.unfinished[-1].tag == "li"
-            ):
+            elif tag == "li" and self.unfinished[-1].tag == "li":
                 self.add_tag("/li")
             else:
                 break
@@ -238,78 +457,108 @@ class HTMLParser:
 class ViewSourceHTMLParser(HTMLParser):
     """
     A specialized HTML parser for the view-source protocol.
-    It generates syntax-highlighted HTML where tags are in normal font
-    and text content is in bold, wrapped in <pre> tags.
+    It puts the source text as-is into a <pre> element without parsing
+    any of its markup, so the source is shown instead of rendered.
+
+    The source is cut at line ends into <div> blocks of about
+    SOURCE_BLOCK_SIZE characters, and each block is emitted as soon as it
+    is full, so only the unfinished block is buffered. Lines longer than a
+    block are cut at their last space. If on_block is set, finished blocks
+    go to it instead of the tree (see soyorin.view_source).
     """
 
-    def __init__(self, body: str):
+    def __init__(self, body: str = ""):
         super().__init__(body)
+        self.root = Element("html", NO_ATTRIBUTES, None)
+        page = Element("body", NO_ATTRIBUTES, self.root)
+        self.root.children.append(page)
+        self.pre = Element("pre", NO_ATTRIBUTES, page)
+        page.children.append(self.pre)
+        # 아직 줄바꿈이 오지 않은 조각들. 이어 붙이는 것은 줄이 끝났을 때 한 번만 한다.
+        self.pending: list[str] = []
+        self.pending_size = 0
+        # 채우는 중인 블록의 원문 조각들 (source, start, end). 필요할 때만 잘라 낸다.
+        self.block: list[tuple[str, int, int]] = []
+        self.block_size = 0
+        # 다 찬 블록의 원문을 받는 훅. 주면 블록을 트리에 넣지 않는다.
+        self.on_block: Callable[[str], None] | None = None
+
+    def feed(self, chunk: str) -> None:
+        # 새 조각에서만 줄 끝을 찾는다. \r\n의 \r 뒤에서 잘려도 \n은 공백일 뿐이다.
+        cut = max(chunk.rfind("\n"), chunk.rfind("\r")) + 1
+        if cut == 0:
+            self.pending.append(chunk)
+            self.pending_size += len(chunk)
+            if self.pending_size >= SOURCE_BLOCK_SIZE:
+                # 줄바꿈 없이 긴 원문(압축한 스크립트 등)도 블록 하나만큼 모이면 내보낸다.
+                text = "".join(self.pending)
+                cut = long_line_cut(text)
+                self.add_source(text[:cut])
+                self.pending = [text[cut:]]
+                self.pending_size = len(text) - cut
+            return
+        self.pending.append(chunk[:cut])
+        self.add_source("".join(self.pending))
+        self.pending = [chunk[cut:]] if cut < len(chunk) else []
+        self.pending_size = len(chunk) - cut
+
+    def close(self):
+        self.pending.append(self.buffer)
+        self.buffer = ""
+        self.add_source("".join(self.pending))
+        self.pending = []
+        self.pending_size = 0
+        if self.block:
+            self.end_block()
+        return self.root
+
+    def add_source(self, source: str) -> None:
+        """source를 줄 경계에서 나눠 블록들에 채운다."""
+        start = 0
+        while start < len(source):
+            # 블록을 채우는 데 모자란 만큼 넘긴 뒤의 첫 줄 끝에서 자른다.
+            end = source.find("\n", start + SOURCE_BLOCK_SIZE - self.block_size) + 1
+            if end == 0:
+                end = len(source)
+            self.block.append((source, start, end))
+            self.block_size += end - start
+            if self.block_size >= SOURCE_BLOCK_SIZE:
+                self.end_block()
+            start = end
+
+    def end_block(self) -> None:
+        spans = self.block
+        self.block = []
+        self.block_size = 0
+        if self.on_block is not None:
+            self.on_block("".join([source[start:end] for source, start, end in spans]))
+            return
+        block = Element("div", NO_ATTRIBUTES, self.pre)
+        for source, start, end in spans:
+            if NON_SPACE.search(source, start, end) is not None:
+                block.children.append(Text.from_source(source, start, end, block))
+        self.pre.children.append(block)
 
-    def parse(self):
-        highlighted_html = "<pre>"
-        text = ""
-        in_tag = False
-        quote_char: Literal["'"] | Literal['"'] | Literal[""] = ""
-        idx = 0
-
-        while idx < len(self.body):
-            c = self.body[idx]
-
-            if c == "<" and quote_char == "":
-                # Close bold tag if we have open text
-                if text != "":
-                    text = ""
-
-                in_tag = True
-                highlighted_html += "&lt;"
-                idx += 1
-                continue
-            elif c == ">" and quote_char == "" and in_tag:
-                in_tag = False
-                quote_char = ""
-                highlighted_html += "&gt;"
-                idx += 1
-                continue
-
-            if in_tag:
-                if quote_char == "" and (c == '"' or c == "'"):
-                    quote_char = c
-                elif quote_char == c:
-                    quote_char = ""
-                highlighted_html += c
-            else:
-                if c == "<":
-                    highlighted_html += "&lt;"
-                elif c == ">":
-                    highlighted_html += "&gt;"
-                else:
-                    # Start bold tag for non-whitespace text
-                    if text == "" and c not in [" ", "\n", "\t", "\r"]:
-                        text += c
-                        highlighted_html += c
-                    # Close bold tag when we hit whitespace
-                    elif text != "" and c in [" ", "\n", "\t", "\r"]:
-                        highlighted_html += c
-                        text = ""
-                    # Continue with text or whitespace
-                    elif text != "":
-                        text += c
-                        highlighted_html += c
-                    else:
-                        # Just whitespace outside of text
-                        highlighted_html += c
 
-            idx += 1
+def fill_source_block(block: Element, source: str) -> None:
+    """view-source의 <div> 블록에 원문을 넣는다. 글자는 처음 읽을 때 만든다."""
+    if NON_SPACE.search(source) is not None:
+        block.children.append(Text.from_source(source, 0, len(source), block))
 
-        if text != "":
-            highlighted_html += "</b>"
 
-        highlighted_html += "</pre>"
-        parser = HTMLParser(highlighted_html)
-        return parser.parse()
+def long_line_cut(text: str) -> int:
+    """
+    줄바꿈이 없는 text를 자를 곳. 마지막 공백 뒤에서 자르고, 공백이 없으면
+    끝에서 자르되 &lt; 같은 엔티티가 두 텍스트 노드로 나뉘지 않게 한다.
+    """
+    cut = max(text.rfind(" "), text.rfind("\t")) + 1
+    if cut > 0:
+        return cut
+    cut = len(text)
+    entity = text.rfind("&", max(cut - 3, 0))
+    return entity if entity != -1 else cut
 
 
 def print_tree(node: Token, indent=0):
-    print(" " * indent, node)
-    for child in node.children:
-        print_tree(child, indent + 2)
+    for child, depth in preorder_with_depth(node):
+        print(" " * (indent + 2 * depth), child)
@@ -0,0 +1,62 @@
+"""
+파싱과 동시에 스타일시트를 미리 받아 오는 preload scanner
+
+HTMLParser.on_start_tag에 연결해 두면 토크나이저가 <link rel=stylesheet>를
+읽는 즉시 백그라운드 스레드에서 요청을 시작한다. 본문이 다 도착하고 트리가
+완성될 무렵에는 대부분의 스타일시트가 이미 받아져 있으므로, 스타일시트마다
+한 번씩 왕복을 기다리던 직렬 구간이 사라진다.
+"""
+
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from typing import Mapping
+from typing import Optional
+
+from soyorin.cache import Cache
+from soyorin.connection import Connection
+from soyorin.stylesheets import Stylesheet
+from soyorin.stylesheets import parse_stylesheet
+from soyorin.url import URL
+
+MAX_PRELOADS = 6
+
+
+class PreloadScanner:
+    def __init__(self, base_url: URL, cache: Optional[Cache] = None):
+        self.base_url = base_url
+        self.cache = cache
+        self.executor = ThreadPoolExecutor(
+            max_workers=MAX_PRELOADS, thread_name_prefix="preload"
+        )
+        # 문서에 나온 순서대로 쌓아 두어야 cascade 순서가 바뀌지 않는다.
+        self.fetches: list[Future[Stylesheet]] = []
+
+    def scan(self, tag: str, attributes: Mapping[str, str]) -> None:
+        """HTMLParser.on_start_tag 훅"""
+        if tag != "link" or attributes.get("rel") != "stylesheet":
+            return
+        if "href" not in attributes:
+            return
+        try:
+            url = self.base_url.resolve(attributes["href"])
+        except ValueError:
+            return
+        self.fetches.append(self.executor.submit(self.fetch, url))
+
+    def fetch(self, url: URL) -> Stylesheet:
+        # Connection은 요청 중인 소켓을 인스턴스에 들고 있으므로 스레드마다 따로 만든다.
+        connection = Connection(http_options={"http_version": "1.1"}, cache=self.cache)
+        return parse_stylesheet(connection.request(url=url))
+
+    def stylesheets(self) -> list[Stylesheet]:
+        """받아 온 스타일시트를 문서 순서대로 모은다. 실패한 것은 건너뛴다."""
+        stylesheets: list[Stylesheet] = []
+        for fetch in self.fetches:
+            try:
+                stylesheets.append(fetch.result())
+            except Exception:
+                continue
+        return stylesheets
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,51 @@
+"""
+성능 계측용 카운터 모음
+
+모듈마다 필요한 카운터를 counter("이름")으로 만들어 두고 뜨거운 경로에서
+`.value += 1` 만 한다. 벤치마크나 디버깅 때 snapshot()으로 한꺼번에 읽는다.
+
+functools.lru_cache처럼 스스로 통계를 세는 것은 register_source로 읽는 함수만
+등록해 둔다. 이런 값은 reset()으로 지워지지 않는다.
+"""
+
+from typing import Callable
+from typing import Mapping
+
+COUNTERS: dict[str, "Counter"] = {}
+SOURCES: dict[str, Callable[[], Mapping[str, int]]] = {}
+
+
+class Counter:
+    __slots__ = ("name", "value")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.value = 0
+
+    def __repr__(self) -> str:
+        return f"<Counter {self.name}={self.value}>"
+
+
+def counter(name: str) -> Counter:
+    """name인 카운터를 돌려준다. 없으면 새로 등록한다."""
+    if name not in COUNTERS:
+        COUNTERS[name] = Counter(name)
+    return COUNTERS[name]
+
+
+def register_source(prefix: str, source: Callable[[], Mapping[str, int]]) -> None:
+    """snapshot() 때 source()의 값들을 "prefix.이름"으로 함께 보고한다."""
+    SOURCES[prefix] = source
+
+
+def snapshot() -> dict[str, int]:
+    values = {name: counter.value for name, counter in COUNTERS.items()}
+    for prefix, source in SOURCES.items():
+        for name, value in source().items():
+            values[f"{prefix}.{name}"] = value
+    return dict(sorted(values.items()))
+
+
+def reset() -> None:
+    for counter in COUNTERS.values():
+        counter.value = 0
@@ -1,14 +1,31 @@
+from array import array
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Callable
+from typing import Hashable
+from typing import Mapping
+from typing import Sequence
+import zlib
+
+from soyorin.computed_style import ROOT_STYLE
+from soyorin.computed_style import ComputedStyle
 from soyorin.lexer import Element, Token
+from soyorin.lexer import tag_id
+from soyorin.stats import counter
+from soyorin.stats import register_source
+from soyorin.traversal import walk
 
 type Selector = TagSelector | DescendantSelector
 type Rule = tuple[Selector, dict[str, str]]
 
-INHERITED_PROPERTIES = {
-    "font-size": "16px",
-    "font-style": "normal",
-    "font-weight": "normal",
-    "color": "black",
-}
+ANCESTOR_REJECTS = counter("style.ancestor_filter.rejects")
+ANCESTOR_WALKS = counter("style.ancestor_filter.walks")
+ANCESTOR_FALSE_POSITIVES = counter("style.ancestor_filter.false_positives")
+SHARE_HITS = counter("style.share.hits")
+SHARE_MISSES = counter("style.share.misses")
+RESTYLED = counter("style.restyle.nodes")
+
+INLINE_STYLE_CACHE_SIZE = 1024
 
 
 class CSSParser:
@@ -104,63 +121,338 @@ class CSSParser:
         return rules
 
 
-def style(node: Token, rules: list[Rule]) -> None:
-    node.style = {}
-    for property, default_value in INHERITED_PROPERTIES.items():
-        if node.parent:
-            node.style[property] = node.parent.style[property]
+class RuleIndex:
+    """
+    규칙을 가장 오른쪽 선택자의 태그로 묶어 둔 색인
+    노드마다 모든 규칙을 검사하는 대신 그 태그로 끝나는 규칙만 검사한다.
+    각 묶음 안의 순서는 원래 규칙 목록(cascade 순서)을 그대로 따른다.
+    """
+
+    def __init__(self, rules: list[Rule]) -> None:
+        self.rules = rules
+        self.by_tag: dict[str, list[Rule]] = {}
+        self.tag_orders: dict[str, list[int]] = {}
+        # 태그로 묶을 수 없는 규칙 (예: 나중에 추가될 *, .class, #id)
+        self.universal: list[tuple[int, Rule]] = []
+        for order, rule in enumerate(rules):
+            tag = rightmost_tag(rule[0])
+            if tag is None:
+                self.universal.append((order, rule))
+            else:
+                self.by_tag.setdefault(tag, []).append(rule)
+                self.tag_orders.setdefault(tag, []).append(order)
+
+    def candidates(self, node: Token) -> Sequence[Rule]:
+        """node에 맞을 수 있는 규칙을 cascade 순서대로 돌려준다."""
+        if not isinstance(node, Element):
+            return [rule for _, rule in self.universal]
+        rules = self.by_tag.get(node.tag, ())
+        if not self.universal:
+            return rules
+        merged = list(zip(self.tag_orders.get(node.tag, ()), rules)) + self.universal
+        merged.sort(key=lambda item: item[0])
+        return [rule for _, rule in merged]
+
+
+def rightmost_tag(selector: Selector) -> str | None:
+    if isinstance(selector, DescendantSelector):
+        selector = selector.selectors[-1]
+    return selector.tag
+
+
+class AncestorFilter:
+    """
+    지금 보고 있는 노드의 조상 태그들을 담는 counting Bloom filter
+    "조상 중에 이 태그가 있을 수도 있다"는 것만 알려주므로, 없다고 하면 확실히
+    없는 것이고 있다고 하면 실제로 조상을 거슬러 올라가 확인해야 한다.
+    트리를 내려갈 때 push, 올라올 때 pop 한다.
+    """
+
+    BITS = 12
+    MASK = (1 << BITS) - 1
+    # 프로세스마다 달라지는 hash() 대신 crc32를 써서 slot이 항상 같게 한다.
+    SLOTS: dict[str, tuple[int, int]] = {}
+
+    def __init__(self) -> None:
+        self.counts = array("I", bytes(4 << self.BITS))
+
+    @classmethod
+    def slots(cls, key: str) -> tuple[int, int]:
+        if key not in cls.SLOTS:
+            h = zlib.crc32(key.encode())
+            cls.SLOTS[key] = (h & cls.MASK, (h >> cls.BITS) & cls.MASK)
+        return cls.SLOTS[key]
+
+    def push(self, key: str) -> None:
+        a, b = self.slots(key)
+        self.counts[a] += 1
+        self.counts[b] += 1
+
+    def pop(self, key: str) -> None:
+        a, b = self.slots(key)
+        self.counts[a] -= 1
+        self.counts[b] -= 1
+
+    def may_contain_all(self, slots: list[tuple[int, int]]) -> bool:
+        counts = self.counts
+        for a, b in slots:
+            if not (counts[a] and counts[b]):
+                return False
+        return True
+
+
+def style(tree: Token, rules: list[Rule] | RuleIndex) -> None:
+    if not isinstance(rules, RuleIndex):
+        rules = RuleIndex(rules)
+    ancestors = AncestorFilter()
+    # 스타일 공유 캐시: share_key가 같은 노드는 계산 결과도 같으므로 앞서 계산한
+    # 스타일을 그대로 쓴다. 키에는 부모의 공유 번호(share class)가 들어가는데,
+    # 공유 번호가 같다는 것은 조상들의 태그와 속성이 모두 같다는 뜻이므로
+    # 자손 선택자의 결과도 같다.
+    shared: dict[Hashable, tuple[ComputedStyle, int]] = {}
+    # 지금 보고 있는 노드의 조상들의 공유 번호
+    share_classes: list[int] = []
+
+    # 부모의 스타일이 먼저 정해져야 상속할 수 있으므로 전위 순서로 계산하고,
+    # 자식으로 내려가기 전에 자기 태그를 조상 필터에 넣는다.
+    def enter(node: Token) -> None:
+        key = share_key(node, share_classes[-1] if share_classes else -1)
+        cached = shared.get(key)
+        if cached is not None:
+            SHARE_HITS.value += 1
+            node.style, share_class = cached
+        else:
+            SHARE_MISSES.value += 1
+            style_node(node, rules, ancestors)
+            share_class = len(shared)
+            shared[key] = (node.style, share_class)
+        if isinstance(node, Element):
+            ancestors.push(node.tag)
+            share_classes.append(share_class)
+
+    def leave(node: Token) -> None:
+        if isinstance(node, Element):
+            ancestors.pop(node.tag)
+            share_classes.pop()
+
+    walk(tree, enter, leave)
+
+
+def restyle(tree: Token, rules: list[Rule] | RuleIndex) -> None:
+    """
+    style()로 한 번 계산한 트리에서 dirty로 표시된 노드만 다시 계산한다.
+    child_style_dirty인 노드를 따라 내려가 style_dirty인 노드를 계산하고,
+    스타일이 바뀐 노드의 자식들도 다시 계산한다. 스타일은 intern 되어 있으므로
+    `is`로 비교해서 바뀌지 않았으면 그 아래로는 내려가지 않는다.
+    """
+    if not isinstance(rules, RuleIndex):
+        rules = RuleIndex(rules)
+    ancestors = AncestorFilter()
+    # (노드, 부모의 스타일이 이번에 바뀌었는지). 노드 자리의 None은 조상 하나를
+    # 빠져나간다는 표시다. 깨끗한 형제가 많아도 건드리지 않도록 walk 대신 직접
+    # 스택을 관리한다.
+    stack: list[tuple[Token | None, bool]] = [(tree, False)]
+    exits: list[str] = []
+    while stack:
+        node, parent_changed = stack.pop()
+        if node is None:
+            ancestors.pop(exits.pop())
+            continue
+        changed = False
+        if parent_changed or node.style_dirty:
+            RESTYLED.value += 1
+            old_style = node.style
+            style_node(node, rules, ancestors)
+            changed = node.style is not old_style
+        if not isinstance(node, Element):
+            continue
+        if changed:
+            children = node.children
+        elif node.child_style_dirty:
+            children = node.style_dirty_children()
         else:
-            node.style[property] = default_value
+            children = ()
+        if node.style_dirty:
+            node.style_dirty = False
+        if node.child_style_dirty:
+            node.child_style_dirty = False
+        if children:
+            ancestors.push(node.tag)
+            exits.append(node.tag)
+            stack.append((None, False))
+            stack.extend((child, changed) for child in reversed(children))
+
+
+def share_key(node: Token, parent_class: int) -> Hashable:
+    """스타일이 같을 수밖에 없는 노드끼리 같은 키를 갖는다."""
+    if isinstance(node, Element):
+        attributes = node.attributes
+        return node.tag, tuple(attributes.items()) if attributes else (), parent_class
+    return parent_class
+
+
+@lru_cache(maxsize=INLINE_STYLE_CACHE_SIZE)
+def parse_inline_style(text: str) -> Mapping[str, str]:
+    """
+    style 속성 값을 파싱한다. 생성된 페이지는 같은 인라인 스타일을 수없이
+    반복하므로, 문서와 탭에 상관없이 원문 문자열을 키로 결과를 기억한다.
+    결과는 여러 노드가 함께 쓰므로 읽기 전용이다.
+    """
+    return MappingProxyType(CSSParser(text).body())
+
+
+def inline_style_cache_stats() -> dict[str, int]:
+    info = parse_inline_style.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize}
+
+
+register_source("style.inline_cache", inline_style_cache_stats)
+
+
+def style_node(
+    node: Token, index: RuleIndex, ancestors: AncestorFilter | None = None
+) -> None:
+    parent = node.parent
+    inherited = parent.style.inherited if parent else ROOT_STYLE
+    # 부모에게서 물려받은 것과 달라지는 속성만 모은다.
+    overrides: dict[str, str] = {}
     if isinstance(node, Element) and "style" in node.attributes:
-        pairs = CSSParser(node.attributes["style"]).body()
-        for property, value in pairs.items():
-            node.style[property] = value
-    for selector, body in rules:
-        if not selector.matches(node):
+        overrides.update(parse_inline_style(node.attributes["style"]))
+    for selector, body in index.candidates(node):
+        # 같은 태그 묶음에 있으므로 단순 태그 선택자는 다시 검사할 필요가 없다.
+        if type(selector) is not TagSelector and not selector_matches(
+            selector, node, ancestors
+        ):
             continue
-        for property, value in body.items():
-            node.style[property] = value
+        overrides.update(body)
 
-    if node.style["font-size"].endswith("%"):
-        if node.parent:
-            parent_font_size = node.parent.style["font-size"]
-        else:
-            parent_font_size = INHERITED_PROPERTIES["font-size"]
-        node_pct = float(node.style["font-size"][:-1]) / 100
-        parent_px = float(parent_font_size[:-2])
-        node.style["font-size"] = str(node_pct * parent_px) + "px"
-    for child in node.children:
-        style(child, rules)
+    font_size = overrides.get("font-size")
+    if font_size is not None and font_size.endswith("%"):
+        node_pct = float(font_size[:-1]) / 100
+        overrides["font-size"] = str(node_pct * inherited.font_size) + "px"
+    node.style = inherited.derive(overrides)
 
 
 class TagSelector:
+    """
+    태그 하나를 고르는 선택자
+    matcher는 태그 번호(tag_id) 정수 하나만 비교하는 함수로 미리 만들어 둔다.
+    텍스트 노드의 태그 번호는 어떤 태그와도 같지 않으므로 따로 검사하지 않는다.
+    """
+
     def __init__(self, tag: str) -> None:
         self.tag = tag
         self.priority = 1
+        self.tag_id = tag_id(tag)
+        self.matcher = compile_tag_matcher(self.tag_id)
 
     def matches(self, node: Token) -> bool:
-        return isinstance(node, Element) and self.tag == node.tag
+        return self.matcher(node)
 
 
 class DescendantSelector:
     def __init__(self, selectors: list[TagSelector]) -> None:
         self.selectors = selectors
+        # 조상 쪽 선택자들의 AncestorFilter slot (빠른 거절용)
+        self.ancestor_slots = [
+            AncestorFilter.slots(selector.tag) for selector in self.selectors[:-1]
+        ]
+        self.matcher = compile_descendant_matcher(
+            [selector.tag_id for selector in self.selectors]
+        )
 
     @property
     def priority(self) -> int:
         return sum(selector.priority for selector in self.selectors)
 
     def matches(self, node: Token) -> bool:
-        if not self.selectors[-1].matches(node):
+        return self.matcher(node)
+
+
+type Matcher = Callable[[Token], bool]
+
+
+def compile_tag_matcher(wanted: int) -> Matcher:
+    def matcher(node: Token) -> bool:
+        return node.tag_id == wanted
+
+    return matcher
+
+
+def compile_descendant_matcher(tag_ids: list[int]) -> Matcher:
+    """
+    "a b c" 같은 자손 선택자를 tag_ids = [a, b, c]로 받아 검사 함수를 만든다.
+    대부분의 규칙은 조상 쪽 선택자가 한두 개이므로 그 경우는 조상을 거슬러
+    올라가는 반복문을 풀어서 만들고, 나머지는 일반 반복문을 쓴다.
+    가장 가까운 조상부터 탐욕적으로 맞춰 나가므로 예전 matches와 결과가 같다.
+    """
+    *ancestor_ids, last = tag_ids
+    if len(ancestor_ids) == 1:
+        (outer,) = ancestor_ids
+
+        def matcher(node: Token) -> bool:
+            if node.tag_id != last:
+                return False
+            ancestor = node.parent
+            while ancestor is not None:
+                if ancestor.tag_id == outer:
+                    return True
+                ancestor = ancestor.parent
+            return False
+
+    elif len(ancestor_ids) == 2:
+        outer, inner = ancestor_ids
+
+        def matcher(node: Token) -> bool:
+            if node.tag_id != last:
+                return False
+            ancestor = node.parent
+            while ancestor is not None:
+                if ancestor.tag_id == inner:
+                    break
+                ancestor = ancestor.parent
+            else:
+                return False
+            ancestor = ancestor.parent
+            while ancestor is not None:
+                if ancestor.tag_id == outer:
+                    return True
+                ancestor = ancestor.parent
+            return False
+
+    else:
+        remaining = ancestor_ids[::-1]
+        count = len(remaining)
+
+        def matcher(node: Token) -> bool:
+            if node.tag_id != last:
+                return False
+            i = 0
+            ancestor = node.parent
+            while ancestor is not None:
+                if ancestor.tag_id == remaining[i]:
+                    i += 1
+                    if i == count:
+                        return True
+                ancestor = ancestor.parent
             return False
 
-        selector_idx = len(self.selectors) - 2
-        while node.parent and selector_idx >= 0:
-            node = node.parent
-            if self.selectors[selector_idx].matches(node):
-                selector_idx -= 1
+    return matcher
 
-        return selector_idx < 0
+
+def selector_matches(
+    selector: Selector, node: Token, ancestors: AncestorFilter | None
+) -> bool:
+    if isinstance(selector, DescendantSelector) and ancestors is not None:
+        if not ancestors.may_contain_all(selector.ancestor_slots):
+            ANCESTOR_REJECTS.value += 1
+            return False
+        ANCESTOR_WALKS.value += 1
+        if not selector.matcher(node):
+            ANCESTOR_FALSE_POSITIVES.value += 1
+            return False
+        return True
+    return selector.matcher(node)
 
 
 def cascade_priority(rule: Rule) -> int:
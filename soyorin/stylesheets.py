@@ -0,0 +1,117 @@
+"""
+프로세스 전체가 함께 쓰는 스타일시트 캐시
+
+같은 사이트의 페이지들은 대개 같은 스타일시트를 쓰므로, 파싱해서 cascade
+순서로 정렬한 규칙을 내용의 해시로 기억해 둔다. 여러 스타일시트를 합친
+결과(RuleIndex)도 스타일시트 조합마다 기억해 두어서, 같은 사이트의 탭을 새로
+열면 CSS 파싱/정렬/색인을 전혀 하지 않는다.
+
+기본(user-agent) 스타일시트는 패키지에 들어 있는 browser.css를 처음 필요할 때
+읽어 파싱하고, 프로세스가 끝날 때까지 그대로 쓴다.
+"""
+
+import functools
+import hashlib
+import heapq
+import threading
+from collections import OrderedDict
+from importlib import resources
+from typing import NamedTuple
+from typing import Sequence
+
+from soyorin.stats import counter
+from soyorin.style import CSSParser
+from soyorin.style import Rule
+from soyorin.style import RuleIndex
+from soyorin.style import cascade_priority
+
+MAX_STYLESHEETS = 64
+MAX_CASCADES = 32
+
+# soyorin 패키지 안의 파일 이름. 설치된 패키지에도 package data로 들어간다.
+DEFAULT_STYLESHEET = "browser.css"
+
+PARSE_HITS = counter("stylesheets.parse.hits")
+PARSE_MISSES = counter("stylesheets.parse.misses")
+CASCADE_HITS = counter("stylesheets.cascade.hits")
+CASCADE_MISSES = counter("stylesheets.cascade.misses")
+
+
+class Stylesheet(NamedTuple):
+    key: bytes  # 내용의 sha256
+    rules: tuple[Rule, ...]  # cascade_priority 순으로 (안정) 정렬되어 있다
+
+
+class LRUCache[K, V]:
+    """스레드 사이에서 함께 써도 되는 작은 LRU"""
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self.entries: OrderedDict[K, V] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: K) -> V | None:
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+            return value
+
+    def put(self, key: K, value: V) -> None:
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+
+STYLESHEETS: LRUCache[bytes, Stylesheet] = LRUCache(MAX_STYLESHEETS)
+CASCADES: LRUCache[tuple[bytes, ...], RuleIndex] = LRUCache(MAX_CASCADES)
+
+
+def parse_stylesheet(text: str) -> Stylesheet:
+    """text를 파싱해 정렬한 스타일시트. 같은 내용이면 앞서 파싱한 결과를 준다."""
+    key = hashlib.sha256(text.encode()).digest()
+    stylesheet = STYLESHEETS.get(key)
+    if stylesheet is not None:
+        PARSE_HITS.value += 1
+        return stylesheet
+    PARSE_MISSES.value += 1
+    rules = tuple(sorted(CSSParser(text).parse(), key=cascade_priority))
+    stylesheet = Stylesheet(key, rules)
+    STYLESHEETS.put(key, stylesheet)
+    return stylesheet
+
+
+@functools.cache
+def default_stylesheet() -> Stylesheet:
+    """패키지의 browser.css를 파싱한 기본 스타일시트. 처음 부를 때 한 번만 읽는다."""
+    source = resources.files("soyorin").joinpath(DEFAULT_STYLESHEET)
+    return parse_stylesheet(source.read_text(encoding="utf-8"))
+
+
+def cascade(stylesheets: Sequence[Stylesheet]) -> RuleIndex:
+    """
+    스타일시트들을 문서 순서대로 합쳐 색인한다.
+    각 스타일시트가 이미 정렬되어 있으므로 다시 정렬하지 않고 병합한다.
+    heapq.merge는 우선순위가 같으면 앞의 스타일시트 규칙을 먼저 내놓으므로,
+    전부 이어 붙여 안정 정렬한 것과 순서가 같다.
+    """
+    key = tuple(stylesheet.key for stylesheet in stylesheets)
+    index = CASCADES.get(key)
+    if index is not None:
+        CASCADE_HITS.value += 1
+        return index
+    CASCADE_MISSES.value += 1
+    rules = list(
+        heapq.merge(
+            *(stylesheet.rules for stylesheet in stylesheets), key=cascade_priority
+        )
+    )
+    index = RuleIndex(rules)
+    CASCADES.put(key, index)
+    return index
@@ -0,0 +1,68 @@
+"""
+DOM 트리와 레이아웃 트리가 함께 쓰는 반복(iterative) 순회
+
+children 속성만 있으면 어떤 트리든 순회할 수 있다. 파이썬 재귀 대신 명시적인
+스택을 쓰므로 문서가 아무리 깊어도 RecursionError가 나지 않는다.
+"""
+
+from typing import Any
+from typing import Callable
+from typing import Iterator
+from typing import Protocol
+from typing import Sequence
+
+
+class HasChildren(Protocol):
+    @property
+    def children(self) -> Sequence[Any]: ...
+
+
+def preorder[T: HasChildren](root: T) -> Iterator[T]:
+    """root부터 전위 순서로 노드를 돌려준다.
+
+    자식 목록은 부모를 돌려준 뒤에 읽으므로, 호출한 쪽이 그 사이에 부모를
+    처리(예: 스타일 계산)해 두면 자식에서 그 결과를 쓸 수 있다.
+    """
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        yield node
+        children = node.children
+        if children:
+            stack.extend(reversed(children))
+
+
+def preorder_with_depth[T: HasChildren](root: T) -> Iterator[tuple[T, int]]:
+    """preorder와 같되 root로부터의 깊이를 함께 돌려준다."""
+    stack = [(root, 0)]
+    while stack:
+        node, depth = stack.pop()
+        yield node, depth
+        children = node.children
+        if children:
+            stack.extend((child, depth + 1) for child in reversed(children))
+
+
+def walk[T: HasChildren](
+    root: T,
+    enter: Callable[[T], bool | None],
+    leave: Callable[[T], None] | None = None,
+) -> None:
+    """
+    전위 순서로 enter를, 자식을 모두 마친 뒤(후위 순서로) leave를 부른다.
+    enter가 False를 돌려주면 그 노드의 자식은 건너뛴다. 자식 목록은 enter가
+    끝난 뒤에 읽으므로 enter 안에서 자식을 만들어도 된다.
+    """
+    # (node, True)는 "자식을 모두 마쳤으니 leave를 부를 차례"라는 표시
+    stack: list[tuple[T, bool]] = [(root, False)]
+    while stack:
+        node, finished = stack.pop()
+        if finished:
+            assert leave is not None
+            leave(node)
+            continue
+        descend = enter(node)
+        if leave is not None:
+            stack.append((node, True))
+        if descend is not False and node.children:
+            stack.extend((child, False) for child in reversed(node.children))
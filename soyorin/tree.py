@@ -1,5 +1,22 @@
+from soyorin.arena import ArenaElement
+from soyorin.lexer import Element, Token
+from soyorin.traversal import preorder
+
+
 def tree_to_list(tree, list):
-    list.append(tree)
-    for child in tree.children:
-        tree_to_list(child, list)
+    if isinstance(tree, ArenaElement):
+        # arena에서는 서브트리가 연속된 번호 구간이므로 재귀할 필요가 없다.
+        return tree.arena.subtree_to_list(tree.index, list)
+    list.extend(preorder(tree))
     return list
+
+
+def find_elements(tree: Token, tag: str) -> list[Element]:
+    """tree 안에서 tag인 요소를 문서 순서대로 모은다."""
+    if isinstance(tree, ArenaElement):
+        return tree.arena.find_tag(tree.index, tag)
+    return [
+        node
+        for node in tree_to_list(tree, [])
+        if isinstance(node, Element) and node.tag == tag
+    ]
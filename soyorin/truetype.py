@@ -0,0 +1,142 @@
+"""
+TrueType/OpenType(.ttf, .otf, .ttc) 파일에서 headless 글꼴 backend가 쓰는 치수를 읽는다
+
+글자 폭은 글꼴 단위(font unit) 그대로 읽고, 픽셀로 바꾸는 것은
+soyorin.headless_font가 글꼴 크기마다 한다. 외부 라이브러리 없이 head, hhea,
+hmtx, cmap 표만 읽는다.
+"""
+
+import struct
+from pathlib import Path
+from typing import NamedTuple
+
+TTC_TAG = b"ttcf"
+# TrueType, OpenType(CFF), 옛 맥 TrueType의 sfnt 버전
+SFNT_VERSIONS = (b"\x00\x01\x00\x00", b"OTTO", b"true")
+REQUIRED_TABLES = ("head", "hhea", "hmtx", "cmap")
+
+
+class FaceTable(NamedTuple):
+    units_per_em: int
+    ascender: int
+    descender: int  # 음수
+    max_advance: int  # hhea.advanceWidthMax
+    # head.flags bit 3이 켜진 TrueType 글꼴: 힌팅할 때 ppem을 정수로 반올림한다.
+    integer_ppem: bool
+    notdef_advance: int  # 글리프 0(.notdef)의 폭
+    # (첫 코드 포인트, 마지막 코드 포인트, 폭) 구간들. 코드 포인트 순으로 정렬되어 있다.
+    advances: tuple[tuple[int, int, int], ...]
+
+
+def read_face(path: Path, index: int = 0) -> FaceTable:
+    """
+    path의 글꼴을 읽는다. 글꼴 모음(.ttc)이면 index번째 글꼴이다.
+    sfnt 글꼴이 아니거나(비트맵 글꼴 등) 필요한 표가 없으면 ValueError를 낸다.
+    """
+    data = path.read_bytes()
+    tables = table_directory(data, index)
+    missing = [tag for tag in REQUIRED_TABLES if tag not in tables]
+    if missing:
+        raise ValueError(f"{path}에 {', '.join(missing)} 표가 없다")
+
+    head = tables["head"]
+    (units_per_em,) = struct.unpack_from(">H", data, head + 18)
+    (flags,) = struct.unpack_from(">H", data, head + 16)
+
+    hhea = tables["hhea"]
+    ascender, descender = struct.unpack_from(">hh", data, hhea + 4)
+    (max_advance,) = struct.unpack_from(">H", data, hhea + 10)
+    (metric_count,) = struct.unpack_from(">H", data, hhea + 34)
+    hmtx = tables["hmtx"]
+    widths = [
+        struct.unpack_from(">H", data, hmtx + 4 * i)[0] for i in range(metric_count)
+    ]
+
+    runs: list[tuple[int, int, int]] = []
+    for codepoint, glyph in sorted(read_cmap(data, tables["cmap"]).items()):
+        # numberOfHMetrics 뒤의 글리프는 마지막 폭을 함께 쓴다.
+        width = widths[min(glyph, metric_count - 1)]
+        if runs and runs[-1][1] == codepoint - 1 and runs[-1][2] == width:
+            runs[-1] = (runs[-1][0], codepoint, width)
+        else:
+            runs.append((codepoint, codepoint, width))
+
+    return FaceTable(
+        units_per_em=units_per_em,
+        ascender=ascender,
+        descender=descender,
+        max_advance=max_advance,
+        # ppem 반올림은 FreeType의 TrueType 드라이버만 한다 (CFF 글꼴은 하지 않는다).
+        integer_ppem=bool(flags & 8) and "glyf" in tables,
+        notdef_advance=widths[0],
+        advances=tuple(runs),
+    )
+
+
+def table_directory(data: bytes, index: int = 0) -> dict[str, int]:
+    start = 0
+    if data[:4] == TTC_TAG:
+        (start,) = struct.unpack_from(">I", data, 12 + 4 * index)
+    if data[start : start + 4] not in SFNT_VERSIONS:
+        return {}
+    (count,) = struct.unpack_from(">H", data, start + 4)
+    tables = {}
+    for i in range(count):
+        tag, _, offset, _ = struct.unpack_from(">4sIII", data, start + 12 + 16 * i)
+        tables[tag.decode("latin-1")] = offset
+    return tables
+
+
+def read_cmap(data: bytes, offset: int) -> dict[int, int]:
+    """유니코드 cmap(format 12가 있으면 12, 없으면 4)을 읽는다."""
+    _, count = struct.unpack_from(">HH", data, offset)
+    subtables: dict[int, int] = {}
+    for i in range(count):
+        platform, encoding, start = struct.unpack_from(
+            ">HHI", data, offset + 4 + 8 * i
+        )
+        if (platform, encoding) in ((3, 1), (3, 10), (0, 3), (0, 4)):
+            table = offset + start
+            subtables[struct.unpack_from(">H", data, table)[0]] = table
+    if 12 in subtables:
+        return read_cmap_format12(data, subtables[12])
+    if 4 in subtables:
+        return read_cmap_format4(data, subtables[4])
+    raise ValueError("유니코드 cmap이 없다")
+
+
+def read_cmap_format4(data: bytes, table: int) -> dict[int, int]:
+    segments = struct.unpack_from(">H", data, table + 6)[0] // 2
+    ends = table + 14
+    starts = ends + 2 * segments + 2
+    deltas = starts + 2 * segments
+    range_offsets = deltas + 2 * segments
+    mapping = {}
+    for i in range(segments):
+        (end,) = struct.unpack_from(">H", data, ends + 2 * i)
+        (start,) = struct.unpack_from(">H", data, starts + 2 * i)
+        (delta,) = struct.unpack_from(">h", data, deltas + 2 * i)
+        (range_offset,) = struct.unpack_from(">H", data, range_offsets + 2 * i)
+        for codepoint in range(start, min(end, 0xFFFE) + 1):
+            if range_offset == 0:
+                glyph = (codepoint + delta) & 0xFFFF
+            else:
+                address = range_offsets + 2 * i + range_offset
+                (glyph,) = struct.unpack_from(
+                    ">H", data, address + 2 * (codepoint - start)
+                )
+                if glyph:
+                    glyph = (glyph + delta) & 0xFFFF
+            if glyph:
+                mapping[codepoint] = glyph
+    return mapping
+
+
+def read_cmap_format12(data: bytes, table: int) -> dict[int, int]:
+    (groups,) = struct.unpack_from(">I", data, table + 12)
+    mapping = {}
+    for i in range(groups):
+        start, end, glyph = struct.unpack_from(">III", data, table + 16 + 12 * i)
+        for codepoint in range(start, end + 1):
+            mapping[codepoint] = glyph + codepoint - start
+    return mapping
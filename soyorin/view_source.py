@@ -0,0 +1,285 @@
+"""
+view-source: 원문을 받는 대로 보여 주는 레이아웃
+
+SourceStream이 백그라운드 스레드에서 본문을 받아 크기가 정해진 큐에 넣으면,
+Browser가 Tk 이벤트 루프에서 after로 SourceLayout.layout_until을 불러 조각을
+꺼내 ViewSourceHTMLParser에 넘긴다. 파서가 줄 경계에서 잘라 낸 <div> 블록은
+도착하는 대로 배치하고 그린다. 그래서 20 MB 원문이라도 첫 블록이 오면 바로 보인다.
+
+블록의 원문은 임시 파일에 적어 두고, 보이는 곳 근처의 블록만 DOM의 텍스트,
+줄, 그리기 명령을 메모리에 둔다. 멀어진 블록은 자리와 높이(BlockLayout)만 남기고
+버렸다가, 다시 보이면 파일에서 읽어 같은 자리에 다시 배치한다. 메모리에 남는 것은
+블록마다 빈 <div>와 BlockLayout 하나, 그리고 화면 몇 개 분량의 블록뿐이다.
+"""
+
+import bisect
+import tempfile
+import threading
+from contextlib import suppress
+from queue import Empty
+from queue import Full
+from queue import Queue
+from typing import Optional
+
+from soyorin.cache import Cache
+from soyorin.connection import Connection
+from soyorin.const import HEIGHT
+from soyorin.const import LAYOUT_MARGIN
+from soyorin.draw import DrawRect
+from soyorin.draw import DrawText
+from soyorin.layout import BlockLayout
+from soyorin.layout import DocumentLayout
+from soyorin.layout import paint_tree
+from soyorin.lexer import NO_ATTRIBUTES
+from soyorin.lexer import Element
+from soyorin.lexer import ViewSourceHTMLParser
+from soyorin.lexer import fill_source_block
+from soyorin.style import RuleIndex
+from soyorin.style import restyle
+from soyorin.style import style
+from soyorin.style import style_node
+from soyorin.url import URL
+
+# 받아 두고 아직 꺼내 가지 않은 본문 조각 수 (조각은 READ_CHUNK_SIZE 글자 이하)
+STREAM_QUEUE_SIZE = 16
+# 큐가 찬 동안 받는 스레드가 그만 받으라는 요청을 확인하는 간격(초)
+STREAM_CLOSE_POLL = 0.1
+
+
+class StreamClosed(Exception):
+    """원문을 받던 탭이 다른 페이지로 넘어갔다."""
+
+
+class SourceStream:
+    """
+    백그라운드 스레드에서 url의 본문을 받아 chunks에 넣는다. 본문이 끝나면
+    (받다가 실패해도) None을 넣는다. 큐가 차면 받기도 멈추므로, 화면이
+    따라오지 못해도 받은 원문이 메모리에 쌓이지 않는다.
+    """
+
+    def __init__(self, url: URL, cache: Optional[Cache] = None) -> None:
+        self.url = url
+        self.cache = cache
+        self.chunks: Queue[str | None] = Queue(maxsize=STREAM_QUEUE_SIZE)
+        self.closed = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="view-source", daemon=True)
+        self.thread.start()
+
+    def run(self) -> None:
+        connection = Connection(http_options={"http_version": "1.1"}, cache=self.cache)
+        try:
+            connection.request(url=self.url, sink=self.put, keep_body=False)
+        except StreamClosed:
+            return
+        finally:
+            # 실패했으면 끝을 알린 뒤 예외는 threading.excepthook이 알린다.
+            with suppress(StreamClosed):
+                self.put(None)
+
+    def put(self, chunk: str | None) -> None:
+        while not self.closed.is_set():
+            try:
+                self.chunks.put(chunk, timeout=STREAM_CLOSE_POLL)
+                return
+            except Full:
+                continue
+        raise StreamClosed
+
+    def close(self) -> None:
+        """그만 받는다. 받는 스레드는 기다리지 않는다."""
+        self.closed.set()
+
+
+class SourceBlock:
+    """원문 블록 하나. 보이는 곳에서 멀면 layout의 자리와 높이만 남긴다."""
+
+    __slots__ = ("offset", "size", "element", "layout", "commands")
+
+    def __init__(
+        self, offset: int, size: int, element: Element, layout: BlockLayout
+    ) -> None:
+        # 임시 파일에서 원문(UTF-8)의 자리
+        self.offset = offset
+        self.size = size
+        self.element = element
+        self.layout = layout
+        # 메모리에 있는 동안의 그리기 명령. 버린 블록은 None
+        self.commands: list[DrawText | DrawRect] | None = None
+
+
+class SourceLayout(DocumentLayout):
+    """
+    chunks에서 원문을 꺼내 배치하는 view-source 문서 레이아웃
+    layout_until은 지금까지 도착한 만큼만 배치하고, 더 올 원문이 남았으면
+    done이 False인 채로 돌아온다. show()로 보이는 곳을 알려 주면 그 근처의
+    블록만 display_list에 둔다.
+    """
+
+    def __init__(
+        self,
+        chunks: Queue[str | None],
+        rules: RuleIndex,
+        display_list: list[DrawText | DrawRect],
+    ) -> None:
+        self.parser = ViewSourceHTMLParser()
+        self.parser.on_block = self.add_block
+        super().__init__(self.parser.root, display_list)
+        self.chunks = chunks
+        self.rules = rules
+        style(self.node, rules)
+
+        # 블록의 원문을 적어 두는 파일. 레이아웃을 버리면 함께 지워진다.
+        self.spool = tempfile.TemporaryFile()
+        self.spool_size = 0
+        self.blocks: list[SourceBlock] = []
+        # 배치한 블록들의 y. 보이는 블록을 이분 탐색으로 찾는다.
+        self.tops: list[float] = []
+        # 도착했지만 아직 배치하지 않은 블록들
+        self.arrived: list[SourceBlock] = []
+        # 메모리에 둘 블록의 범위(y). show()가 정하기 전에는 첫 화면이다.
+        self.window = (self.y, self.y + HEIGHT + LAYOUT_MARGIN)
+        # 큐가 비어서 원문이 더 오기를 기다리는 중이다.
+        self.waiting = False
+        # 원문이 끝까지 도착했다. 도착한 블록을 다 배치하면 done이 된다.
+        self.ended = False
+        # 그리기 명령이 바뀌었는데 아직 다시 그리지 않았다.
+        self.changed = False
+
+        # html > body > pre는 처음에 한 번 배치하고, 블록이 올 때마다 높이만 늘린다.
+        html = BlockLayout(self.node, self, None)
+        self.children.append(html)
+        html.place()
+        body = html.next_child()
+        assert body is not None
+        body.place()
+        pre = body.next_child()
+        assert pre is not None
+        pre.place()
+        self.pre = pre
+        self.frame = [html, body, pre]
+        self.frame_commands: list[DrawText | DrawRect] = []
+        for block in self.frame:
+            self.frame_commands.extend(block.paint())
+        self.laid_out = self.pre.y
+        self.update_commands()
+
+    def layout_until(self, bottom: float) -> bool:
+        self.waiting = False
+        while not self.done and self.laid_out < bottom:
+            if self.arrived:
+                self.lay_out_arrived(bottom)
+                continue
+            if self.ended:
+                self.done = True
+                break
+            try:
+                chunk = self.chunks.get_nowait()
+            except Empty:
+                self.waiting = True
+                break
+            if chunk is None:
+                self.parser.close()
+                self.ended = True
+            else:
+                self.parser.feed(chunk)
+        self.height = self.laid_out - self.y
+        return self.done
+
+    def add_block(self, source: str) -> None:
+        """ViewSourceHTMLParser.on_block 훅"""
+        data = source.encode()
+        self.spool.seek(self.spool_size)
+        self.spool.write(data)
+        element = Element("div", NO_ATTRIBUTES, self.parser.pre)
+        self.parser.pre.children.append(element)
+        fill_source_block(element, source)
+        element.mark_style_dirty()
+        previous = self.blocks[-1].layout if self.blocks else None
+        layout = BlockLayout(element, self.pre, previous)
+        self.pre.children.append(layout)
+        block = SourceBlock(self.spool_size, len(data), element, layout)
+        self.spool_size += len(data)
+        self.blocks.append(block)
+        self.arrived.append(block)
+
+    def lay_out_arrived(self, bottom: float) -> None:
+        """도착한 블록을 차례로 배치한다. bottom까지 배치하면 나머지는 남겨 둔다."""
+        # 새 블록에만 dirty 표시가 있으므로 두 번째부터는 바로 돌아온다.
+        restyle(self.node, self.rules)
+        window_top, window_bottom = self.window
+        kept = False
+        count = 0
+        for block in self.arrived:
+            if self.laid_out >= bottom:
+                break
+            layout = block.layout
+            layout.place()
+            layout.finish()
+            self.tops.append(layout.y)
+            self.laid_out = layout.y + layout.height
+            if layout.y < window_bottom and self.laid_out > window_top:
+                self.paint_block(block)
+                kept = True
+            else:
+                self.drop(block)
+            count += 1
+        del self.arrived[:count]
+        for frame in self.frame:
+            frame.set_height(self.laid_out - frame.y)
+        if kept:
+            self.update_commands()
+
+    def show(self, top: float, bottom: float) -> None:
+        """top부터 bottom까지가 보인다. 그 근처의 블록만 메모리에 둔다."""
+        top -= LAYOUT_MARGIN
+        bottom += LAYOUT_MARGIN
+        self.window = (top, bottom)
+        first = max(bisect.bisect_right(self.tops, top) - 1, 0)
+        last = bisect.bisect_left(self.tops, bottom)
+        for i, block in enumerate(self.blocks[: len(self.tops)]):
+            if block.commands is not None and not first <= i < last:
+                self.drop(block)
+        refill = [block for block in self.blocks[first:last] if block.commands is None]
+        for block in refill:
+            self.spool.seek(block.offset)
+            fill_source_block(block.element, self.spool.read(block.size).decode())
+            # <div>의 스타일은 그대로이므로 새 텍스트 노드만 계산한다.
+            for child in block.element.children:
+                style_node(child, self.rules)
+            # 버리기 전과 같은 글꼴, 너비, 자리이므로 높이도 같다.
+            layout = block.layout
+            layout.children = []
+            layout.cursor_x = 0.0
+            layout.place()
+            layout.finish()
+            self.paint_block(block)
+        self.update_commands()
+
+    def source(self) -> str:
+        """지금까지 도착한 원문 전체. 파일에서 읽는다."""
+        self.spool.seek(0)
+        return self.spool.read(self.spool_size).decode()
+
+    def paint_block(self, block: SourceBlock) -> None:
+        block.commands = []
+        paint_tree(block.layout, block.commands)
+
+    def drop(self, block: SourceBlock) -> None:
+        block.element.children.clear()
+        block.layout.children = []
+        block.commands = None
+
+    def update_commands(self) -> None:
+        commands = list(self.frame_commands)
+        for block in self.blocks:
+            if block.commands is not None:
+                commands.extend(block.commands)
+        assert self.display_list is not None
+        self.display_list[:] = commands
+        self.changed = True
+
+    def take_changes(self) -> bool:
+        """마지막으로 물어본 뒤 그리기 명령이 바뀌었는지"""
+        changed = self.changed
+        self.changed = False
+        return changed
@@ -0,0 +1,83 @@
+import sys
+
+import pytest
+
+from soyorin import font
+from soyorin.arena import ArenaHTMLParser
+from soyorin.headless_font import HeadlessBackend
+from soyorin.layout import DocumentLayout, paint_tree
+from soyorin.lexer import Element, HTMLParser, Text, print_tree
+from soyorin.style import style
+from soyorin.stylesheets import default_stylesheet
+from soyorin.tree import find_elements, tree_to_list
+
+"""
+파이썬 재귀 한도(기본 1000)를 훨씬 넘는 깊이의 문서를 파싱부터 그리기까지
+처리할 수 있는지 확인한다.
+"""
+
+DEPTH = 100_000
+
+
+def make_document(depth: int) -> str:
+    return "<div>" * depth + "<p>deep <b>text</b></p>" + "</div>" * depth
+
+
+@pytest.fixture(scope="module")
+def rules():
+    return list(default_stylesheet().rules)
+
+
+@pytest.fixture(scope="module")
+def headless_fonts():
+    previous = font.BACKEND
+    font.set_backend(HeadlessBackend())
+    yield
+    font.set_backend(previous)
+
+
+@pytest.mark.parametrize("parser_class", [HTMLParser, ArenaHTMLParser])
+def test_deep_document_parse_and_style(parser_class, rules):
+    """Test that a 100k-deep document can be parsed, styled and traversed."""
+    assert DEPTH > sys.getrecursionlimit()
+    root = parser_class(make_document(DEPTH)).parse()
+    style(root, rules)
+
+    nodes = tree_to_list(root, [])
+    # html, body, div * DEPTH, p, "deep", b, "text"
+    assert len(nodes) == DEPTH + 6
+    assert len(find_elements(root, "div")) == DEPTH
+
+    b = find_elements(root, "b")[0]
+    assert b.style["font-weight"] == "bold"
+    text = b.children[0]
+    assert isinstance(text, Text)
+    assert text.style["font-weight"] == "bold"
+
+
+def test_deep_document_print_tree(capsys):
+    """Test that print_tree does not recurse."""
+    depth = 2 * sys.getrecursionlimit()
+    print_tree(HTMLParser(make_document(depth)).parse())
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == depth + 6
+    assert lines[-1].strip() == "'text'"
+
+
+def test_deep_document_layout_and_paint(headless_fonts, rules):
+    """Test that a 100k-deep document can be laid out and painted."""
+    root = HTMLParser(make_document(DEPTH)).parse()
+    style(root, rules)
+
+    document = DocumentLayout(root)
+    document.layout()
+    display_list = []
+    paint_tree(document, display_list)
+
+    assert document.height > 0
+    assert [cmd.text for cmd in display_list if hasattr(cmd, "text")] == [
+        "deep",
+        "text",
+    ]
+    layout_nodes = tree_to_list(document, [])
+    assert sum(isinstance(obj.node, Element) for obj in layout_nodes) > DEPTH
@@ -0,0 +1,299 @@
+import multiprocessing
+import threading
+import tkinter
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from soyorin import fontconfig
+from soyorin import font, stats
+from soyorin.draw import DrawText
+from soyorin.headless_font import HeadlessBackend, HeadlessFont, ScaledFace
+from soyorin.layout import DocumentLayout, paint_tree
+from soyorin.lexer import HTMLParser
+from soyorin.style import style
+from soyorin.stylesheets import default_stylesheet
+from soyorin.truetype import read_face
+
+
+class CountingFont:
+    """
+    Tk 없이 호출 횟수만 세는 가짜 Tk 글꼴
+    ASCII는 7px, 한글은 hangul_width(None이면 글자마다 다르게), 나머지는 9px이다.
+    """
+
+    def __init__(self, name: str, fixed: bool = False, hangul_width=14) -> None:
+        self.name = name
+        self.fixed = fixed
+        self.hangul_width = hangul_width
+        self.calls = 0
+
+    def measure(self, text: str) -> int:
+        self.calls += 1
+        return sum(self.width(char) for char in text)
+
+    def width(self, char: str) -> int:
+        if char.isascii():
+            return 7
+        if "가" <= char <= "힣":
+            return self.hangul_width or 12 + ord(char) % 2
+        return 9
+
+    def metrics(self) -> font.FontMetrics:
+        self.calls += 1
+        return {"ascent": 12, "descent": 3, "linespace": 16, "fixed": self.fixed}
+
+
+def make_handle(
+    monkeypatch, name: str, **options
+) -> tuple[font.FontHandle, CountingFont]:
+    counting = CountingFont(name, **options)
+    handle = font.FontHandle(counting)
+    monkeypatch.setitem(font.FONTS_BY_NAME, name, handle)
+    return handle, counting
+
+
+def test_font_handle_prefetches_metrics(monkeypatch):
+    """Test that a handle asks Tk for its metrics once, at creation."""
+    handle, counting = make_handle(monkeypatch, "handle")
+    assert (handle.ascent, handle.descent, handle.linespace) == (12, 3, 16)
+    assert handle.space_width == 7
+    assert handle.ascii_advance == 0
+    assert counting.calls == 2
+
+
+def test_measure_asks_tk_once_per_font_and_text(monkeypatch):
+    """Test that repeated measurements of the same word hit the cache."""
+    regular, regular_font = make_handle(monkeypatch, "regular")
+    bold, bold_font = make_handle(monkeypatch, "bold")
+    font.measure_text.cache_clear()
+
+    for _ in range(100):
+        assert font.measure(regular, "word") == 28
+        assert font.measure(regular, " ") == 7
+        assert font.measure(bold, "word") == 28
+    counts = stats.snapshot()
+
+    # 만들 때 부른 2번(metrics, 공백 폭)을 빼면 (글꼴, 문자열)마다 한 번씩이다.
+    assert regular_font.calls - 2 == 2
+    assert bold_font.calls - 2 == 1
+    assert counts["font.measure_cache.misses"] == 3
+    assert counts["font.measure_cache.hits"] == 297
+    font.measure_text.cache_clear()
+
+
+def test_fixed_pitch_fonts_measure_without_tk(monkeypatch):
+    """Test that ASCII and Hangul are computed and other glyphs fall back to Tk."""
+    mono, counting = make_handle(monkeypatch, "mono", fixed=True)
+    assert (mono.ascii_advance, mono.hangul_advance) == (7, 14)
+    font.measure_text.cache_clear()
+    created = counting.calls
+
+    assert font.measure(mono, "print(x)") == 56
+    assert font.measure(mono, "한글 ok") == 2 * 14 + 3 * 7
+    assert counting.calls == created
+
+    assert font.measure(mono, "日本 ok") == 2 * 9 + 3 * 7
+    assert font.measure(mono, "a\tb") == 21
+    assert counting.calls == created + 2
+    font.measure_text.cache_clear()
+
+
+def test_fixed_pitch_hangul_needs_consistent_widths(monkeypatch):
+    """Test that Hangul drawn with uneven widths is still measured by Tk."""
+    mono, counting = make_handle(
+        monkeypatch, "uneven", fixed=True, hangul_width=None
+    )
+    assert (mono.ascii_advance, mono.hangul_advance) == (7, 0)
+    font.measure_text.cache_clear()
+    created = counting.calls
+
+    assert font.measure(mono, "ascii") == 35
+    assert font.measure(mono, "한글") == counting.width("한") + counting.width("글")
+    assert counting.calls == created + 1
+    font.measure_text.cache_clear()
+
+
+requires_fontconfig = pytest.mark.skipif(
+    not fontconfig.available(), reason="libfontconfig가 없다"
+)
+
+
+def installed(family: str, file_name: str, size: int = 10) -> fontconfig.FontMatch:
+    """fontconfig가 family로 고른 글꼴. file_name이 아니면 테스트를 건너뛴다."""
+    matches = fontconfig.sort_fonts(family, size, bold=False, italic=False, dpi=96)
+    if not matches or matches[0].file.name != file_name:
+        pytest.skip(f"{file_name}이 설치되어 있지 않다")
+    return matches[0]
+
+
+@pytest.fixture
+def headless_fonts():
+    if not fontconfig.available():
+        pytest.skip("libfontconfig가 없다")
+    previous = font.BACKEND
+    font.set_backend(HeadlessBackend())
+    yield
+    font.set_backend(previous)
+
+
+@requires_fontconfig
+def test_headless_mono_font_matches_freetype():
+    """Test DejaVu Sans Mono metrics against FreeType 2.12 at 96 dpi."""
+    installed("DejaVu Sans Mono", "DejaVuSansMono.ttf")
+    previous = font.BACKEND
+    font.set_backend(HeadlessBackend(substitutes={"D2Coding": "DejaVu Sans Mono"}))
+    try:
+        regular = font.get_font(10, font.FontWeight.NORMAL, font.FontSlant.ROMAN)
+        bold = font.get_font(16, font.FontWeight.BOLD, font.FontSlant.ROMAN)
+    finally:
+        font.set_backend(previous)
+
+    assert (regular.ascent, regular.descent, regular.linespace) == (13, 4, 17)
+    # spacing=mono인 글꼴은 Xft가 모든 글자를 최대 폭으로 잰다.
+    assert (regular.space_width, regular.ascii_advance) == (8, 8)
+    assert (bold.ascent, bold.descent, bold.ascii_advance) == (20, 6, 13)
+
+
+@requires_fontconfig
+@pytest.mark.parametrize(
+    "hint_style, size, width",
+    [
+        (fontconfig.FC_HINT_FULL, 11, 63),
+        (fontconfig.FC_HINT_SLIGHT, 11, 61),
+        (fontconfig.FC_HINT_NONE, 11, 61),
+        (fontconfig.FC_HINT_FULL, 13, 72),
+        (fontconfig.FC_HINT_SLIGHT, 13, 74),
+    ],
+)
+def test_headless_widths_follow_xft_hinting(hint_style, size, width):
+    """Test DejaVu Sans widths against FreeType 2.12 with Xft's load flags."""
+    match = installed("DejaVu Sans", "DejaVuSans.ttf")._replace(
+        hint_style=hint_style, pixel_size=size * 96 / 72
+    )
+    face = ScaledFace(read_face(match.file), match)
+    assert sum(face.width(ord(char)) or 0 for char in "Willow 0") == width
+    assert (face.ascent, face.descent) == ((17, 5) if size == 13 else (14, 4))
+
+
+@requires_fontconfig
+def test_headless_synthetic_bold_widens_glyphs():
+    """Test that fontconfig's embolden adds FT_GlyphSlot_Embolden's advance."""
+    match = installed("DejaVu Sans", "DejaVuSans.ttf")._replace(
+        hint_style=fontconfig.FC_HINT_SLIGHT, pixel_size=13 * 96 / 72
+    )
+    regular = ScaledFace(read_face(match.file), match)
+    bold = ScaledFace(read_face(match.file), match._replace(embolden=True))
+    assert (regular.width(ord("W")), bold.width(ord("W"))) == (17, 18)
+
+
+@requires_fontconfig
+def test_headless_font_falls_back_per_character():
+    """Test that each character uses the first font that has it, like Tk."""
+    mono = installed("DejaVu Sans Mono", "DejaVuSansMono.ttf")
+    sans = installed("DejaVu Sans", "DejaVuSans.ttf")
+    headless = HeadlessFont(
+        [mono, sans], 10, font.FontWeight.NORMAL, font.FontSlant.ROMAN, "D2Coding"
+    )
+
+    assert headless.measure("W") == 8
+    # DejaVu Sans Mono에 없고 DejaVu Sans에 있는 글자
+    assert ord("Ǆ") not in mono.charset
+    assert headless.measure("Ǆ") == 19
+    # 어느 글꼴에도 없는 글자는 첫 글꼴의 .notdef 폭이다.
+    assert headless.measure("\ue000") == 8
+
+
+@requires_fontconfig
+def test_headless_backend_resolves_the_default_family():
+    """Test that D2Coding resolves to whatever font Tk would use, not an error."""
+    loaded = HeadlessBackend().load(
+        10, font.FontWeight.NORMAL, font.FontSlant.ROMAN, "D2Coding"
+    )
+    expected = fontconfig.sort_fonts("D2Coding", 10, bold=False, italic=False, dpi=96)
+    assert loaded.matches[0].file == expected[0].file
+    assert str(loaded) == "{D2Coding} 10 normal roman"
+
+
+def test_layout_runs_in_a_worker_thread(headless_fonts):
+    """Test that a headless layout needs neither a display nor the Tk thread."""
+    tree = HTMLParser("<html><body><p>hello <b>world</b></p></body></html>").parse()
+    style(tree, list(default_stylesheet().rules))
+    result = []
+
+    def work():
+        document = DocumentLayout(tree)
+        document.layout()
+        display_list = []
+        paint_tree(document, display_list)
+        result.append([cmd.text for cmd in display_list if hasattr(cmd, "text")])
+
+    worker = threading.Thread(target=work)
+    worker.start()
+    worker.join()
+    assert result == [["hello", "world"]]
+
+
+SAMPLE_PAGE = """
+<html><head><title>sample</title></head><body>
+<h1>Soyorin 줄바꿈 비교</h1>
+<p>The quick brown fox jumps over the lazy dog. 다람쥐 헌 쳇바퀴에 타고파.
+<b>Bold words</b> and <i>italic words</i> wrap at the same places when the
+headless backend measures them the way Xft does. Ǆ, Ω, ü, 日本語, ➿.</p>
+<ul><li>첫 번째 항목 with some English text</li><li>second item</li></ul>
+<pre>def f(x):
+    return x * 2  # 주석</pre>
+<p>""" + "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 8 + """</p>
+</body></html>
+"""
+
+
+def laid_out_words(html: str) -> list[tuple[str, float, float]]:
+    tree = HTMLParser(html).parse()
+    style(tree, list(default_stylesheet().rules))
+    document = DocumentLayout(tree)
+    document.layout()
+    display_list = []
+    paint_tree(document, display_list)
+    return [
+        (cmd.text, cmd.left, cmd.top)
+        for cmd in display_list
+        if isinstance(cmd, DrawText)
+    ]
+
+
+def test_headless_breaks_lines_like_tk():
+    """Test that a sample page lays out word for word the same on both backends."""
+    try:
+        root = tkinter.Tk()
+    except tkinter.TclError:
+        pytest.skip("디스플레이가 없다")
+    root.withdraw()
+    previous = font.BACKEND
+    try:
+        font.set_backend(font.TkBackend())
+        with_tk = laid_out_words(SAMPLE_PAGE)
+        # Xft는 Tk가 쓰는 화면의 해상도로 글꼴 크기를 픽셀로 바꾼다.
+        font.set_backend(HeadlessBackend(dpi=root.winfo_fpixels("1i")))
+        headless = laid_out_words(SAMPLE_PAGE)
+    finally:
+        font.set_backend(previous)
+        root.destroy()
+    assert headless == with_tk
+
+
+def layout_in_worker(html: str) -> list[tuple[str, float, float]]:
+    """작업 프로세스에서 부른다. 글꼴 backend는 프로세스마다 따로 정한다."""
+    font.set_backend(HeadlessBackend())
+    return laid_out_words(html)
+
+
+@requires_fontconfig
+def test_layout_runs_in_worker_processes(headless_fonts):
+    """Test that spawned workers without Tk lay out pages like this process does."""
+    pages = [SAMPLE_PAGE, SAMPLE_PAGE.replace("<h1>", "<h1>두 번째 ")]
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=2, mp_context=context) as executor:
+        results = list(executor.map(layout_in_worker, pages))
+    assert results == [laid_out_words(page) for page in pages]
+    assert results[0] and results[0] != results[1]
@@ -1,16 +1,21 @@
 import pytest
-import tkinter
+from soyorin import font
+from soyorin.headless_font import HeadlessBackend
 from soyorin.lexer import HTMLParser, Element
-from soyorin.layout import DocumentLayout
+from soyorin.layout import BlockLayout, DocumentLayout, paint_tree
+from soyorin.style import style
+from soyorin.stylesheets import default_stylesheet
 
+RULES = list(default_stylesheet().rules)
 
-@pytest.fixture(scope="session", autouse=True)
-def tk_root():
-    """Create a tkinter root window for the test session."""
-    root = tkinter.Tk()
-    root.withdraw()  # Hide the window
-    yield root
-    root.destroy()
+
+@pytest.fixture(scope="module", autouse=True)
+def headless_fonts():
+    """Measure text through fontconfig so layout runs without a display."""
+    previous = font.BACKEND
+    font.set_backend(HeadlessBackend())
+    yield
+    font.set_backend(previous)
 
 
 def collect_layout_tags(layout_node):
@@ -84,6 +89,7 @@ class TestExercise5_2:
         parser = HTMLParser(html)
         html_tree = parser.parse()
 
+        style(html_tree, RULES)
         layout = DocumentLayout(html_tree)
         layout.layout()
 
@@ -124,6 +130,7 @@ class TestExercise5_2:
         assert "style" in html_tags
 
         # Verify head children are NOT in layout tree
+        style(html_tree, RULES)
         layout = DocumentLayout(html_tree)
         layout.layout()
         layout_tags = collect_layout_tags(layout)
@@ -157,6 +164,7 @@ class TestExercise5_2:
         parser = HTMLParser(html)
         html_tree = parser.parse()
 
+        style(html_tree, RULES)
         layout = DocumentLayout(html_tree)
         layout.layout()
         layout_tags = collect_layout_tags(layout)
@@ -186,6 +194,7 @@ class TestExercise5_2:
         parser = HTMLParser(html)
         html_tree = parser.parse()
 
+        style(html_tree, RULES)
         layout = DocumentLayout(html_tree)
         layout.layout()
         layout_tags = collect_layout_tags(layout)
@@ -215,6 +224,7 @@ class TestExercise5_2:
         assert "body" in html_tags
         assert "title" in html_tags
 
+        style(html_tree, RULES)
         layout = DocumentLayout(html_tree)
         layout.layout()
         layout_tags = collect_layout_tags(layout)
@@ -237,6 +247,7 @@ class TestExercise5_2:
         parser = HTMLParser(html)
         html_tree = parser.parse()
 
+        style(html_tree, RULES)
         layout = DocumentLayout(html_tree)
         layout.layout()
         layout_tags = collect_layout_tags(layout)
@@ -261,6 +272,7 @@ class TestExercise5_2:
         parser = HTMLParser(html)
         html_tree = parser.parse()
 
+        style(html_tree, RULES)
         layout = DocumentLayout(html_tree)
         layout.layout()
         layout_tags = collect_layout_tags(layout)
@@ -269,3 +281,35 @@ class TestExercise5_2:
         assert "head" not in layout_tags
         assert "title" not in layout_tags
         assert "p" in layout_tags
+
+
+def test_layout_until_stops_at_viewport_and_resumes():
+    """Test that lazy layout paints the first screen early and ends up identical."""
+    paragraphs = "".join(f"<p>{i} " + "word " * 30 + "</p>" for i in range(500))
+    html = f'<html><body style="background-color: #eee">{paragraphs}</body></html>'
+    html_tree = HTMLParser(html).parse()
+    style(html_tree, RULES)
+
+    full = DocumentLayout(html_tree)
+    full.layout()
+    full_list = []
+    paint_tree(full, full_list)
+
+    display_list = []
+    lazy = DocumentLayout(html_tree, display_list)
+    assert not lazy.layout_until(600)
+    body = lazy.children[0].children[0]
+    assert isinstance(body, BlockLayout)
+    assert 0 < len(body.children) < 50
+    assert 600 <= lazy.y + lazy.height < full.height
+    # 아직 배치 중인 body의 배경은 지금까지 배치한 곳까지 그려진다.
+    assert body.background is not None
+    assert body.background.rect.bottom == lazy.y + lazy.height
+    first_screen = len(display_list)
+
+    assert lazy.layout_until(float("inf"))
+    assert lazy.done and len(display_list) > first_screen
+    assert lazy.height == full.height
+    assert [(type(cmd), cmd.rect) for cmd in display_list] == [
+        (type(cmd), cmd.rect) for cmd in full_list
+    ]
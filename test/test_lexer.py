@@ -1,6 +1,13 @@
-from soyorin.lexer import HTMLParser
+import pytest
+
+from soyorin import lexer
+from soyorin.lexer import HTMLParser, ViewSourceHTMLParser
 from soyorin.lexer import Text
 from soyorin.lexer import Element
+from soyorin.lexer import Token
+from soyorin.arena import ArenaHTMLParser
+from soyorin.traversal import preorder
+from soyorin.tree import find_elements, tree_to_list
 
 """
 4-2
@@ -784,4 +791,243 @@ def test_script_tag_with_content_after():
     assert script.tag == "script"
 
 
+def test_comment_is_skipped_inside_text():
+    """Test that a comment does not split the surrounding text."""
+    html = "<p>hello <!-- <b>hidden</b> -->world</p>"
+    root = HTMLParser(html).parse()
+
+    p = root.children[0].children[0]  # html > body > p
+    assert isinstance(p, Element)
+    assert len(p.children) == 1
+    assert isinstance(p.children[0], Text)
+    assert p.children[0].text == "hello world"
+
+
+def test_unterminated_comment_stops_parsing():
+    """Test that everything after an unterminated comment is dropped."""
+    html = "<p>before<!-- never closed <p>after"
+    root = HTMLParser(html).parse()
+
+    body = root.children[0]
+    assert len(body.children) == 1
+    p = body.children[0]
+    assert isinstance(p, Element)
+    assert [child.text for child in p.children if isinstance(child, Text)] == [
+        "before"
+    ]
+
+
+def test_script_body_keeps_markup_as_text():
+    """Test that tags and quotes inside <script> are kept as raw text."""
+    html = """<script>if (a < b) { x = "</div>"; }</script><p>after</p>"""
+    root = HTMLParser(html).parse()
+
+    head, body = root.children
+    script = head.children[0]
+    assert isinstance(script, Element)
+    assert script.tag == "script"
+    assert isinstance(script.children[0], Text)
+    assert script.children[0].text == 'if (a < b) { x = "</div>"; }'
+
+    p = body.children[0]
+    assert isinstance(p, Element)
+    assert p.tag == "p"
+
+
+def dump_tree(node):
+    if isinstance(node, Text):
+        return node.text
+    return (node.tag, dict(node.attributes), [dump_tree(c) for c in node.children])
+
+
+def test_feed_matches_parse_at_every_split():
+    """Test that feeding two chunks gives the same tree as parsing at once."""
+    html = (
+        '<p class="a>b">x<!-- <p> -->y</p>'
+        "<script>if (a < b) {}</script><li>z"
+    )
+    expected = dump_tree(HTMLParser(html).parse())
+
+    for split in range(len(html) + 1):
+        parser = HTMLParser()
+        parser.feed(html[:split])
+        parser.feed(html[split:])
+        assert dump_tree(parser.close()) == expected, f"split at {split}"
+
+
+def test_feed_one_character_at_a_time():
+    """Test that state survives chunk boundaries inside tags, quotes and scripts."""
+    html = "<div title='a<!--b'>t</div><script>x</scr</script><!-- c -->after"
+    expected = dump_tree(HTMLParser(html).parse())
+
+    parser = HTMLParser()
+    for c in html:
+        parser.feed(c)
+    assert dump_tree(parser.close()) == expected
+
+
+def test_deeply_nested_document():
+    """Test that deep nesting keeps implicit p handling and tree shape."""
+    depth = 5000
+    html = "<div>" * depth + "<p>a<p>b" + "</div>" * depth
+    root = HTMLParser(html).parse()
+
+    node = root.children[0]  # html > body
+    for _ in range(depth):
+        assert len(node.children) == 1
+        node = node.children[0]
+        assert isinstance(node, Element)
+        assert node.tag == "div"
+    assert [child.tag for child in node.children if isinstance(child, Element)] == [
+        "p",
+        "p",
+    ]
+
+
+def test_nodes_share_empty_children_and_attributes():
+    """Test that text nodes and attribute-less elements share empty sentinels."""
+    root = HTMLParser("<div><p>one</p><p>two</p></div>").parse()
+
+    div = root.children[0].children[0]  # html > body > div
+    p1, p2 = div.children
+    assert isinstance(p1, Element) and isinstance(p2, Element)
+    assert p1.attributes is p2.attributes
+    assert p1.children[0].children is p2.children[0].children
+    assert p1.tag is p2.tag
+    assert not hasattr(p1, "__dict__")
+
+
+def test_arena_parser_builds_same_tree():
+    """Test that the array-backed DOM matches the object DOM."""
+    html = (
+        '<title>t</title><link rel="stylesheet" href="a.css">'
+        "<ul><li>a<li>b <b>c</b></ul><p>x<p>y<br>z"
+    )
+    objects = HTMLParser(html).parse()
+    arena = ArenaHTMLParser(html).parse()
+
+    assert dump_tree(arena) == dump_tree(objects)
+    assert [repr(node) for node in tree_to_list(arena, [])] == [
+        repr(node) for node in tree_to_list(objects, [])
+    ]
+    links = find_elements(arena, "link")
+    assert [link.attributes["href"] for link in links] == ["a.css"]
+    li = find_elements(arena, "li")[1]
+    assert li.parent is not None and li.parent.tag == "ul"
+
+
+def test_text_is_materialized_on_first_access():
+    """Test that text nodes keep a span of the source until they are read."""
+    html = "<script>if (a &lt; b) {}</script><p>x &gt; y</p>"
+    root = HTMLParser(html).parse()
+
+    head, body = root.children
+    script_text = head.children[0].children[0]
+    assert isinstance(script_text, Text)
+    assert script_text.source is html
+
+    p_text = body.children[0].children[0]
+    assert isinstance(p_text, Text)
+    assert p_text.text == "x > y"
+    assert p_text.source is None
+    assert script_text.source is html
+
+
+def source_text(block: Token) -> str:
+    """<pre>나 그 아래 블록 안의 원문"""
+    return "".join(node.text for node in preorder(block) if isinstance(node, Text))
+
+
+def test_view_source_shows_markup_as_text():
+    """Test that view-source puts the source, not its elements, inside <pre>."""
+    html = '<p title="a > b">x</p>\n<!-- c -->'
+    root = ViewSourceHTMLParser(html).parse()
+
+    body = root.children[0]
+    assert isinstance(body, Element) and body.tag == "body"
+    pre = body.children[0]
+    assert isinstance(pre, Element) and pre.tag == "pre"
+    assert [
+        block.tag for block in pre.children if isinstance(block, Element)
+    ] == ["div"]
+    assert all(isinstance(child, Text) for child in pre.children[0].children)
+    assert source_text(pre) == html
+
+
+def test_view_source_feed_emits_blocks_before_close():
+    """Test that full blocks enter the tree without waiting for close()."""
+    parser = ViewSourceHTMLParser()
+    line = "<p>" + "x" * 60 + "</p>\r\n"
+    count = lexer.SOURCE_BLOCK_SIZE // len(line) + 1
+    for _ in range(count):
+        # 줄 중간에서 잘린 조각도 줄 끝이 올 때까지 기다렸다가 붙인다.
+        parser.feed(line[:7])
+        parser.feed(line[7:])
+    parser.feed("<p>last")
+    assert source_text(parser.pre) == line * count
+
+    parser.feed("</p>")
+    assert source_text(parser.pre) == line * count
+    parser.close()
+    assert source_text(parser.pre) == line * count + "<p>last</p>"
+
+
+def test_view_source_groups_lines_into_blocks():
+    """Test that long sources are split at line ends into bounded blocks."""
+    lines = [f"<li>item {i}</li>\n" for i in range(2000)]
+    parser = ViewSourceHTMLParser()
+    for line in lines:
+        parser.feed(line[:5])
+        parser.feed(line[5:])
+    root = parser.close()
+
+    pre = find_elements(root, "pre")[0]
+    assert source_text(pre) == "".join(lines)
+    assert len(pre.children) > 1
+    for block in pre.children:
+        block_text = source_text(block)
+        assert block_text.endswith("\n")
+        assert len(block_text) < lexer.SOURCE_BLOCK_SIZE + len(lines[-1])
+
+
+def test_view_source_cuts_long_lines_outside_entities():
+    """Test that a source without line ends is still emitted in bounded blocks."""
+    parser = ViewSourceHTMLParser()
+    blocks: list[str] = []
+    parser.on_block = blocks.append
+    words = "".join(f"a&lt;b{i} " for i in range(5000))
+    no_spaces = "&lt;" * 5000
+    for i in range(0, len(words), 1000):
+        parser.feed(words[i : i + 1000])
+    for i in range(0, len(no_spaces), 1001):
+        parser.feed(no_spaces[i : i + 1001])
+    emitted = len(blocks)
+    root = parser.close()
+
+    assert emitted >= len(words + no_spaces) // (lexer.SOURCE_BLOCK_SIZE + 1001)
+    assert "".join(blocks) == words + no_spaces
+    # 블록 하나를 채우다 만 뒤에 공백 없는 조각이 와도 블록 두 개 남짓을 넘지 않는다.
+    assert all(len(block) < 2 * lexer.SOURCE_BLOCK_SIZE + 1001 for block in blocks)
+    # 공백에서 자르고, 공백이 없으면 &lt;를 나누지 않는다.
+    assert all(block.endswith((" ", ";")) for block in blocks)
+    # on_block에 넘긴 블록은 트리에 넣지 않는다.
+    assert find_elements(root, "pre")[0].children == []
+
+
 # https://html.spec.whatwg.org/multipage/parsing.html#adoption-agency-algorithm
+
+
+def test_arena_views_refuse_tree_changes():
+    """Test that arena views reject edits that would otherwise be silently lost."""
+    root = ArenaHTMLParser("<p>a</p>").parse()
+    body = find_elements(root, "body")[0]
+
+    assert body.children == body.children
+    with pytest.raises(AttributeError):
+        body.children.append(body.children[0])
+    with pytest.raises(AttributeError):
+        body.parent = None
+    with pytest.raises(AttributeError):
+        body.tag = "div"
+    body.set_attribute("class", "x")
+    assert body.attributes == {"class": "x"}
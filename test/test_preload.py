@@ -0,0 +1,48 @@
+from soyorin.cache import InMemoryCache
+from soyorin.lexer import HTMLParser
+from soyorin.preload import PreloadScanner
+from soyorin.url import URL
+
+
+def test_start_tag_hook_runs_while_feeding():
+    """Test that <link> is reported as soon as its tag is read, before close()."""
+    seen = []
+    parser = HTMLParser()
+    parser.on_start_tag = lambda tag, attributes: seen.append((tag, dict(attributes)))
+
+    parser.feed('<html><head><link rel="stylesheet" href="a.css">')
+    tag, attributes = seen[-1]
+    assert tag == "link" and attributes["href"] == "a.css"
+
+    parser.feed("</head><body>text</body></html>")
+    parser.close()
+    assert [tag for tag, _ in seen] == ["html", "head", "link", "body"]
+
+
+def test_preload_scanner_keeps_document_order(tmp_path):
+    """Test that preloaded rules come back in document order, skipping failures."""
+    first = tmp_path / "first.css"
+    first.write_text("p { color: red; }")
+    second = tmp_path / "second.css"
+    second.write_text("p { color: blue; }")
+    missing = tmp_path / "missing.css"
+
+    page = URL((tmp_path / "index.html").as_uri())
+    scanner = PreloadScanner(page, InMemoryCache())
+    parser = HTMLParser()
+    parser.on_start_tag = scanner.scan
+    try:
+        parser.feed(
+            f'<link rel="stylesheet" href="{first.as_uri()}">'
+            f'<link rel="stylesheet" href="{missing.as_uri()}">'
+            f'<link rel="icon" href="{second.as_uri()}">'
+            f'<link rel="stylesheet" href="{second.as_uri()}">'
+        )
+        parser.close()
+        stylesheets = scanner.stylesheets()
+    finally:
+        scanner.close()
+
+    assert len(scanner.fetches) == 3
+    rules = [rule for stylesheet in stylesheets for rule in stylesheet.rules]
+    assert [body["color"] for _, body in rules] == ["red", "blue"]
@@ -0,0 +1,194 @@
+from soyorin import stats
+from soyorin.arena import ArenaHTMLParser
+from soyorin.font import FontSlant, FontWeight
+from soyorin.lexer import Element, HTMLParser
+from soyorin.style import AncestorFilter, CSSParser, RuleIndex
+from soyorin.style import cascade_priority, restyle, style
+from soyorin.tree import find_elements, tree_to_list
+
+
+def test_rule_index_buckets_by_rightmost_tag():
+    """Test that only rules ending in the node's tag are candidates, in order."""
+    rules = CSSParser(
+        "p { color: red; } div p { color: blue; } div { color: green; } "
+        "p { font-weight: bold; }"
+    ).parse()
+    index = RuleIndex(rules)
+
+    p = Element("p", {}, None)
+    assert list(index.candidates(p)) == [rules[0], rules[1], rules[3]]
+    assert list(index.candidates(Element("span", {}, None))) == []
+
+
+def test_style_with_index_keeps_cascade_order():
+    """Test that later and more specific rules still win when using the index."""
+    rules = CSSParser(
+        "div p { color: blue; } p { color: red; } p { color: green; } "
+        "b { font-weight: bold; }"
+    ).parse()
+    root = HTMLParser("<div><p>a</p></div><p>b <b>c</b></p>").parse()
+    style(root, sorted(rules, key=cascade_priority))
+
+    inner, outer = find_elements(root, "p")
+    assert inner.style["color"] == "blue"
+    assert outer.style["color"] == "green"
+    assert find_elements(root, "b")[0].style["font-weight"] == "bold"
+
+
+def test_compiled_matchers_compare_tag_ids():
+    """Test that compiled selectors match by tag id, including deep chains."""
+    rules = CSSParser(
+        "p { a: 1; } div p { a: 2; } ul div p { a: 3; } html ul div p { a: 4; }"
+    ).parse()
+    html = "<ul><li><div><p>a</p></div></li></ul><div><p>b</p></div>"
+    root = HTMLParser(html).parse()
+    inner, outer = find_elements(root, "p")
+    text = inner.children[0]
+
+    assert [selector.matcher(inner) for selector, _ in rules] == [True] * 4
+    assert [selector.matcher(outer) for selector, _ in rules] == [
+        True, True, False, False
+    ]  # fmt: skip
+    assert not any(selector.matcher(text) for selector, _ in rules)
+
+
+def test_ancestor_filter_counts_nested_tags():
+    """Test that a tag stays in the filter until every push has been popped."""
+    ancestors = AncestorFilter()
+    slots = [AncestorFilter.slots("div")]
+    assert not ancestors.may_contain_all(slots)
+    ancestors.push("div")
+    ancestors.push("div")
+    ancestors.pop("div")
+    assert ancestors.may_contain_all(slots)
+    ancestors.pop("div")
+    assert not ancestors.may_contain_all(slots)
+
+
+def test_descendant_rules_rejected_without_walking():
+    """Test that descendant rules whose ancestors are absent skip the chain walk."""
+    rules = CSSParser("table p { color: red; } div p { color: blue; }").parse()
+    root = HTMLParser("<div><p>a</p></div><p>b</p>").parse()
+
+    stats.reset()
+    style(root, rules)
+    counts = stats.snapshot()
+
+    inner, outer = find_elements(root, "p")
+    assert inner.style["color"] == "blue"
+    assert outer.style["color"] == "black"
+    # table p는 두 번 다, div p는 div 밖의 p에서 바로 거절된다.
+    assert counts["style.ancestor_filter.rejects"] == 3
+    assert counts["style.ancestor_filter.walks"] == 1
+
+
+def test_style_sharing_reuses_sibling_styles():
+    """Test that list items with the same tag, attributes and parent share a style."""
+    items = "".join(f"<li>item {i}</li>" for i in range(20))
+    root = HTMLParser(f"<ul>{items}</ul><ul>{items}</ul><ul class=x>{items}</ul>").parse()
+
+    stats.reset()
+    style(root, CSSParser("li { color: red; } ul li { font-weight: bold; }").parse())
+    counts = stats.snapshot()
+
+    first, second, third = find_elements(root, "ul")
+    assert first.children[0].style is first.children[-1].style
+    assert first.children[0].style is second.children[0].style
+    # 속성이 달라 공유되지는 않지만, 내용이 같으므로 intern 된 같은 객체다.
+    assert third.children[0].style is first.children[0].style
+    assert third.children[0].style["font-weight"] == "bold"
+
+    hits = counts["style.share.hits"]
+    assert hits / (hits + counts["style.share.misses"]) > 0.8
+
+
+def test_computed_styles_are_interned_and_inherited():
+    """Test that unchanged children reuse the parent's inherited style object."""
+    root = HTMLParser("<div><p>a <b>b</b></p></div><pre>c</pre>").parse()
+    style(root, CSSParser("div { display: block; } b { font-weight: bold; }").parse())
+
+    div = find_elements(root, "div")[0]
+    p = find_elements(root, "p")[0]
+    b = find_elements(root, "b")[0]
+    assert div.style["display"] == "block"
+    assert "display" not in p.style
+    assert p.style is div.style.inherited
+    assert p.children[0].style is p.style
+    assert b.style["font-weight"] == "bold"
+    assert b.style is p.style.derive({"font-weight": "bold"})
+    assert find_elements(root, "pre")[0].style is p.style
+
+
+def test_computed_style_has_typed_font_values():
+    """Test that font values are resolved once into numbers and enums."""
+    root = HTMLParser("<p>a <small><i><b>b</b></i></small></p>").parse()
+    rules = CSSParser(
+        "small { font-size: 90%; } i { font-style: italic; } b { font-weight: bold; }"
+    ).parse()
+    style(root, rules)
+
+    p = find_elements(root, "p")[0]
+    assert p.style.font_size == 16.0
+    assert p.style.font_weight is FontWeight.NORMAL
+    assert p.style.font_slant is FontSlant.ROMAN
+
+    b = find_elements(root, "b")[0]
+    assert b.style.font_size == 16.0 * 0.9
+    assert b.style.font_weight is FontWeight.BOLD
+    assert b.style.font_slant is FontSlant.ITALIC
+
+
+def test_inline_style_parsing_is_memoized_across_documents():
+    """Test that the same style attribute is parsed once and shared read-only."""
+    inline = 'style="color: red; font-size: 150%"'
+    html = f"<p {inline}>a</p><div><p {inline}>b</p></div>"
+    before = stats.snapshot()
+    for _ in range(3):
+        root = HTMLParser(html).parse()
+        style(root, [])
+    after = stats.snapshot()
+
+    first, second = find_elements(root, "p")
+    assert first.style["color"] == second.style["color"] == "red"
+    assert first.style.font_size == 24.0
+    assert after["style.inline_cache.misses"] - before["style.inline_cache.misses"] <= 1
+    assert after["style.inline_cache.hits"] - before["style.inline_cache.hits"] >= 5
+
+
+def test_restyle_recomputes_only_dirty_subtrees():
+    """Test that restyle follows dirty bits and stops where the style is unchanged."""
+    rules = CSSParser("p { color: red; } div p { color: blue; }").parse()
+    html = "<div><p>a <b>b</b></p><p>c</p></div><p>d</p>"
+    for parser_class in (HTMLParser, ArenaHTMLParser):
+        root = parser_class(html).parse()
+        style(root, rules)
+        div = find_elements(root, "div")[0]
+        first, second, outside = find_elements(root, "p")
+
+        # 스타일이 바뀌지 않으면 자식은 다시 계산하지 않는다.
+        stats.reset()
+        first.set_attribute("title", "x")
+        assert first.style_dirty and div.child_style_dirty
+        restyle(root, rules)
+        assert stats.snapshot()["style.restyle.nodes"] == 1
+        assert not first.style_dirty and not div.child_style_dirty
+
+        # 상속되는 속성이 바뀌면 div 아래 7개 노드를 다시 계산하고 바깥 p는 건드리지 않는다.
+        stats.reset()
+        div.set_attribute("style", "font-size: 200%")
+        restyle(root, rules)
+        assert stats.snapshot()["style.restyle.nodes"] == 7
+        b = find_elements(root, "b")[0]
+        assert b.style.font_size == 32.0
+        assert second.style["color"] == "blue"
+        assert outside.style.font_size == 16.0
+
+        expected = parser_class(html).parse()
+        expected_div = find_elements(expected, "div")[0]
+        expected_div.set_attribute("title", "x")
+        expected_div.set_attribute("style", "font-size: 200%")
+        find_elements(expected, "p")[0].set_attribute("title", "x")
+        style(expected, rules)
+        nodes = tree_to_list(root, [])
+        for node, expected_node in zip(nodes, tree_to_list(expected, [])):
+            assert node.style is expected_node.style
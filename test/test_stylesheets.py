@@ -0,0 +1,41 @@
+from soyorin import stats, stylesheets
+from soyorin.style import CSSParser, cascade_priority
+from soyorin.stylesheets import cascade, parse_stylesheet
+
+SITE_CSS = "div p { color: blue; } p { color: red; } b { font-weight: bold; }"
+PAGE_CSS = "p { color: green; } div b { color: gray; } i { font-style: italic; }"
+
+
+def test_parse_stylesheet_is_cached_by_content():
+    """Test that the same stylesheet text is parsed once and sorted by priority."""
+    stats.reset()
+    first = parse_stylesheet(SITE_CSS)
+    second = parse_stylesheet("".join([SITE_CSS[:10], SITE_CSS[10:]]))
+    counts = stats.snapshot()
+
+    assert first is second
+    assert counts["stylesheets.parse.hits"] == 1
+    assert [cascade_priority(rule) for rule in first.rules] == [1, 1, 2]
+
+
+def test_cascade_merges_in_stable_order_and_is_memoized():
+    """Test that merging pre-sorted sheets equals sorting them all together."""
+    sheets = [parse_stylesheet(SITE_CSS), parse_stylesheet(PAGE_CSS)]
+    expected = sorted(
+        CSSParser(SITE_CSS).parse() + CSSParser(PAGE_CSS).parse(),
+        key=cascade_priority,
+    )
+
+    index = cascade(sheets)
+    assert [body for _, body in index.rules] == [body for _, body in expected]
+    assert cascade(list(sheets)) is index
+    assert cascade(sheets[::-1]) is not index
+
+
+def test_default_stylesheet_is_read_from_the_package(tmp_path, monkeypatch):
+    """Test that browser.css is found without depending on the working directory."""
+    monkeypatch.chdir(tmp_path)
+    stylesheets.default_stylesheet.cache_clear()
+    first = stylesheets.default_stylesheet()
+    assert any(body.get("display") == "block" for _, body in first.rules)
+    assert stylesheets.default_stylesheet() is first
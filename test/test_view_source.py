@@ -0,0 +1,157 @@
+import time
+from queue import Queue
+
+import pytest
+
+from soyorin import font
+from soyorin.draw import DrawText
+from soyorin.headless_font import HeadlessBackend
+from soyorin.layout import DocumentLayout, paint_tree
+from soyorin.lexer import Text, ViewSourceHTMLParser
+from soyorin.style import style
+from soyorin.stylesheets import cascade, default_stylesheet
+from soyorin.traversal import preorder
+from soyorin.url import URL
+from soyorin.view_source import SourceLayout, SourceStream
+
+RULES = cascade([default_stylesheet()])
+# 한 줄에 한 항목씩, 블록(4 KB) 백여 개 분량
+SOURCE = "".join(
+    f'<li class="item">item {i} &lt;{i}&gt;</li>\n' for i in range(12000)
+)
+
+
+@pytest.fixture(scope="module", autouse=True)
+def headless_fonts():
+    previous = font.BACKEND
+    font.set_backend(HeadlessBackend())
+    yield
+    font.set_backend(previous)
+
+
+def texts(display_list) -> list[tuple[str, float, float]]:
+    return [
+        (cmd.text, cmd.left, cmd.top)
+        for cmd in display_list
+        if isinstance(cmd, DrawText)
+    ]
+
+
+def laid_out(source: str) -> tuple[DocumentLayout, list]:
+    """원문을 한 번에 파싱하고 배치한 결과"""
+    tree = ViewSourceHTMLParser(source).parse()
+    style(tree, RULES)
+    document = DocumentLayout(tree)
+    document.layout()
+    display_list: list = []
+    paint_tree(document, display_list)
+    return document, display_list
+
+
+def in_memory_text(document: SourceLayout) -> int:
+    """DOM에 남아 있는 원문 글자 수"""
+    return sum(
+        len(node.text) for node in preorder(document.node) if isinstance(node, Text)
+    )
+
+
+def load(chunks: Queue[str | None], source: str, size: int = 8192) -> None:
+    for i in range(0, len(source), size):
+        chunks.put(source[i : i + size])
+    chunks.put(None)
+
+
+def test_source_layout_paints_blocks_as_they_arrive():
+    """Test that the first screen is painted before the rest of the source arrives."""
+    chunks: Queue[str | None] = Queue()
+    display_list: list = []
+    document = SourceLayout(chunks, RULES, display_list)
+    document.show(0, 600)
+
+    assert not document.layout_until(600)
+    assert document.waiting and texts(display_list) == []
+
+    chunks.put(SOURCE[:20000])
+    assert not document.layout_until(600)
+    assert document.take_changes() and not document.take_changes()
+    # 다 찬 블록만 배치하므로 도착한 원문의 마지막 블록은 더 올 때까지 기다린다.
+    arrived = document.source()
+    assert 0 < len(arrived) < 20000 and SOURCE.startswith(arrived)
+    _, expected = laid_out(arrived)
+    shown = texts(display_list)
+    assert shown == texts(expected)[: len(shown)] and shown[-1][2] >= 600
+
+    load(chunks, SOURCE[20000:])
+    while not document.layout_until(document.y + document.height + 6000):
+        pass
+    assert document.done and not document.waiting
+    assert document.source() == SOURCE
+
+
+def test_source_layout_keeps_only_visible_blocks():
+    """Test that memory holds a window of blocks and scrolling reloads the rest."""
+    chunks: Queue[str | None] = Queue()
+    display_list: list = []
+    document = SourceLayout(chunks, RULES, display_list)
+    document.show(0, 600)
+    load(chunks, SOURCE)
+    document.layout()
+    assert document.done and len(document.blocks) > 100
+
+    # 같은 원문을 한 번에 배치한 것과 같은 자리에 같은 글자를 그린다.
+    whole, expected = laid_out(SOURCE)
+    assert document.height == whole.height
+
+    resident = in_memory_text(document)
+    assert resident < 5 * 4096
+    assert len(display_list) < len(expected) / 50
+    shown = texts(display_list)
+    assert shown == texts(expected)[: len(shown)] and shown[-1][2] >= 600
+
+    middle = document.height / 2
+    document.show(middle, middle + 600)
+    visible = [
+        word for word in texts(expected) if middle <= word[2] < middle + 600
+    ]
+    assert visible and set(visible) <= set(texts(display_list))
+    assert texts(expected)[0] not in texts(display_list)
+    assert in_memory_text(document) < 5 * 4096
+    assert len(display_list) < len(expected) / 50
+
+
+def test_source_stream_reads_a_file_in_bounded_chunks(tmp_path):
+    """Test that the download thread waits for the reader instead of buffering."""
+    path = tmp_path / "page.html"
+    path.write_text(SOURCE * 3, encoding="utf-8")
+    stream = SourceStream(URL(path.as_uri()))
+    try:
+        deadline = time.monotonic() + 10
+        while not stream.chunks.full() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert stream.chunks.full() and stream.thread.is_alive()
+
+        display_list: list = []
+        document = SourceLayout(stream.chunks, RULES, display_list)
+        document.show(0, 600)
+        while not document.layout_until(document.y + document.height + 60000):
+            assert time.monotonic() < deadline + 20
+            if document.waiting:
+                time.sleep(0.01)
+        assert document.source() == SOURCE * 3
+    finally:
+        stream.close()
+    stream.thread.join(timeout=1)
+    assert not stream.thread.is_alive()
+
+
+def test_source_stream_stops_when_closed(tmp_path):
+    """Test that closing the stream releases a download blocked on a full queue."""
+    path = tmp_path / "page.html"
+    path.write_text(SOURCE * 3, encoding="utf-8")
+    stream = SourceStream(URL(path.as_uri()))
+    deadline = time.monotonic() + 10
+    while not stream.chunks.full() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    stream.close()
+    stream.thread.join(timeout=1)
+    assert not stream.thread.is_alive()